@@ -4,15 +4,34 @@ from bean.word_unit import WordUnit
 
 class SentenceUnit:
     """句子单元组成，每行为一个词单元，并获得每个词头部的词单元
+       构建时建立ID索引，依存子节点邻接表(按依存关系分组)与中心词指针，查询均为常数时间
     Attributes:
         words: WordUnit list，词单元列表
+        id_index: dict，ID到词单元的索引
+        child_index: dict，(中心词ID, 依存关系)到子节点词单元列表的索引，子节点按句中顺序排列
+        root: WordUnit，整个句子的中心词单元
+        parsed: bool，是否进行了依存句法分析，跳过分析(见NLP.pair_gate)的句子中心词没有依存关系，为False
     """
-    words = None
+    __slots__ = ('words', 'id_index', 'child_index', 'root', 'parsed')
+
     def __init__(self, words):
         self.words = words
-        for i in range(len(words)):
-            self.words[i].head_word = self.get_word_by_id(self.words[i].head)
-        
+        self.id_index = dict()
+        for word in words:
+            self.id_index.setdefault(word.ID, word)
+        self.child_index = dict()
+        self.root = None
+        for word in words:
+            word.head_word = self.id_index.get(word.head)
+            if word.head == 0 and self.root is None:
+                self.root = word
+            key = (word.head, word.dependency)
+            if key in self.child_index:
+                self.child_index[key].append(word)
+            else:
+                self.child_index[key] = [word]
+        self.parsed = self.root is not None and self.root.dependency != ''
+
     def get_word_by_id(self, id):
         """根据id获得词单元word
         Args:
@@ -20,20 +39,24 @@ class SentenceUnit:
         Returns:
             word: 词单元
         """
-        for word in self.words:
-            if word.ID == id:
-                return word
-        return None
+        return self.id_index.get(id)
+
+    def children(self, word, dependency):
+        """获得依存于word且依存关系为dependency的子节点
+        Args:
+            word: WordUnit，中心词单元
+            dependency: str，依存关系，如'ATT'
+        Returns:
+            children: WordUnit list，按句中顺序排列的子节点，不存在时为空列表
+        """
+        return self.child_index.get((word.ID, dependency), [])
 
     def get_head_word(self):
         """获得整个句子的中心词单元
         Returns:
             head_word: WordUnit，中心词单元
         """
-        for word in self.words:
-            if word.head == 0:
-                return word
-        return None
+        return self.root
 
     def to_string(self):
         """将一句中包含的word转成字符串，词单元之间换行
@@ -73,4 +96,5 @@ if __name__ == '__main__':
     print('"首都"的中心词lemma: ' + sentence.words[1].head_word.lemma)
 
     print('句子的中心词: ' + sentence.get_head_word().to_string())
+    print('"北京"的ATT子节点: ' + sentence.children(word3, 'ATT')[0].lemma)
 
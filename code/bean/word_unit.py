@@ -1,25 +1,29 @@
+import sys
+
+
 class WordUnit:
-    """词单元组成"""
-    # 定义类变量
-    # 当前词在句子中的序号，1开始
-    ID = 0
-    # 当前词语的原型(或标点)，就是切分后的一个词
-    lemma = ''
-    # 当前词语的词性
-    postag = ''
-    # 当前词语的中心词，及当前词的头部词
-    head = 0  # 指向词的ID
-    head_word = None # 该中心词单元
-    # 当前词语与中心词的依存关系
-    dependency = '' # 每个词都有指向自己的唯一依存
-
-    def __init__(self, ID, lemma, postag, head=0, head_word=None, dependency=''):
+    """词单元组成，使用__slots__避免每个实例的__dict__，词性与依存关系字符串驻留(intern)共享
+    Attributes:
+        ID: int，当前词在句子中的序号，1开始
+        lemma: str，当前词语的原型(或标点)，就是切分后的一个词
+        postag: str，当前词语的词性
+        head: int，当前词语的中心词，及当前词的头部词，指向词的ID
+        head_word: WordUnit，该中心词单元
+        dependency: str，当前词语与中心词的依存关系，每个词都有指向自己的唯一依存
+        start: int，当前词在(去除首尾空白后的)句子中的字符开始位置，-1表示未知
+        end: int，当前词在句子中的字符结束位置(不含)，-1表示未知
+    """
+    __slots__ = ('ID', 'lemma', 'postag', 'head', 'head_word', 'dependency', 'start', 'end')
+
+    def __init__(self, ID, lemma, postag, head=0, head_word=None, dependency='', start=-1, end=-1):
         self.ID = ID
         self.lemma = lemma
-        self.postag = postag
+        self.postag = sys.intern(postag)
         self.head = head
         self.head_word = head_word
-        self.dependency = dependency
+        self.dependency = sys.intern(dependency)
+        self.start = start
+        self.end = end
 
     def get_id(self):
         return self.ID
@@ -34,7 +38,7 @@ class WordUnit:
     def get_postag(self):
         return self.postag
     def set_postag(self, postag):
-        self.postag = postag
+        self.postag = sys.intern(postag)
 
     def get_head(self):
         return self.head
@@ -49,7 +53,26 @@ class WordUnit:
     def get_dependency(self):
         return self.dependency
     def set_dependency(self, dependency):
-        self.dependency = dependency
+        self.dependency = sys.intern(dependency)
+
+    def copy(self, ID):
+        """复制词单元并设置新的序号，不复制中心词单元(由SentenceUnit重新建立)，
+           词性与依存关系已经驻留，直接赋值而不再经过__init__
+        Args:
+            ID: int，新词单元的序号
+        Returns:
+            word: WordUnit，新的词单元
+        """
+        word = WordUnit.__new__(WordUnit)
+        word.ID = ID
+        word.lemma = self.lemma
+        word.postag = self.postag
+        word.head = self.head
+        word.head_word = None
+        word.dependency = self.dependency
+        word.start = self.start
+        word.end = self.end
+        return word
 
     def to_string(self):
         """将word的相关处理结果转成字符串，tab键间隔
@@ -0,0 +1,107 @@
+import os
+import random
+
+# 人名由姓与名组合生成
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘蒋蔡余杜叶程苏魏吕丁任沈姚卢'
+GIVEN_NAMES = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰萍红建文辉国力飞鹏宇浩凯俊帅晨阳欣怡'
+PLACES = ['北京', '上海', '广州', '深圳', '天津', '重庆', '南京', '杭州', '武汉', '成都', '西安', '长沙', '郑州',
+          '济南', '福州', '厦门', '沈阳', '昆明', '美国', '英国', '法国', '德国', '日本', '埃及', '俄罗斯']
+# 机构名由地名与后缀组成，分词后为两个词，由命名实体识别(B-Ni，E-Ni)与EntityCombine合并
+ORG_SUFFIXES = ['人民法院', '人民检察院', '律师事务所', '有限公司', '公安局', '大学']
+VERBS = ['访问', '起诉', '判决', '赔偿', '签订', '审理', '支付', '会见', '视察', '调解']
+FUNCTION_WORDS = {'于': 'p', '对': 'p', '在': 'p', '向': 'p', '和': 'c', '的': 'u', '了': 'u', '是': 'v',
+                  '毕业': 'v', '进行': 'v', '，': 'wp', '。': 'wp'}
+
+# DSNF句式模板，槽位：nh人名，ns地名，ni机构名，n普通名词(来自法律词典)，v动词
+TEMPLATES = [
+    ['nh', '毕业', '于', 'ni'],  # X毕业于Y，SBV_CMP_POB
+    ['nh', '对', 'ns', '进行', 'n'],  # X对Y进行Z，SBVorFOB_POB_VOB
+    ['nh', 'v', '了', 'ni'],  # X v Y，SBV_VOB
+    ['nh', '和', 'nh', 'v', '了', 'ns'],  # 并列主语
+    ['nh', 'v', '了', 'ns', '和', 'ns'],  # 并列宾语
+    ['ni', '的', 'nh', '在', 'ns', 'v', 'n'],  # "的"短语与介词短语
+    ['nh', '是', 'ni', '的', 'n'],  # "的"短语
+    ['ns', '的', 'ni', '向', 'nh', '支付', 'n'],
+]
+
+
+class CorpusGenerator:
+    """合成中文语料生成器，由resource/中的法律词典与DSNF句式模板生成句子，结果只由随机种子决定
+    Attributes:
+        nouns: str list，法律词典中的名词(2至4个字)
+        postags: dict，生成语料用到的全部词 -> 词性，供StubBackend使用
+    """
+    def __init__(self, lexicon_dir='../../resource/', seed=1):
+        self.rng = random.Random(seed)
+        self.nouns = []
+        for file in sorted(os.listdir(lexicon_dir)):
+            file_path = os.path.join(lexicon_dir, file)
+            if os.path.isdir(file_path):
+                continue
+            with open(file_path, 'r', encoding='utf-8') as f_in:
+                self.nouns.extend(line.strip() for line in f_in if 2 <= len(line.strip()) <= 4)
+        self.postags = dict.fromkeys(self.nouns, 'n')
+        self.postags.update(dict.fromkeys(PLACES, 'ns'))
+        self.postags.update(dict.fromkeys(ORG_SUFFIXES, 'n'))
+        self.postags.update(dict.fromkeys(VERBS, 'v'))
+        self.postags.update(FUNCTION_WORDS)
+
+    def get_name(self):
+        """生成人名"""
+        rng = self.rng
+        return rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN_NAMES) for i in range(rng.randint(1, 2)))
+
+    def generate_document(self, sentence_num):
+        """生成一篇文档，文档中的人名只在本文档内出现，作为文档实体词典
+        Args:
+            sentence_num: int，句子数量
+        Returns:
+            sentences: str list，句子列表
+            entity_postag: dict，文档实体词性词典(人名与地名)
+        """
+        rng = self.rng
+        names = [self.get_name() for i in range(4)]
+        entity_postag = dict.fromkeys(names, 'nh')
+        entity_postag.update(dict.fromkeys(PLACES, 'ns'))
+        for name in names:
+            self.postags[name] = 'nh'
+        sentences = []
+        for i in range(sentence_num):
+            words = []
+            for slot in rng.choice(TEMPLATES):
+                if slot == 'nh':
+                    words.append(rng.choice(names))
+                elif slot == 'ns':
+                    words.append(rng.choice(PLACES))
+                elif slot == 'ni':
+                    words.append(rng.choice(PLACES) + rng.choice(ORG_SUFFIXES))
+                elif slot == 'n':
+                    words.append(rng.choice(self.nouns))
+                elif slot == 'v':
+                    words.append(rng.choice(VERBS))
+                else:
+                    words.append(slot)
+            sentences.append(''.join(words) + '。')
+        return sentences, entity_postag
+
+    def generate(self, sentences, sentences_per_document=20):
+        """生成语料
+        Args:
+            sentences: int，句子总数
+            sentences_per_document: int，每篇文档的句子数量
+        Returns:
+            documents: (str list, dict) list，(句子列表，文档实体词性词典)
+        """
+        documents = []
+        while sentences > 0:
+            documents.append(self.generate_document(min(sentences, sentences_per_document)))
+            sentences -= sentences_per_document
+        return documents
+
+
+if __name__ == '__main__':
+    generator = CorpusGenerator()
+    for sentences, entity_postag in generator.generate(6, 3):
+        print(sorted(entity_postag)[:4])
+        for sentence in sentences:
+            print(sentence)
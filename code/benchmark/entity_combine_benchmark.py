@@ -0,0 +1,111 @@
+import argparse
+import gc
+import random
+import time
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from bean.word_unit import WordUnit
+from core.entity_combine import EntityCombine
+
+POSTAGS = ['n', 'v', 'nh', 'ns', 'ni', 'nz', 'j', 'p', 'u', 'wp', 'd', 'a']
+# 大部分词为O，其余为各种合法与不合法的B-I-E-S序列
+NETAGS = ['O'] * 12 + ['S-Nh', 'S-Ns', 'S-Ni', 'B-Nh', 'I-Nh', 'E-Nh', 'B-Ns', 'I-Ns', 'E-Ns', 'B-Ni', 'I-Ni', 'E-Ni']
+
+
+class LegacyEntityCombine(EntityCombine):
+    """对照组：改为区间解码之前的实现，字符串匹配标记，逐次拼接字符串，并生成中间列表"""
+    def combine(self, words, netags):
+        words_combine = []
+        length = len(netags)
+        n = 1
+        i = 0
+        while i < length:
+            if 'B-' in netags[i]:
+                newword = words[i].lemma
+                j = i + 1
+                while j < length:
+                    if 'I-' in netags[j]:
+                        newword += words[j].lemma
+                    elif 'E-' in netags[j]:
+                        newword += words[j].lemma
+                        break
+                    elif 'O' == netags[j] or (j+1) == length:
+                        break
+                    j += 1
+                words_combine.append(WordUnit(n, newword, self.judge_postag(netags[j-1])))
+                n += 1
+                i = j
+            else:
+                words[i].ID = n
+                n += 1
+                words_combine.append(words[i])
+            i += 1
+        return self.legacy_combine_comm(words_combine)
+
+    def legacy_combine_comm(self, words):
+        newword = words[0].lemma
+        words_combine = []
+        n = 1
+        i = 1
+        while i < len(words):
+            word = words[i]
+            if (self.is_entity(word.postag) and self.is_entity(words[i-1].postag)
+                and (word.postag in {'nz', 'j'} or words[i-1].postag in {'nz', 'j'})):
+                newword += word.lemma
+            else:
+                words_combine.append(WordUnit(n, newword, words[i-1].postag))
+                n += 1
+                newword = word.lemma
+            i += 1
+        words_combine.append(WordUnit(n, newword, words[len(words)-1].postag))
+        return words_combine
+
+
+def build_sentence(rng, length):
+    """构造随机的分词，词性标注与命名实体识别结果
+    Returns:
+        (lemmas, postags, netags): 分词，词性标注与命名实体识别结果
+    """
+    lemmas = ['词' + str(rng.randrange(100)) for i in range(length)]
+    postags = [rng.choice(POSTAGS) for i in range(length)]
+    netags = [rng.choice(NETAGS) for i in range(length)]
+    return lemmas, postags, netags
+
+
+def run(entity_combine, sentences, repeat):
+    """运行合并repeat次，返回最短耗时与最后一次的结果
+    Returns:
+        (seconds, results): 耗时(秒)，每个句子合并后的(ID，词，词性)列表
+    """
+    best = None
+    results = []
+    for k in range(repeat):
+        # 词单元每次新建，两种实现都会复用输入的词单元并修改其序号
+        inputs = [([WordUnit(i+1, lemmas[i], postags[i]) for i in range(len(lemmas))], netags)
+                  for lemmas, postags, netags in sentences]
+        gc.disable()  # 避免垃圾回收的停顿影响计时
+        start = time.perf_counter()
+        outputs = [entity_combine.combine(words, netags) for words, netags in inputs]
+        seconds = time.perf_counter() - start
+        gc.enable()
+        if best is None or seconds < best:
+            best = seconds
+        results = [[(word.ID, word.lemma, word.postag) for word in words] for words in outputs]
+    return best, results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='命名实体合并性能测试')
+    parser.add_argument('--sentences', type=int, default=20000, help='随机句子数量')
+    parser.add_argument('--repeat', type=int, default=7, help='重复次数，取最短耗时')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    print('length\tlegacy_s\tspan_s\tspeedup\tidentical')
+    for length in (10, 50, 200, 1000):
+        sentences = [build_sentence(rng, rng.randint(1, length)) for i in range(args.sentences * 10 // length)]
+        legacy_seconds, legacy_results = run(LegacyEntityCombine(), sentences, args.repeat)
+        span_seconds, span_results = run(EntityCombine(), sentences, args.repeat)
+        print('%d\t%.4f\t%.4f\t%.2fx\t%s' % (length, legacy_seconds, span_seconds, legacy_seconds / span_seconds,
+                                              legacy_results == span_results))
@@ -0,0 +1,107 @@
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from core.nlp import NLP
+from core.extractor import Extractor
+from benchmark.corpus_generator import CorpusGenerator, ORG_SUFFIXES
+from benchmark.stub_backend import StubBackend
+
+
+def build_corpus(generator, sentences, max_clauses, seed):
+    """生成逗号连接的长句语料：大部分句子只有一至三个子句，少数句子有数十个子句，并夹杂没有谓语的子句(如"男")
+    Args:
+        generator: CorpusGenerator，语料生成器
+        sentences: int，句子数量
+        max_clauses: int，最长句子的子句数量
+        seed: int，随机种子
+    Returns:
+        documents: (str list, dict) list，(句子列表，文档实体词性词典)，每个句子一篇文档
+    """
+    rng = random.Random(seed)
+    documents = []
+    for i in range(sentences):
+        clause_num = rng.randint(max_clauses // 2, max_clauses) if rng.random() < 0.05 else rng.randint(1, 3)
+        clauses, entity_postag = generator.generate_document(clause_num)
+        clauses = [clause.rstrip('。') for clause in clauses]
+        for k in range(clause_num // 4):
+            clauses.insert(rng.randrange(len(clauses) + 1), rng.choice(['男', '汉族', '无业']))
+        documents.append((['，'.join(clauses) + '。'], entity_postag))
+    return documents
+
+
+class TimedParser:
+    """记录依存句法分析累计耗时的包装
+    Attributes:
+        parser: 被包装的依存句法分析模型
+        seconds: float，累计耗时(秒)
+    """
+    def __init__(self, parser):
+        self.parser = parser
+        self.seconds = 0.0
+
+    def parse(self, lemmas, postags):
+        start = time.perf_counter()
+        arcs = self.parser.parse(lemmas, postags)
+        self.seconds += time.perf_counter() - start
+        return arcs
+
+
+def run(documents, nlp):
+    """逐句分析与抽取，记录每个句子的耗时与其中依存句法分析的耗时
+    Returns:
+        latencies: float list，每个句子的耗时(秒)
+        parse_latencies: float list，每个句子依存句法分析的耗时(秒)
+        triples: set，抽取出的(句子序号，三元组)
+    """
+    parser = nlp.parser = TimedParser(nlp.parser)
+    latencies = []
+    parse_latencies = []
+    triples = set()
+    for index, (sentences, entity_postag) in enumerate(documents):
+        knowledges = []
+        parse_seconds = parser.seconds
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # 抽取规则会打印三元组
+            sentence = nlp.analyze_batch(sentences, entity_postag)[0]
+            Extractor().extract(sentences[0], sentence, knowledges, 1)
+        latencies.append(time.perf_counter() - start)
+        parse_latencies.append(parser.seconds - parse_seconds)
+        triples.update((index, tuple(knowledge['知识'])) for knowledge in knowledges)
+    return latencies, parse_latencies, triples
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='长句分段前后的逐句延迟(p50/p99)与三元组数量')
+    parser.add_argument('--sentences', type=int, default=2000, help='句子数量')
+    parser.add_argument('--max-clauses', type=int, default=60, help='最长句子的子句数量')
+    parser.add_argument('--parse-budget', type=int, default=100, help='每段最多的词数量')
+    parser.add_argument('--parse-token-cap', type=int, default=200, help='每段词数量的硬上限')
+    parser.add_argument('--seed', type=int, default=1, help='语料随机种子')
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(seed=args.seed)
+    documents = build_corpus(generator, args.sentences, args.max_clauses, args.seed)
+    backend = StubBackend(generator.postags, ORG_SUFFIXES)
+    results = dict()
+    print('mode\tp50_ms\tp99_ms\tmax_ms\tparse_p99_ms\tparse_max_ms\ttotal_s\ttriples\tclause_split')
+    for mode, budget in (('whole', None), ('split', args.parse_budget)):
+        nlp = NLP(backend=backend, analysis_cache_size=0, parse_budget=budget, parse_token_cap=args.parse_token_cap)
+        nlp.warmup()
+        latencies, parse_latencies, triples = run(documents, nlp)
+        results[mode] = triples
+        print('%s\t%.2f\t%.2f\t%.2f\t%.2f\t%.2f\t%.2f\t%d\t%s' % (
+            mode, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000, max(latencies) * 1000,
+            percentile(parse_latencies, 0.99) * 1000, max(parse_latencies) * 1000, sum(latencies), len(triples),
+            nlp.clause_splitter.counts if nlp.clause_splitter else '-'))
+    print('triples kept after splitting: %d of %d, new: %d' % (
+        len(results['whole'] & results['split']), len(results['whole']), len(results['split'] - results['whole'])))
@@ -0,0 +1,67 @@
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from core.nlp import NLP
+from core.parallel_extractor import ParallelExtractor, init_worker
+from benchmark.corpus_generator import CorpusGenerator, ORG_SUFFIXES
+from benchmark.stub_backend import StubBackend
+
+
+def build_corpus(generator, size):
+    """由合成语料生成器构造指定规模的语料，句子几乎互不相同，分析结果缓存不会命中
+    Args:
+        generator: CorpusGenerator，语料生成器
+        size: int，句子数量
+    Returns:
+        corpus: str list，句子列表
+    """
+    return [sentence for sentences, entity_postag in generator.generate(size) for sentence in sentences]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='多进程抽取扩展性测试')
+    parser.add_argument('--backend', choices=['ltp', 'stub'], default='stub', help='ltp需要模型文件')
+    parser.add_argument('--sentences', type=int, default=20000, help='合成语料的句子数量')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count(), help='最大工作进程数量')
+    parser.add_argument('--batch-size', type=int, default=64, help='每个任务包含的句子数量')
+    parser.add_argument('--seed', type=int, default=1, help='语料随机种子')
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(seed=args.seed)
+    corpus = build_corpus(generator, args.sentences)
+    # 不使用分析结果缓存，每个句子都完整分析一次
+    nlp_options = {'analysis_cache_size': 0}
+    if args.backend == 'stub':
+        nlp_options['backend'] = StubBackend(generator.postags, ORG_SUFFIXES)
+    workers_list = []
+    workers = 1
+    while workers < args.max_workers:
+        workers_list.append(workers)
+        workers *= 2
+    workers_list.append(args.max_workers)
+
+    # 模型与词典在计时之前由父进程加载一次，各次运行的工作进程fork后继承，不计入耗时
+    init_worker(NLP.default_user_dict_dir, NLP.default_model_dir, nlp_options=nlp_options)
+    print('cpus: %d, sentences: %d (%d distinct), backend: %s' % (os.cpu_count(), len(corpus), len(set(corpus)),
+                                                                 args.backend))
+    print('workers\tseconds\tsentences/s\tspeedup\tefficiency\tsame_output')
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        baseline_path = None
+        for workers in workers_list:
+            output_path = os.path.join(tmp_dir, 'triples_%d.json' % workers)
+            extractor = ParallelExtractor(workers, args.batch_size, nlp_options=nlp_options, verbose=False)
+            start = time.perf_counter()
+            extractor.extract(corpus, output_path)
+            seconds = time.perf_counter() - start
+            if baseline is None:
+                baseline, baseline_path = seconds, output_path
+            speedup = baseline / seconds
+            print('%d\t%.2f\t%.1f\t%.2f\t%.2f\t%s' % (workers, seconds, len(corpus) / seconds, speedup,
+                                                      speedup / workers,
+                                                      filecmp.cmp(baseline_path, output_path, shallow=False)))
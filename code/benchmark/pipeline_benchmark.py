@@ -0,0 +1,202 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from bean.word_unit import WordUnit
+from bean.sentence_unit import SentenceUnit
+from core.nlp import NLP
+from core.entity_combine import EntityCombine
+from core.extractor import Extractor
+from tool.triple_sink import TripleSink
+from tool.parse_bank import ParseBank, ParseBankWriter
+from benchmark.corpus_generator import CorpusGenerator, ORG_SUFFIXES
+from benchmark.stub_backend import StubBackend
+
+
+def best_of(repeat, function):
+    """运行function repeat次，返回最短耗时与最后一次的结果
+    Returns:
+        (seconds, result): 最短耗时(秒)，function的返回值
+    """
+    best = None
+    result = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # 抽取规则会打印三元组
+            result = function()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best, result
+
+
+def get_commit():
+    """获得当前git提交，用于比较不同提交之间的结果"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(documents, nlp, repeat, work_dir):
+    """分阶段与端到端测试
+    Args:
+        documents: (str list, dict) list，(句子列表，文档实体词性词典)
+        nlp: NLP，使用StubBackend的NLP实例(不使用分析结果缓存)
+        repeat: int，重复次数
+        work_dir: str，写出三元组的临时目录
+    Returns:
+        stages: dict，阶段名 -> 耗时(秒)
+        counts: dict，句子，词与三元组数量
+    """
+    stages = dict()
+    backend_postagger, recognizer, parser = nlp.postagger, nlp.recognizer, nlp.parser
+    sentences = [sentence for document in documents for sentence in document[0]]
+    sources = [(str(i), j) for i, document in enumerate(documents) for j in range(len(document[0]))]
+
+    def segment():
+        lemmas_batch = []
+        for document_sentences, entity_postag in documents:
+            with nlp.document(entity_postag):
+                lemmas_batch.extend(nlp.tokenizer.lcut(sentence) for sentence in document_sentences)
+        return lemmas_batch
+    stages['segment'], lemmas_batch = best_of(repeat, segment)
+
+    def stub_backend():
+        postags_batch = [backend_postagger.postag(lemmas) for lemmas in lemmas_batch]
+        netags_batch = [recognizer.recognize(lemmas, postags) for lemmas, postags in zip(lemmas_batch, postags_batch)]
+        return postags_batch, netags_batch
+    stages['stub_backend'], (postags_batch, netags_batch) = best_of(repeat, stub_backend)
+
+    entity_combine = EntityCombine()
+
+    def combine():
+        return [entity_combine.combine(nlp.build_words(sentence, lemmas, postags), netags)
+                for sentence, lemmas, postags, netags in zip(sentences, lemmas_batch, postags_batch, netags_batch)]
+    stages['entity_combine'], words_batch = best_of(repeat, combine)
+
+    arcs_batch = [parser.parse([word.lemma for word in words], [word.postag for word in words])
+                  for words in words_batch]
+
+    def sentence_unit():
+        sentence_units = []
+        for words, arcs in zip(words_batch, arcs_batch):
+            sentence_units.append(SentenceUnit([
+                WordUnit(word.ID, word.lemma, word.postag, arc.head, None, arc.relation, word.start, word.end)
+                for word, arc in zip(words, arcs)]))
+        return sentence_units
+    stages['sentence_unit'], sentence_units = best_of(repeat, sentence_unit)
+
+    def extract():
+        triples = []
+        num = 1
+        for origin_sentence, sentence, source in zip(sentences, sentence_units, sources):
+            num = Extractor().extract(origin_sentence, sentence, triples, num, source)
+        return triples
+    stages['extract'], triples = best_of(repeat, extract)
+
+    def write(sentence_path=None):
+        with TripleSink(os.path.join(work_dir, 'write.json'), mode='w', sentence_path=sentence_path) as sink:
+            for knowledge in triples:
+                sink.append(knowledge)
+        return sink.byte_count
+    stages['write'], write_bytes = best_of(repeat, write)
+    # 句子只写出一次，三元组只记录出处与字符位置
+    stages['write_sentence_table'], sentence_table_bytes = best_of(
+        repeat, lambda: write(os.path.join(work_dir, 'sentence.json')))
+
+    # 分析库：保存分析结果，重放抽取(读取与重建SentenceUnit，抽取)
+    bank_path = os.path.join(work_dir, 'parse_bank.bin')
+
+    def parse_bank_write():
+        with ParseBankWriter(bank_path) as bank:
+            for origin_sentence, sentence, source in zip(sentences, sentence_units, sources):
+                bank.append(source, origin_sentence, sentence)
+        return bank.byte_count
+    stages['parse_bank_write'], parse_bank_bytes = best_of(repeat, parse_bank_write)
+
+    def parse_bank_replay():
+        triples = []
+        num = 1
+        extractor = Extractor()
+        with ParseBank(bank_path) as bank:
+            for doc_id, sentence_index, origin_sentence, sentence in bank:
+                num = extractor.extract(origin_sentence, sentence, triples, num, (doc_id, sentence_index))
+        return triples
+    stages['parse_bank_replay'], replay_triples = best_of(repeat, parse_bank_replay)
+    if replay_triples != triples:
+        raise AssertionError('parse bank replay differs from extraction')
+
+    def end_to_end():
+        num = 1
+        with TripleSink(os.path.join(work_dir, 'end_to_end.json'), mode='w') as sink:
+            for document_sentences, entity_postag in documents:
+                for origin_sentence, sentence in zip(document_sentences,
+                                                     nlp.analyze_batch(document_sentences, entity_postag)):
+                    num = Extractor().extract(origin_sentence, sentence, sink, num)
+        return num - 1
+    stages['end_to_end'], end_to_end_triples = best_of(repeat, end_to_end)
+
+    counts = {'sentences': len(sentences), 'tokens': sum(len(lemmas) for lemmas in lemmas_batch),
+              'triples': len(triples), 'end_to_end_triples': end_to_end_triples,
+              'write_bytes': write_bytes, 'sentence_table_bytes': sentence_table_bytes,
+              'parse_bank_bytes': parse_bank_bytes}
+    return stages, counts
+
+
+def compare(results, baseline):
+    """打印与之前结果的耗时比较
+    Args:
+        results: dict，本次结果
+        baseline: dict，之前的结果(同样参数下运行)
+    """
+    print('stage\tbaseline_s\tcurrent_s\tchange')
+    for stage, current in results['stages'].items():
+        before = baseline['stages'].get(stage)
+        if before:
+            print('%s\t%.4f\t%.4f\t%+.1f%%' % (stage, before['seconds'], current['seconds'],
+                                                (current['seconds'] / before['seconds'] - 1) * 100))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='不依赖ltp模型的分阶段与端到端基准测试')
+    parser.add_argument('--sentences', type=int, default=20000, help='合成语料的句子数量')
+    parser.add_argument('--sentences-per-document', type=int, default=20, help='每篇文档的句子数量')
+    parser.add_argument('--seed', type=int, default=1, help='语料随机种子')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最短耗时')
+    parser.add_argument('--output', help='结果Json文件，用于不同提交之间的比较')
+    parser.add_argument('--compare', help='之前的结果Json文件')
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(seed=args.seed)
+    documents = generator.generate(args.sentences, args.sentences_per_document)
+    nlp = NLP(backend=StubBackend(generator.postags, ORG_SUFFIXES), analysis_cache_size=0)
+    with tempfile.TemporaryDirectory() as work_dir:
+        stages, counts = run_benchmarks(documents, nlp, args.repeat, work_dir)
+
+    results = {'commit': get_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+               'sentences': args.sentences, 'seed': args.seed, 'repeat': args.repeat, 'counts': counts,
+               'stages': {stage: {'seconds': seconds, 'sentences_per_second': counts['sentences'] / seconds}
+                          for stage, seconds in stages.items()}}
+    print('stage\tseconds\tsentences/s')
+    for stage, result in results['stages'].items():
+        print('%s\t%.4f\t%.0f' % (stage, result['seconds'], result['sentences_per_second']))
+    print('%(sentences)d sentences, %(tokens)d tokens, %(triples)d triples' % counts)
+    print('output: %(write_bytes)d bytes with sentence text, %(sentence_table_bytes)d bytes with sentence table'
+          % counts)
+    print('parse bank: %(parse_bank_bytes)d bytes' % counts)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f_out:
+            json.dump(results, f_out, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f_in:
+            compare(results, json.load(f_in))
@@ -0,0 +1,120 @@
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from bean.word_unit import WordUnit
+from bean.sentence_unit import SentenceUnit
+from core.extractor import Extractor
+from core.extract_by_dsnf import ExtractByDSNF
+
+# 词性与依存关系按法律文书中的大致比例抽样
+POSTAGS = {'n': 25, 'v': 20, 'wp': 12, 'p': 6, 'u': 6, 'd': 6, 'nh': 4, 'ni': 3, 'ns': 3, 'nz': 2, 'j': 1,
+           'm': 4, 'q': 3, 'a': 3, 'r': 2}
+DEPENDENCIES = {'ATT': 22, 'ADV': 14, 'WP': 12, 'VOB': 10, 'SBV': 8, 'RAD': 6, 'COO': 5, 'POB': 5,
+                'CMP': 2, 'LAD': 2, 'FOB': 1, 'IOB': 1, 'DBL': 1}
+LEMMAS = ['的', '被', '由', '于', '对', '和', '中国', '法院', '访问', '进行', '判决', '原告', '被告', '车辆',
+          '事故', '赔偿', '认定', '交通', '驾驶', '公司']
+
+
+def build_sentence(rng, length):
+    """构造一个随机依存句子，中心词多在附近，接近真实依存树的形状
+    Args:
+        rng: random.Random，随机数生成器
+        length: int，句子词数
+    Returns:
+        *: SentenceUnit，句子单元
+    """
+    postags = rng.choices(list(POSTAGS), list(POSTAGS.values()), k=length)
+    dependencies = rng.choices(list(DEPENDENCIES), list(DEPENDENCIES.values()), k=length)
+    words = []
+    root = rng.randint(1, length)
+    for i in range(1, length + 1):
+        if i == root:
+            head, dependency = 0, 'HED'
+        else:
+            head = i
+            while head == i:
+                head = min(max(i + rng.randint(-3, 3), 1), length)
+            dependency = dependencies[i - 1]
+        words.append(WordUnit(i, rng.choice(LEMMAS), postags[i - 1], head, None, dependency))
+    return SentenceUnit(words)
+
+
+def extract_each_rule(origin_sentence, sentence, triples, num):
+    """对照组：每个实体对新建ExtractByDSNF并依次尝试全部规则"""
+    extractor = Extractor()
+    extractor.get_entities(sentence)
+    for entity_pair in extractor.iter_entity_pairs(sentence):
+        entity1 = entity_pair.entity1
+        entity2 = entity_pair.entity2
+        extract_dsnf = ExtractByDSNF(origin_sentence, sentence, entity1, entity2, triples, num)
+        extract_dsnf.SBV_VOB(entity1, entity2)
+        extract_dsnf.SBV_CMP_POB(entity1, entity2)
+        extract_dsnf.SBVorFOB_POB_VOB(entity1, entity2)
+        extract_dsnf.coordinate(entity1, entity2)
+        extract_dsnf.entity_de_entity_NNT(entity1, entity2)
+        num = extract_dsnf.num
+    return num
+
+
+def enumerate_pairs(origin_sentence, sentence, triples, num):
+    """只生成实体对，不调用规则，两种方式共有的开销"""
+    extractor = Extractor()
+    extractor.get_entities(sentence)
+    for entity_pair in extractor.iter_entity_pairs(sentence):
+        pass
+    return num
+
+
+def extract_rule_engine(origin_sentence, sentence, triples, num):
+    """规则引擎"""
+    return Extractor().extract(origin_sentence, sentence, triples, num)
+
+
+def run(extract, sentences, repeat):
+    """运行抽取repeat次，返回最短耗时与三元组
+    Returns:
+        (seconds, triples): 耗时(秒)，三元组列表
+    """
+    best = None
+    for k in range(repeat):
+        triples = []
+        num = 1
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, sentence in enumerate(sentences):
+                try:
+                    num = extract(str(i), sentence, triples, num)
+                except (AttributeError, IndexError):
+                    # 随机依存树可能不满足规则假设，两种方式抛出的异常相同
+                    triples.append('error')
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best, triples
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='DSNF规则引擎性能测试')
+    parser.add_argument('--sentences', type=int, default=20000, help='随机句子数量')
+    parser.add_argument('--min-length', type=int, default=5, help='句子最小词数')
+    parser.add_argument('--max-length', type=int, default=60, help='句子最大词数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最短耗时')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    sentences = [build_sentence(rng, rng.randint(args.min_length, args.max_length))
+                 for i in range(args.sentences)]
+    pairs_seconds = run(enumerate_pairs, sentences, args.repeat)[0]
+    baseline_seconds, baseline_triples = run(extract_each_rule, sentences, args.repeat)
+    engine_seconds, engine_triples = run(extract_rule_engine, sentences, args.repeat)
+    print('entity pairs only: %.2fs' % pairs_seconds)
+    print('each rule:         %.2fs' % baseline_seconds)
+    print('rule engine:       %.2fs' % engine_seconds)
+    print('speedup: %.2fx overall, %.2fx excluding pair generation' % (
+        baseline_seconds / engine_seconds, (baseline_seconds - pairs_seconds) / (engine_seconds - pairs_seconds)))
+    print('identical output: %s (%d triples)' % (baseline_triples == engine_triples, len(engine_triples)))
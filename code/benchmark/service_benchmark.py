@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from core.nlp import NLP
+from core.extraction_service import ExtractionService
+from benchmark.corpus_generator import CorpusGenerator, ORG_SUFFIXES
+from benchmark.stub_backend import StubBackend
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    """在keep-alive连接上发送一个HTTP请求
+    Returns:
+        (status, body): HTTP状态码与解析后的Json响应
+    """
+    data = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    writer.write(('%s %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n'
+                  % (method, path, host, len(data))).encode('latin-1') + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads((await reader.readexactly(length)).decode('utf-8'))
+
+
+async def client(host, port, requests, latencies, statuses):
+    """一个客户端连接，依次发送分配给它的请求
+    Args:
+        requests: list，请求的句子列表
+        latencies: list，成功请求的延迟(秒)
+        statuses: dict，状态码 -> 数量
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for sentences in requests:
+            start = time.perf_counter()
+            status, body = await request(reader, writer, host, 'POST', '/extract', {'sentences': sentences})
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, requests, connections):
+    """并发发送全部请求，返回耗时，成功请求的延迟，各状态码数量与服务统计信息"""
+    latencies = []
+    statuses = dict()
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, requests[i::connections], latencies, statuses)
+                           for i in range(connections)])
+    seconds = time.perf_counter() - start
+    reader, writer = await asyncio.open_connection(host, port)
+    stats = (await request(reader, writer, host, 'GET', '/stats'))[1]
+    writer.close()
+    return seconds, latencies, statuses, stats
+
+
+def start_local_service(service):
+    """在后台线程的事件循环中启动服务
+    Returns:
+        (loop, port): 服务的事件循环与系统分配的端口
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    result = dict()
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(service.start('127.0.0.1', 0))
+        result['port'] = server.sockets[0].getsockname()[1]
+        started.set()
+        loop.run_forever()
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait()
+    return loop, result['port']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='抽取服务负载测试：吞吐量与延迟')
+    parser.add_argument('--url', help='已启动的服务地址(如http://127.0.0.1:8000)，默认在进程内启动使用StubBackend的服务')
+    parser.add_argument('--requests', type=int, default=2000, help='请求数量')
+    parser.add_argument('--sentences-per-request', type=int, default=4, help='每个请求的句子数量')
+    parser.add_argument('--connections', nargs='*', type=int, default=[1, 4, 16, 64], help='并发连接数量')
+    parser.add_argument('--batch-size', type=int, default=64, help='进程内服务每批最多的句子数量')
+    parser.add_argument('--batch-delay', type=float, default=0.005, help='进程内服务等待组批的最长时间(秒)')
+    parser.add_argument('--max-pending', type=int, default=4096, help='进程内服务等待组批的最大句子数量')
+    parser.add_argument('--seed', type=int, default=1, help='语料随机种子')
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(seed=args.seed)
+    sentences = [sentence for document in generator.generate(args.requests * args.sentences_per_request)
+                 for sentence in document[0]]
+    requests = [sentences[i:i + args.sentences_per_request]
+                for i in range(0, len(sentences), args.sentences_per_request)]
+
+    print('connections\tseconds\trequests/s\tsentences/s\tp50_ms\tp99_ms\tmean_batch\tstatuses')
+    for connections in args.connections:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port
+            loop = None
+        else:
+            nlp = NLP(backend=StubBackend(generator.postags, ORG_SUFFIXES), analysis_cache_size=0)
+            service = ExtractionService(nlp, batch_size=args.batch_size, batch_delay=args.batch_delay,
+                                        max_pending=args.max_pending)
+            loop, port = start_local_service(service)
+            host = '127.0.0.1'
+        seconds, latencies, statuses, stats = asyncio.new_event_loop().run_until_complete(
+            run_load(host, port, requests, connections))
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(service.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+        print('%d\t%.2f\t%.1f\t%.1f\t%.2f\t%.2f\t%.1f\t%s' % (
+            connections, seconds, len(requests) / seconds, len(requests) * args.sentences_per_request / seconds,
+            p50 * 1000, p99 * 1000, stats['mean_batch_size'], statuses))
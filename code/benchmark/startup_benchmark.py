@@ -0,0 +1,89 @@
+import time
+START = time.perf_counter()  # 子进程启动后的计时起点，在导入其他模块之前
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import subprocess
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+
+SCENARIOS = ['import', 'segment', 'first_triple', 'warmup']
+
+
+def elapsed():
+    return time.perf_counter() - START
+
+
+def run_scenario(scenario, backend, input_path):
+    """在全新的解释器中运行一个场景，记录各里程碑距进程启动的时间
+    Args:
+        scenario: str，'import'只导入core.nlp，'segment'首次分词，'first_triple'首个三元组，'warmup'预加载全部资源
+        backend: str，'ltp'使用ltp模型(按需加载)，'stub'使用StubBackend
+        input_path: str，ltp后端使用的样例文本文件
+    Returns:
+        milestones: dict，里程碑 -> 秒
+    """
+    milestones = dict()
+    from core.nlp import NLP
+    from core.extractor import Extractor
+    milestones['import'] = elapsed()
+    if scenario == 'import':
+        return milestones
+    if backend == 'stub':
+        from benchmark.corpus_generator import CorpusGenerator, ORG_SUFFIXES
+        from benchmark.stub_backend import StubBackend
+        generator = CorpusGenerator(seed=1)
+        sentences = generator.generate_document(20)[0]
+        nlp = NLP(backend=StubBackend(generator.postags, ORG_SUFFIXES))
+    else:
+        with open(input_path, 'r', encoding='utf-8') as f_in:
+            sentences = [sentence for sentence in re.split('[。？！；]|\n', f_in.read()) if len(sentence) >= 6]
+        nlp = NLP()
+    milestones['init'] = elapsed()
+    if scenario == 'segment':
+        nlp.segment(sentences[0])
+        milestones['first_segment'] = elapsed()
+    elif scenario == 'first_triple':
+        triples = []
+        for sentence in sentences:
+            with contextlib.redirect_stdout(io.StringIO()):  # 抽取规则会打印三元组
+                Extractor().extract(sentence, nlp.analyze_batch([sentence])[0], triples, 1)
+            if triples:
+                break
+        milestones['first_triple'] = elapsed()
+    elif scenario == 'warmup':
+        nlp.warmup()
+        milestones['warmup'] = elapsed()
+    return milestones
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='启动时间与首个三元组时间，每次在全新的解释器中测量')
+    parser.add_argument('--backend', choices=['ltp', 'stub'], default='stub', help='ltp需要模型文件')
+    parser.add_argument('--input', default='../../data/input_text.txt', help='ltp后端使用的样例文本文件')
+    parser.add_argument('--scenarios', nargs='*', choices=SCENARIOS, default=SCENARIOS, help='测量的场景')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最短耗时')
+    parser.add_argument('--scenario', choices=SCENARIOS, help=argparse.SUPPRESS)  # 子进程内运行的场景
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.scenario, args.backend, args.input)))
+        sys.exit(0)
+
+    print('scenario\tprocess_s\tmilestones')
+    for scenario in args.scenarios:
+        best = None
+        for i in range(args.repeat):
+            start = time.perf_counter()
+            output = subprocess.check_output([sys.executable, __file__, '--scenario', scenario,
+                                              '--backend', args.backend, '--input', args.input],
+                                             universal_newlines=True)
+            seconds = time.perf_counter() - start
+            milestones = json.loads(output.strip().splitlines()[-1])
+            if best is None or seconds < best[0]:
+                best = (seconds, milestones)
+        print('%s\t%.3f\t%s' % (scenario, best[0], ', '.join('%s %.3f' % item for item in best[1].items())))
@@ -0,0 +1,114 @@
+class Arc:
+    """依存弧，与pyltp的Arc相同，head为中心词编号(从1开始，0表示根)，relation为依存关系"""
+    def __init__(self, head, relation):
+        self.head = head
+        self.relation = relation
+
+
+class StubPostagger:
+    """替代ltp词性标注模型，按词表查找词性，未知的词标为名词
+    Attributes:
+        postags: dict，词 -> 词性
+    """
+    def __init__(self, postags):
+        self.postags = postags
+
+    def load(self, model_path):
+        return 0
+
+    def postag(self, lemmas):
+        return [self.postags.get(lemma, 'n') for lemma in lemmas]
+
+    def release(self):
+        pass
+
+
+class StubRecognizer:
+    """替代ltp命名实体识别模型：人名，地名与机构名为单个实体(S-)，地名后接机构后缀时为B-Ni，E-Ni
+    Attributes:
+        org_suffixes: set，机构名后缀
+    """
+    netags = {'nh': 'S-Nh', 'ns': 'S-Ns', 'ni': 'S-Ni'}
+
+    def __init__(self, org_suffixes):
+        self.org_suffixes = org_suffixes
+
+    def load(self, model_path):
+        return 0
+
+    def recognize(self, lemmas, postags):
+        netags = []
+        length = len(lemmas)
+        for i in range(length):
+            if postags[i] == 'ns' and i + 1 < length and lemmas[i+1] in self.org_suffixes:
+                netags.append('B-Ni')
+            elif i > 0 and netags[i-1] == 'B-Ni':
+                netags.append('E-Ni')
+            else:
+                netags.append(self.netags.get(postags[i], 'O'))
+        return netags
+
+    def release(self):
+        pass
+
+
+class StubParser:
+    """替代ltp依存句法分析模型，按词性构造符合DSNF句式的依存树
+       第一个动词为核心，介词短语(POB，ADV/CMP)，并列(COO，LAD)，"的"字结构(ATT，RAD)，
+       其余名词在核心动词前为SBV，之后为VOB
+    """
+    nominal_postags = {'n', 'nh', 'ns', 'ni', 'nz', 'j'}
+
+    def load(self, model_path):
+        return 0
+
+    def parse(self, lemmas, postags):
+        length = len(postags)
+        verbs = [i for i in range(length) if postags[i] == 'v']
+        root = verbs[0] if verbs else length - 1
+        heads = [None] * length
+        relations = [None] * length
+        heads[root], relations[root] = -1, 'HED'
+        for i in verbs[1:]:
+            heads[i], relations[i] = root, 'COO'
+        for i in range(length):
+            postag = postags[i]
+            if postag == 'p' and i + 1 < length:
+                heads[i+1], relations[i+1] = i, 'POB'
+                if i == root + 1:
+                    heads[i], relations[i] = root, 'CMP'
+                else:
+                    heads[i], relations[i] = next((j for j in verbs if j > i), root), 'ADV'
+            elif postag == 'c' and 0 < i < length - 1:
+                heads[i+1], relations[i+1] = i - 1, 'COO'
+                heads[i], relations[i] = i + 1, 'LAD'
+            elif postag == 'u' and lemmas[i] == '的' and 0 < i < length - 1:
+                heads[i-1], relations[i-1] = i + 1, 'ATT'
+                heads[i], relations[i] = i - 1, 'RAD'
+            elif postag == 'u' and heads[i] is None:
+                heads[i], relations[i] = max([j for j in verbs if j < i], default=root), 'RAD'
+            elif postag == 'wp':
+                heads[i], relations[i] = root, 'WP'
+        for i in range(length):
+            if heads[i] is None:
+                if postags[i] in self.nominal_postags:
+                    heads[i], relations[i] = root, 'SBV' if i < root else 'VOB'
+                else:
+                    heads[i], relations[i] = root, 'ADV'
+        return [Arc(heads[i] + 1, relations[i]) for i in range(length)]
+
+    def release(self):
+        pass
+
+
+class StubBackend:
+    """不依赖ltp模型文件的确定性后端，用于基准测试：NLP(backend=StubBackend(...))
+    Attributes:
+        postagger: StubPostagger，词性标注
+        recognizer: StubRecognizer，命名实体识别
+        parser: StubParser，依存句法分析
+    """
+    def __init__(self, postags, org_suffixes):
+        self.postagger = StubPostagger(postags)
+        self.recognizer = StubRecognizer(set(org_suffixes))
+        self.parser = StubParser()
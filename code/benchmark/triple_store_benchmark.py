@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from tool.triple_store import TripleStore
+
+RELATIONS = ['访问', '判决', '赔偿', '驾驶', '认定', '起诉', '支付', '签订', '担任', '位于']
+
+
+def sample_entity(rng, entities):
+    """按近似Zipf分布(对数均匀的排名)抽样实体，少数实体出现得非常频繁，接近真实语料
+    Args:
+        rng: random.Random，随机数生成器
+        entities: int，不同实体的数量
+    Returns:
+        *: str，实体
+    """
+    return '实体' + str(int(entities ** rng.random()) - 1)
+
+
+def iter_knowledges(rng, triples, entities):
+    """生成随机知识三元组，主语按近似Zipf分布抽样，宾语均匀抽样
+    Args:
+        rng: random.Random，随机数生成器
+        triples: int，三元组数量
+        entities: int，不同实体的数量
+    Yields:
+        knowledge: dict，知识三元组，每个句子平均包含两个三元组
+    """
+    sentence = ''
+    for num in range(1, triples + 1):
+        if num % 2:
+            sentence = '句子' + str(num)
+        subject = sample_entity(rng, entities)
+        object_ = '实体' + str(rng.randrange(entities))
+        yield {'编号': num, '句子': sentence, '知识': [subject, rng.choice(RELATIONS), object_]}
+
+
+def measure_queries(query, params_list):
+    """测量查询延迟
+    Returns:
+        (mean, p50, p99, rows): 平均，中位数与99分位延迟(毫秒)，平均返回行数
+    """
+    latencies = []
+    rows = 0
+    for params in params_list:
+        start = time.perf_counter()
+        rows += len(query(*params))
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return (sum(latencies) / len(latencies), latencies[len(latencies) // 2],
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], rows / len(latencies))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SQLite三元组库写入吞吐与查询延迟测试')
+    parser.add_argument('--triples', type=int, default=10000000, help='三元组数量')
+    parser.add_argument('--entities', type=int, default=1000000, help='不同实体的数量')
+    parser.add_argument('--queries', type=int, default=1000, help='每种查询的次数')
+    parser.add_argument('--limit', type=int, default=1000, help='每次查询最多返回的数量')
+    parser.add_argument('--json-baseline', action='store_true', help='同时测量扫描Json文件按实体查询的耗时')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    db_path = os.path.join(work_dir, 'knowledge_triple.db')
+
+    rng = random.Random(1)
+    start = time.perf_counter()
+    with TripleStore(db_path) as store:
+        for knowledge in iter_knowledges(rng, args.triples, args.entities):
+            store.append(knowledge)
+        insert_seconds = time.perf_counter() - start
+    total_seconds = time.perf_counter() - start
+    print('ingest: %d triples in %.1fs (%.0f triples/s, index build %.1fs), database %.0f MB' % (
+        args.triples, total_seconds, args.triples / total_seconds, total_seconds - insert_seconds,
+        os.path.getsize(db_path) / 1e6))
+
+    rng = random.Random(2)
+    entity_params = [(sample_entity(rng, args.entities), args.limit)
+                     for i in range(args.queries)]
+    relation_params = [(rng.choice(RELATIONS), args.limit) for i in range(args.queries)]
+    pair_params = [(sample_entity(rng, args.entities),
+                    '实体' + str(rng.randrange(args.entities)), True, args.limit) for i in range(args.queries)]
+    with TripleStore(db_path) as store:
+        print('query\tmean_ms\tp50_ms\tp99_ms\trows')
+        for name, query, params_list in (('entity', store.find_by_entity, entity_params),
+                                         ('relation', store.find_by_relation, relation_params),
+                                         ('pair', store.find_by_pair, pair_params)):
+            print('%s\t%.3f\t%.3f\t%.3f\t%.1f' % ((name, ) + measure_queries(query, params_list)))
+
+    if args.json_baseline:
+        # 对照组：扫描Json文件查找某一实体的全部三元组
+        json_path = os.path.join(work_dir, 'knowledge_triple.json')
+        with open(json_path, 'w', encoding='utf-8') as f_out:
+            for knowledge in iter_knowledges(random.Random(1), args.triples, args.entities):
+                f_out.write(json.dumps(knowledge, ensure_ascii=False) + '\n')
+        entity = entity_params[0][0]
+        start = time.perf_counter()
+        with open(json_path, 'r', encoding='utf-8') as f_in:
+            rows = sum(1 for line in f_in if entity in json.loads(line)['知识'][::2])
+        print('json scan for one entity: %.1fs (%d rows)' % (time.perf_counter() - start, rows))
+
+    shutil.rmtree(work_dir)
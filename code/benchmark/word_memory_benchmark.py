@@ -0,0 +1,114 @@
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from bean.word_unit import WordUnit
+from bean.sentence_unit import SentenceUnit
+
+
+class DictWordUnit:
+    """对照组：改为__slots__之前的词单元，每个实例带有__dict__"""
+    def __init__(self, ID, lemma, postag, head=0, head_word=None, dependency=''):
+        self.ID = ID
+        self.lemma = lemma
+        self.postag = postag
+        self.head = head
+        self.head_word = head_word
+        self.dependency = dependency
+
+
+class DictSentenceUnit(SentenceUnit):
+    """对照组：改为__slots__之前的句子单元，子类未声明__slots__，实例带有__dict__"""
+
+
+POSTAGS = ['n', 'v', 'nh', 'ns', 'ni', 'nz', 'p', 'u', 'wp', 'd', 'a', 'm', 'q', 'r', 'c']
+DEPENDENCIES = ['SBV', 'VOB', 'ATT', 'ADV', 'COO', 'POB', 'RAD', 'WP', 'CMP', 'FOB']
+
+
+def build_sentence(rng, length, word_class, sentence_class):
+    """构造一个随机依存句子，词性与依存关系字符串每次新建，与模型输出一致
+    Args:
+        rng: random.Random，随机数生成器
+        length: int，句子词数
+        word_class: type，词单元类
+        sentence_class: type，句子单元类
+    Returns:
+        *: 句子单元
+    """
+    words = []
+    root = rng.randint(1, length)
+    for i in range(1, length + 1):
+        # ''.join构造新的字符串对象，模拟模型每次返回新的标注字符串
+        postag = ''.join(rng.choice(POSTAGS))
+        if i == root:
+            head, dependency = 0, ''.join('HED')
+        else:
+            head, dependency = rng.randint(1, length), ''.join(rng.choice(DEPENDENCIES))
+        words.append(word_class(i, '词' + str(i), postag, head, None, dependency))
+    return sentence_class(words)
+
+
+def measure_memory(word_class, sentence_class, sentences, length):
+    """测量保留sentences个句子时每个词的平均内存
+    Returns:
+        bytes_per_token: float，每个词占用的字节数
+    """
+    rng = random.Random(1)
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    retained = [build_sentence(rng, length, word_class, sentence_class) for i in range(sentences)]
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in end.compare_to(start, 'filename'))
+    del retained
+    return size / (sentences * length)
+
+
+def measure_gc(word_class, sentence_class, sentences, length, window):
+    """流式构造sentences个句子(只保留最近window个)，测量垃圾回收停顿
+    Returns:
+        (seconds, total_pause, max_pause, collections): 总耗时，垃圾回收总停顿，最大停顿，回收次数
+    """
+    pauses = []
+    started = [0.0]
+
+    def on_gc(phase, info):
+        if phase == 'start':
+            started[0] = time.perf_counter()
+        else:
+            pauses.append(time.perf_counter() - started[0])
+
+    rng = random.Random(1)
+    gc.collect()
+    gc.callbacks.append(on_gc)
+    start = time.perf_counter()
+    retained = []
+    for i in range(sentences):
+        retained.append(build_sentence(rng, length, word_class, sentence_class))
+        if len(retained) >= window:
+            retained = []
+    seconds = time.perf_counter() - start
+    gc.callbacks.remove(on_gc)
+    return seconds, sum(pauses), max(pauses, default=0.0), len(pauses)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='词单元内存与垃圾回收停顿测试')
+    parser.add_argument('--sentences', type=int, default=1000000, help='流式构造的句子数量')
+    parser.add_argument('--length', type=int, default=30, help='每个句子的词数')
+    parser.add_argument('--window', type=int, default=256, help='同时保留的句子数量(一个批次)')
+    parser.add_argument('--memory-sentences', type=int, default=10000, help='测量内存时保留的句子数量')
+    args = parser.parse_args()
+
+    print('layout\tbytes/token\tseconds\tgc_total_ms\tgc_max_ms\tcollections')
+    for name, word_class, sentence_class in (('dict', DictWordUnit, DictSentenceUnit),
+                                             ('slots', WordUnit, SentenceUnit)):
+        bytes_per_token = measure_memory(word_class, sentence_class, args.memory_sentences, args.length)
+        seconds, total_pause, max_pause, collections = measure_gc(
+            word_class, sentence_class, args.sentences, args.length, args.window)
+        print('%s\t%.1f\t%.2f\t%.1f\t%.2f\t%d' % (name, bytes_per_token, seconds, total_pause * 1000,
+                                                 max_pause * 1000, collections))
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+
+
+class AnalysisCache:
+    """句子分析结果的LRU缓存，判决书中大量重复的模板句(如"本院认为")只进行一次NLP处理
+       缓存键为(规范化后的句子，词典版本，文档实体词集合)，缓存值为分析完成的SentenceUnit
+       抽取过程只读取SentenceUnit，命中时直接返回同一个对象
+    Attributes:
+        max_size: int，最多缓存的句子数量，超出时淘汰最久未使用的句子，0表示不缓存
+        hits: int，命中次数
+        misses: int，未命中次数
+        evictions: int，淘汰次数
+    """
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()  # 缓存键 -> SentenceUnit，按最近使用顺序排列
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def normalize(sentence):
+        """规范化句子：去除首尾空白(换行，全角空格等)，只差首尾空白的句子共用一个分析结果
+        Args:
+            sentence: str，句子
+        Returns:
+            *: str，规范化后的句子，即实际进行分析的文本
+        """
+        return sentence.strip()
+
+    def get_key(self, sentence, dict_version, entities=None):
+        """获得句子的缓存键
+        Args:
+            sentence: str，规范化后的句子
+            dict_version: str，分词词典版本
+            entities: frozenset，文档实体词集合，没有文档词典时为None
+        Returns:
+            *: tuple，缓存键
+        """
+        return sentence, dict_version, entities
+
+    def get(self, key):
+        """查找缓存，命中时将其标记为最近使用
+        Args:
+            key: tuple，缓存键
+        Returns:
+            sentence_unit: SentenceUnit，缓存的分析结果，未命中时为None
+        """
+        sentence_unit = self.entries.get(key)
+        if sentence_unit is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return sentence_unit
+
+    def put(self, key, sentence_unit):
+        """加入缓存，超出容量时淘汰最久未使用的句子
+        Args:
+            key: tuple，缓存键
+            sentence_unit: SentenceUnit，分析结果
+        """
+        if self.max_size <= 0:
+            return
+        self.entries[key] = sentence_unit
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """清空缓存，计数器保留"""
+        self.entries.clear()
+
+    def stats(self):
+        """获得缓存统计信息，用于根据真实语料调整缓存大小
+        Returns:
+            *: dict，缓存大小，容量，命中，未命中，淘汰次数与命中率
+        """
+        lookups = self.hits + self.misses
+        return {'size': len(self.entries), 'max_size': self.max_size, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+if __name__ == '__main__':
+    cache = AnalysisCache(max_size=2)
+    for sentence in ['本院认为', '本院认为\n', '原告诉称', '被告辩称', '本院认为']:
+        key = cache.get_key(cache.normalize(sentence), 'v1')
+        if cache.get(key) is None:
+            cache.put(key, sentence)
+    # 输出：{'size': 2, 'max_size': 2, 'hits': 1, 'misses': 4, 'evictions': 2, 'hit_rate': 0.2}
+    print(cache.stats())
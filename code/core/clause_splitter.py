@@ -0,0 +1,103 @@
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from bean.word_unit import WordUnit
+
+
+class ClauseSplitter:
+    """长句分段：判决书中逗号连接的长句有数百个词，整句进行依存句法分析耗时极长，
+       超过长度预算的句子在分句边界(，：)处切分为若干段，各段独立分析(见NLP.parse_words)，需要调用方显式开启
+       切分时每个子句都与谓语(动词)放在同一段：没有谓语的子句(如"被告人张三，"，"男，")并入后面的子句，
+       句末没有谓语的子句并入前面的子句，再按预算将相邻子句装入各段；
+       没有分句边界且超过硬上限的子句按上限强制切分并计数
+    Attributes:
+        budget: int，每段最多的词数量，不超过预算的句子不切分
+        token_cap: int，每段词数量的硬上限，单个子句超过预算但不超过上限时不再切分
+        delimiters: set，分句边界的词
+        predicate_postags: set，谓语的词性
+        counts: dict，切分的句子数量，切分得到的段数，强制切分的次数
+    """
+    delimiters = {'，', '：', ',', ':'}
+    predicate_postags = {'v'}
+
+    def __init__(self, budget=100, token_cap=200):
+        if budget <= 0:
+            raise ValueError('budget must be positive')
+        if token_cap < budget:
+            raise ValueError('token_cap must not be smaller than budget')
+        self.budget = budget
+        self.token_cap = token_cap
+        self.counts = {'split': 0, 'pieces': 0, 'forced': 0}
+
+    def get_clauses(self, words):
+        """在分句边界处切分，并将没有谓语的子句与谓语合并
+        Args:
+            words: WordUnit list，命名实体合并后的词单元列表
+        Returns:
+            clauses: (int, int) list，每个子句的(开始位置，结束位置(不含))，边界词属于前一个子句
+        """
+        clauses = []
+        start = 0
+        has_predicate = False
+        for i, word in enumerate(words):
+            if word.postag in self.predicate_postags:
+                has_predicate = True
+            if word.lemma in self.delimiters and has_predicate:
+                clauses.append((start, i + 1))
+                start = i + 1
+                has_predicate = False
+        if start < len(words):
+            if clauses and not has_predicate:
+                clauses[-1] = (clauses[-1][0], len(words))
+            else:
+                clauses.append((start, len(words)))
+        return clauses
+
+    def split(self, words):
+        """将超过预算的句子切分为若干段
+        Args:
+            words: WordUnit list，命名实体合并后的词单元列表
+        Returns:
+            pieces: (int, int) list，每段的(开始位置，结束位置(不含))，依次覆盖整个句子；不需要切分时为None
+        """
+        if len(words) <= self.budget:
+            return None
+        pieces = []
+        start = stop = 0  # 当前段的范围
+        for clause_start, clause_stop in self.get_clauses(words):
+            if clause_stop - start <= self.budget:
+                stop = clause_stop
+                continue
+            if stop > start:
+                pieces.append((start, stop))
+                start = stop
+            if clause_stop - start <= self.token_cap:
+                stop = clause_stop
+                continue
+            # 没有分句边界的超长子句，按上限强制切分
+            while clause_stop - start > self.token_cap:
+                pieces.append((start, start + self.token_cap))
+                start += self.token_cap
+                self.counts['forced'] += 1
+            stop = clause_stop
+        if stop > start:
+            pieces.append((start, stop))
+        if len(pieces) == 1:
+            return None
+        self.counts['split'] += 1
+        self.counts['pieces'] += len(pieces)
+        return pieces
+
+
+if __name__ == '__main__':
+    # 被告人张三，男，于2015年在北京盗窃财物，后在上海被抓获，赃物已追回
+    lemmas = ['被告人', '张三', '，', '男', '，', '于', '2015年', '在', '北京', '盗窃', '财物', '，',
+              '后', '在', '上海', '被', '抓获', '，', '赃物', '已', '追回']
+    postags = ['n', 'nh', 'wp', 'n', 'wp', 'p', 'nt', 'p', 'ns', 'v', 'n', 'wp',
+               'd', 'p', 'ns', 'p', 'v', 'wp', 'n', 'd', 'v']
+    words = [WordUnit(i + 1, lemma, postag) for i, (lemma, postag) in enumerate(zip(lemmas, postags))]
+    splitter = ClauseSplitter(budget=8, token_cap=12)
+    for start, stop in splitter.get_clauses(words):
+        print('clause: ' + ''.join(word.lemma for word in words[start:stop]))
+    for start, stop in splitter.split(words):
+        print('piece: ' + ''.join(word.lemma for word in words[start:stop]))
+    print(splitter.counts)
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+
+class DictCache:
+    """jieba编译词典缓存，将jieba基础词典与用户词典合并后的前缀词典序列化(pickle)到磁盘
+       缓存以jieba版本，基础词典与各用户词典文件内容的哈希为键，首次使用时构建，之后直接加载
+    Attributes:
+        user_dict_dir: str，用户自定义词典目录
+        cache_dir: str，缓存文件目录
+        version: str，词典版本，即缓存键
+        built: bool，本次加载是否重新构建了缓存
+        load_time: float，本次加载耗时(秒)
+    """
+    default_cache_dir = '../../cache/'  # 默认的缓存目录，不能放在用户词典目录中
+
+    def __init__(self, user_dict_dir, cache_dir=default_cache_dir):
+        self.user_dict_dir = user_dict_dir
+        self.cache_dir = cache_dir
+        self.version = None
+        self.built = False
+        self.load_time = 0.0
+
+    def get_lexicon_files(self):
+        """获得用户词典文件列表
+        Returns:
+            file_paths: str list，按文件名排序的用户词典文件路径
+        """
+        file_paths = []
+        for file in sorted(os.listdir(self.user_dict_dir)):
+            file_path = os.path.join(self.user_dict_dir, file)
+            # 文件夹则跳过
+            if os.path.isdir(file_path):
+                continue
+            file_paths.append(file_path)
+        return file_paths
+
+    def get_version(self, tokenizer):
+        """根据jieba版本，基础词典与用户词典内容计算词典版本
+        Args:
+            tokenizer: jieba.Tokenizer，分词器
+        Returns:
+            version: str，词典版本
+        """
+        import jieba  # 导入较慢(约0.2s)，只在加载词典时导入
+        sha1 = hashlib.sha1()
+        sha1.update(jieba.__version__.encode('utf-8'))
+        with tokenizer.get_dict_file() as f:
+            sha1.update(f.read())
+        for file_path in self.get_lexicon_files():
+            sha1.update(os.path.basename(file_path).encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                sha1.update(hashlib.sha1(f.read()).digest())
+        return sha1.hexdigest()
+
+    def load(self, tokenizer):
+        """向分词器加载编译词典，缓存不存在或已失效时重新构建
+        Args:
+            tokenizer: jieba.Tokenizer，分词器
+        Returns:
+            version: str，词典版本
+        """
+        start = time.perf_counter()
+        self.version = self.get_version(tokenizer)
+        cache_path = os.path.join(self.cache_dir, 'jieba_' + self.version + '.cache')
+        self.built = True
+        if os.path.isfile(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    tokenizer.FREQ, tokenizer.total = pickle.load(f)
+                tokenizer.initialized = True
+                self.built = False
+            except (EOFError, ValueError, pickle.UnpicklingError):
+                self.built = True
+        if self.built:
+            self.build(tokenizer, cache_path)
+        self.load_time = time.perf_counter() - start
+        return self.version
+
+    def build(self, tokenizer, cache_path):
+        """构建编译词典：加载jieba基础词典并逐个添加用户词，原子写入缓存文件
+        Args:
+            tokenizer: jieba.Tokenizer，分词器
+            cache_path: str，缓存文件路径
+        """
+        tokenizer.initialize()
+        for file_path in self.get_lexicon_files():
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    tokenizer.add_word(line.strip('\n').strip())
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((tokenizer.FREQ, tokenizer.total), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+
+
+if __name__ == '__main__':
+    import jieba
+    cache_dir = tempfile.mkdtemp()
+    dict_cache = DictCache('../../resource/', cache_dir)
+    dict_cache.load(jieba.Tokenizer())
+    print('cold start: %.3fs (built: %s)' % (dict_cache.load_time, dict_cache.built))
+    dict_cache.load(jieba.Tokenizer())
+    print('warm start: %.3fs (built: %s)' % (dict_cache.load_time, dict_cache.built))
+    print('dictionary version: ' + dict_cache.version)
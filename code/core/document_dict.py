@@ -0,0 +1,50 @@
+class DocumentDict:
+    """文档级实体词典，临时叠加到分词器上，离开作用域后完整恢复分词器词典
+       用于案例相关的实体(如判决书首部的当事人姓名)，避免全局词典无限增长
+       with DocumentDict(tokenizer, entities): ...
+    Attributes:
+        tokenizer: jieba.Tokenizer，分词器
+        entities: iterable，实体词(如实体词性词典entity_postag的键)
+    """
+    def __init__(self, tokenizer, entities):
+        self.tokenizer = tokenizer
+        self.entities = entities
+        self.saved_freq = None  # 被覆盖的词与前缀的原词频，None表示原先不存在
+        self.saved_total = 0  # 原总词频
+
+    def __enter__(self):
+        self.add()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.remove()
+        return False
+
+    def add(self):
+        """将实体词添加到分词器，并记录被修改的词频"""
+        tokenizer = self.tokenizer
+        tokenizer.check_initialized()
+        self.saved_freq = dict()
+        self.saved_total = tokenizer.total
+        for entity in self.entities:
+            if not entity:
+                continue
+            # add_word会同时写入实体词的所有前缀
+            for i in range(len(entity)):
+                frag = entity[:i+1]
+                if frag not in self.saved_freq:
+                    self.saved_freq[frag] = tokenizer.FREQ.get(frag)
+            tokenizer.add_word(entity)
+
+    def remove(self):
+        """恢复分词器词典到添加实体词之前的状态"""
+        if self.saved_freq is None:
+            return
+        tokenizer = self.tokenizer
+        for frag, freq in self.saved_freq.items():
+            if freq is None:
+                tokenizer.FREQ.pop(frag, None)
+            else:
+                tokenizer.FREQ[frag] = freq
+        tokenizer.total = self.saved_total
+        self.saved_freq = None
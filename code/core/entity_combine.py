@@ -2,68 +2,174 @@ import sys
 sys.path.append("..")  # 先跳出当前目录
 from bean.word_unit import WordUnit
 
+# 实体内部标记的编码，依次按'I-'，'E-'，'O'判断，与逐个字符串匹配的顺序一致
+OTHER = 0  # 实体内部出现的S-或B-标记，跳过
+INSIDE = 1
+END = 2
+OUTSIDE = 3
+
+
 class EntityCombine:
-    """将分词词性标注后得到的words与netags进行合并"""
+    """将分词词性标注后得到的words与netags进行合并
+       一次遍历完成命名实体(B-I-E)合并与普通实体合并，标记先编码为整数，合并词的各部分最后一次拼接，
+       输出的词单元均为新建的，不修改输入的词单元，合并词的字符范围从第一部分的开始位置到最后一部分的结束位置
+    Attributes:
+        tag_codes: dict，命名实体标记 -> (是否为实体开始，实体内部标记编码，实体词性)，所有实例共享
+        entity_postags: set，候选实体的词性
+        comm_postags: set，普通实体合并时至少一方需要具有的词性(其他名词，缩略词)
+    """
+    tag_codes = dict()
+    entity_postags = {'ns', 'ni', 'nh', 'nz', 'j'}
+    comm_postags = {'nz', 'j'}
+
+    def get_tag_codes(self, netags):
+        """将命名实体标记编码为整数
+        Args:
+            netags: list，命名实体识别结果
+        Returns:
+            codes: tuple list，每个标记的(是否为实体开始，实体内部标记编码，实体词性)
+        """
+        tag_codes = self.tag_codes
+        return [tag_codes.get(netag) or self.get_tag_code(netag) for netag in netags]
+
+    def get_tag_code(self, netag):
+        """编码一个命名实体标记并缓存
+        Args:
+            netag: str，命名实体标记
+        Returns:
+            code: tuple，(是否为实体开始，实体内部标记编码，实体词性)
+        """
+        if 'I-' in netag:
+            inner = INSIDE
+        elif 'E-' in netag:
+            inner = END
+        elif netag == 'O':
+            inner = OUTSIDE
+        else:
+            inner = OTHER
+        code = self.tag_codes[netag] = ('B-' in netag, inner, self.judge_postag(netag))
+        return code
+
+    def match_span(self, netags, start):
+        """从实体开始标记向后匹配实体的范围
+           遇到E-结束并包含该词；遇到O或到达句末的S-，B-时结束，不包含该词且该词被丢弃；中间的S-，B-被跳过
+        Args:
+            netags: list，命名实体识别结果
+            start: int，实体开始(B-)的位置
+        Returns:
+            stop: int，实体范围的结束位置(不含)，范围内未组成实体的词被丢弃
+            parts: int list，组成实体的词的位置
+            postag: str，实体词性，由结束位置前一个标记判断
+        """
+        tag_codes = self.tag_codes
+        length = len(netags)
+        parts = [start]
+        j = start + 1
+        while j < length:
+            inner = (tag_codes.get(netags[j]) or self.get_tag_code(netags[j]))[1]
+            if inner == INSIDE:
+                parts.append(j)
+            elif inner == END:
+                parts.append(j)
+                break
+            elif inner == OUTSIDE or (j+1) == length:
+                break
+            j += 1
+        return min(j + 1, length), parts, tag_codes[netags[j-1]][2]
+
+    def decode_spans(self, netags):
+        """解码命名实体范围
+        Args:
+            netags: list，命名实体识别结果
+        Returns:
+            spans: (int, int, int list, str) list，(开始位置，结束位置(不含)，组成实体的词的位置，实体词性)
+        """
+        codes = self.get_tag_codes(netags)
+        spans = []
+        i = 0
+        while i < len(codes):
+            if codes[i][0]:
+                stop, parts, postag = self.match_span(netags, i)
+                spans.append((i, stop, parts, postag))
+                i = stop
+            else:
+                i += 1
+        return spans
+
     def combine(self, words, netags):
-        """根据命名实体的B-I-E进行词合并
+        """根据命名实体的B-I-E进行词合并，同时根据词性进行普通实体合并，
+           输出全部为新建的词单元，未合并的词复制输入词单元的各字段(序号除外)，输入的词单元保持不变
         Args:
             words: WordUnit list，分词与词性标注后得到的words
             netags: list，命名实体识别结果
         Returns:
             words_combine: WordUnit list，连接后的结果
         """
+        tag_codes = self.tag_codes
+        entity_postags = self.entity_postags
+        comm_postags = self.comm_postags
         words_combine = []  # 存储连接后的结果
         length = len(netags)
-        n = 1  # 实体计数，从1开始
+        n = 0  # 已输出的词数量
+        last_word = None  # 上一个未合并的词单元
+        lemmas = None  # 上一个合并词的各部分，最后一次拼接
+        start = end = -1  # 上一个合并词在句子中的字符范围
+        last_postag = None  # 上一个(命名实体合并后的)词的词性
         i = 0
         while i < length:
-            if 'B-' in netags[i]:
-                newword = words[i].lemma
-                j = i + 1
-                while j < length:
-                    if 'I-' in netags[j]:
-                        newword += words[j].lemma
-                    elif 'E-' in netags[j]:
-                        newword += words[j].lemma
-                        break
-                    elif 'O' == netags[j] or (j+1) == length:
-                        break
-                    j += 1
-                words_combine.append(WordUnit(n, newword, self.judge_postag(netags[j-1])))
-                n += 1
-                i = j
+            if (tag_codes.get(netags[i]) or self.get_tag_code(netags[i]))[0]:
+                # 命名实体合并
+                stop, parts, postag = self.match_span(netags, i)
+                pieces = [words[k].lemma for k in parts]
+                pieces_start, pieces_end = words[parts[0]].start, words[parts[-1]].end
+                i = stop
+            else:
+                word = words[i]
+                postag = word.postag
+                pieces = None
+                i += 1
+            # 普通实体合并: (前后词都是实体) and (前词 in ["nz", "j"] or 后词 in ["nz", "j"])
+            if (postag in entity_postags and last_postag in entity_postags
+                    and (postag in comm_postags or last_postag in comm_postags)):
+                if lemmas is None:
+                    lemmas = [last_word.lemma]
+                    start = last_word.start
+                    last_word = None
+                if pieces is None:
+                    lemmas.append(word.lemma)
+                    end = word.end
+                else:
+                    lemmas.extend(pieces)
+                    end = pieces_end
             else:
-                words[i].ID = n
-                n += 1
-                words_combine.append(words[i])
-            i += 1
-        return self.combine_comm(words_combine)
+                if last_postag is not None:
+                    n += 1
+                    if lemmas is not None:
+                        words_combine.append(WordUnit(n, ''.join(lemmas), last_postag, start=start, end=end))
+                    else:
+                        words_combine.append(last_word.copy(n))
+                if pieces is None:
+                    last_word, lemmas = word, None
+                else:
+                    last_word, lemmas = None, pieces
+                    start, end = pieces_start, pieces_end
+            last_postag = postag
+        if last_postag is not None:
+            n += 1
+            if lemmas is not None:
+                words_combine.append(WordUnit(n, ''.join(lemmas), last_postag, start=start, end=end))
+            else:
+                words_combine.append(last_word.copy(n))
+        return words_combine
 
     def combine_comm(self, words):
-        """根据词性标注进行普通实体合并
+        """根据词性标注进行普通实体合并(combine中已同时完成，单独使用时调用)
         Args:
             words: WordUnit list，进行命名实体合并后的words
         Returns:
             words_combine: WordUnit list，进行普通实体连接后的words
         """
-        newword = words[0].lemma  # 第一个词，作为新词
-        words_combine = []  # 存储合并后的结果
-        n = 1
-        i = 1  # 当前词ID
-        while i < len(words):
-            word = words[i]
-            # 词合并: (前后词都是实体) and (前后词的词性相同 or 前词 in ["nz", "j"] or 后词 in ["nz", "j"])
-            if (self.is_entity(word.postag) and self.is_entity(words[i-1].postag) 
-                and (word.postag in {'nz', 'j'} or words[i-1].postag in {'nz', 'j'})):
-                newword += word.lemma
-            else:
-                words_combine.append(WordUnit(n, newword, words[i-1].postag))  # 添加上一个词
-                n += 1
-                newword = word.lemma  # 当前词作为新词
-            i += 1
-        # 添加最后一个词
-        words_combine.append(WordUnit(n, newword, words[len(words)-1].postag))
-        return words_combine
+        return self.combine(words, ['O'] * len(words))
 
     def judge_postag(self, netag):
         """根据命名实体识别结果判断该连接实体的词性标注
@@ -93,4 +199,3 @@ class EntityCombine:
         if netag in {'ns', 'ni', 'nh', 'nz', 'j'}:
             flag = True
         return flag
-
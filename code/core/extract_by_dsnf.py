@@ -11,16 +11,20 @@ class ExtractByDSNF:
     entity1 = None  # WordUnit，实体1词单元
     entity2 = None  # WordUnit，实体2词单元
     head_relation = None  # WordUnit，头部关系词单元
-    file_path = None  # Element，XML文档
+    file_path = None  # str，Json文件路径；或TripleSink/list等提供append(knowledge)的输出对象
     num = 1  # 三元组数量编号
+    source = None  # (str, int)，句子出处(文档标识，句子在文档中的序号)，None表示不记录
+    verbose = True  # bool，是否打印抽取出的三元组
 
-    def __init__(self, origin_sentence, sentence, entity1, entity2, file_path, num):
+    def __init__(self, origin_sentence, sentence, entity1, entity2, file_path, num, source=None, verbose=True):
         self.origin_sentence = origin_sentence
         self.sentence = sentence
         self.entity1 = entity1
         self.entity2 = entity2
         self.file_path = file_path
         self.num = num
+        self.source = source
+        self.verbose = verbose
 
     def is_entity(self, entry):
         """判断词单元是否实体
@@ -61,9 +65,9 @@ class ExtractByDSNF:
             word: WordUnit，偏正部分或者实体
         Returns:
         """
-        for word in self.sentence.words:
-            if word.head == modify.ID and word.dependency == 'ATT':
-                return word
+        children = self.sentence.children(modify, 'ATT')
+        if children:
+            return children[0]
         return modify
 
     def like_noun(self, entry):
@@ -100,6 +104,7 @@ class ExtractByDSNF:
 
     def build_triple(self, entity1, entity2, relation):
         """建立三元组，写入json文件
+           记录句子出处(如果有)，以及实体1，关系与实体2在原始句子中的字符位置(词的位置已知时)
         Args:
             entity1: WordUnit，实体1
             entity2: WordUnit，实体2
@@ -112,12 +117,24 @@ class ExtractByDSNF:
         triple['编号'] = self.num
         self.num += 1
         triple['句子'] = self.origin_sentence
+        if self.source is not None:
+            triple['出处'] = list(self.source)
         entity1_str = self.element_connect(entity1)
         entity2_str = self.element_connect(entity2)
         relation_str = self.element_connect(relation)
         triple['知识'] = [entity1_str, relation_str, entity2_str]
-        AppendToJson().append(self.file_path, triple)
-        print('triple: ' + entity1_str + '\t' + relation_str + '\t' + entity2_str)
+        # 词的位置相对于去除首尾空白后的句子，加上原始句子句首空白的长度
+        offset = len(self.origin_sentence) - len(self.origin_sentence.lstrip())
+        spans = [self.element_spans(entity1, offset), self.element_spans(relation, offset),
+                 self.element_spans(entity2, offset)]
+        if None not in spans:
+            triple['位置'] = spans
+        if isinstance(self.file_path, str):
+            AppendToJson().append(self.file_path, triple)
+        else:
+            self.file_path.append(triple)
+        if self.verbose:
+            print('triple: ' + entity1_str + '\t' + relation_str + '\t' + entity2_str)
         return True
 
     def element_connect(self, element):
@@ -136,6 +153,28 @@ class ExtractByDSNF:
             element_str = element.lemma
         return element_str
 
+    def element_spans(self, element, offset=0):
+        """三元组元素在原始句子中的字符位置，相邻的词合并为一段
+        Args:
+            element: WordUnit或WordUnit list，元素
+            offset: int，词的位置加上的偏移量
+        Returns:
+            spans: int list list，[[开始位置，结束位置(不含)], ...]，有词的位置未知时为None
+        """
+        if isinstance(element, WordUnit):
+            return [[element.start + offset, element.end + offset]] if element.start >= 0 else None
+        spans = []
+        for ele in element:
+            if not isinstance(ele, WordUnit):
+                continue
+            if ele.start < 0:
+                return None
+            if spans and spans[-1][1] == ele.start + offset:
+                spans[-1][1] = ele.end + offset
+            else:
+                spans.append([ele.start + offset, ele.end + offset])
+        return spans
+
     def SBV_CMP_POB(self, entity1, entity2):
         """IVC(Intransitive Verb Construction)[DSNF4]
             不及物动词结构的一种形式，例如："奥巴马毕业于哈弗大学"--->"奥巴马 毕业 于 哈弗 大学"
@@ -397,14 +436,11 @@ class ExtractByDSNF:
 
         # 如果满足动词并列要求
         if coo_flag:
-            i = relation_word.ID  # 关系词的下一个位置("国事访问")索引下标
-            while i < len(self.sentence.words):
-                temp = self.sentence.words[i]  # "国事访问"
-                # 关系词和temp相邻，并且temp的依存关系为"VOB"
-                if temp.head_word == relation_word and temp.dependency == 'VOB':
+            # 关系词之后依存于关系词，并且依存关系为"VOB"的词("国事访问")
+            for temp in self.sentence.children(relation_word, 'VOB'):
+                if temp.ID > relation_word.ID:
                     relation_list.append(temp)  # 形成关系"进行国事访问"
                     relation_str += temp.lemma
-                i += 1
 
             if len(relation_str) == 1:
                 relation_list.append(ent2.head_word)
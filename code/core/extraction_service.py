@@ -0,0 +1,360 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from core.nlp import NLP
+from core.parallel_extractor import init_worker, extract_batch
+from tool.corpus_reader import CorpusReader
+from tool.metrics import Histogram, metrics
+
+
+class ExtractionService:
+    """常驻的本地HTTP知识三元组抽取服务，模型只加载一次
+       并发请求的句子在时间窗口(batch_delay)与数量窗口(batch_size)内合并为一批，交给工作进程池处理，
+       等待处理的句子超过max_pending时拒绝请求(429)，超过超时时间的请求返回504
+       POST /extract {"text": "..."}或{"sentences": [...], "doc_id": "...", "timeout": 秒}，返回三元组
+       GET /stats 返回请求，批次，拒绝与超时数量以及请求延迟
+    Attributes:
+        nlp: NLP，workers为0时在服务进程内使用的NLP实例
+        workers: int，工作进程数量，0表示在服务进程内的一个线程中处理
+        batch_size: int，每批最多的句子数量(单个请求的句子不拆分)
+        batch_delay: float，第一个请求到达后等待组批的最长时间(秒)
+        max_pending: int，等待组批的最大句子数量，超过时拒绝请求
+        timeout: float，默认的请求超时时间(秒)
+        max_body: int，请求体的最大字节数
+        verbose: bool，是否在服务进程(或工作进程)中打印抽取出的三元组，默认不打印，避免标准输出计入请求延迟
+        counters: dict，请求，句子，三元组，批次，拒绝，超时与错误数量
+        latency: Histogram，请求延迟(秒)
+    """
+    reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 429: 'Too Many Requests', 500: 'Internal Server Error',
+               504: 'Gateway Timeout'}
+
+    def __init__(self, nlp=None, workers=0, batch_size=64, batch_delay=0.005, max_pending=4096, timeout=30.0,
+                 max_body=1 << 20, user_dict_dir=NLP.default_user_dict_dir, model_dir=NLP.default_model_dir,
+                 verbose=False):
+        self.nlp = nlp
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.max_body = max_body
+        self.verbose = verbose
+        self.user_dict_dir = user_dict_dir
+        self.model_dir = model_dir
+        self.counters = dict.fromkeys(('requests', 'sentences', 'triples', 'batches', 'batched_sentences',
+                                       'rejected', 'timeouts', 'errors'), 0)
+        self.latency = Histogram()
+        self.pending = deque()  # 等待组批的请求，(句子列表，文档标识，future)
+        self.pending_sentences = 0
+        self.in_flight = 0  # 正在处理的批次数量
+        self.start_time = time.perf_counter()
+        self.executor = None
+        self.server = None
+        self.batcher_task = None
+        self.writers = set()  # 打开的连接
+
+    def start_executor(self):
+        """创建工作进程池，模型在每个工作进程中加载一次；workers为0时在服务进程内加载"""
+        if self.workers > 0:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=init_worker,
+                                                initargs=(self.user_dict_dir, self.model_dir, metrics.enabled))
+        else:
+            if self.nlp is None:
+                self.nlp = NLP(self.user_dict_dir, self.model_dir)
+            self.nlp.warmup()  # 模型按需加载，服务启动时预先加载，避免首批请求等待
+            self.executor = ThreadPoolExecutor(1)
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """启动服务
+        Args:
+            host: str，监听地址，默认只监听本机
+            port: int，监听端口，0表示由系统分配
+        Returns:
+            server: asyncio.AbstractServer，服务器
+        """
+        if self.executor is None:
+            self.start_executor()
+        self.arrived = asyncio.Event()  # 有新请求到达
+        self.filled = asyncio.Event()  # 等待的句子达到batch_size
+        self.slots = asyncio.Semaphore(max(1, self.workers))  # 同时处理的批次数量
+        self.start_time = time.perf_counter()
+        self.batcher_task = asyncio.ensure_future(self.batcher())
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    async def close(self):
+        """停止接受连接，关闭打开的连接，停止组批并关闭工作进程池"""
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.writers):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+        if self.batcher_task is not None:
+            self.batcher_task.cancel()
+            try:
+                await self.batcher_task
+            except asyncio.CancelledError:
+                pass
+            self.batcher_task = None
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def submit(self, sentences, doc_id=''):
+        """将请求的句子加入等待队列
+        Args:
+            sentences: str list，句子列表
+            doc_id: str，文档标识，记录在三元组的出处中
+        Returns:
+            future: asyncio.Future，完成时为按句子顺序的三元组列表；等待的句子过多时为None
+        """
+        if self.pending_sentences + len(sentences) > self.max_pending:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((sentences, doc_id, future))
+        self.pending_sentences += len(sentences)
+        self.arrived.set()
+        if self.pending_sentences >= self.batch_size:
+            self.filled.set()
+        return future
+
+    def discard(self, future):
+        """从等待队列中移除(超时的)请求，不再占用等待的句子数量
+        Args:
+            future: asyncio.Future，submit返回的future
+        """
+        for item in self.pending:
+            if item[2] is future:
+                self.pending.remove(item)
+                self.pending_sentences -= len(item[0])
+                break
+
+    async def batcher(self):
+        """组批：第一个请求到达后，等待句子达到batch_size或超过batch_delay，取出一批交给工作进程"""
+        while True:
+            await self.arrived.wait()
+            await self.slots.acquire()  # 工作进程都在处理时继续积累请求
+            if self.pending_sentences < self.batch_size:
+                try:
+                    await asyncio.wait_for(self.filled.wait(), self.batch_delay)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self.take_batch()
+            if not self.pending:
+                self.arrived.clear()
+            if self.pending_sentences < self.batch_size:
+                self.filled.clear()
+            if batch:
+                asyncio.ensure_future(self.run_batch(batch))
+            else:
+                self.slots.release()
+
+    def take_batch(self):
+        """从等待队列取出一批请求，跳过已超时的请求，至少取出一个请求
+        Returns:
+            batch: list，(句子列表，文档标识，future)
+        """
+        batch = []
+        size = 0
+        while self.pending and (not batch or size + len(self.pending[0][0]) <= self.batch_size):
+            sentences, doc_id, future = self.pending.popleft()
+            self.pending_sentences -= len(sentences)
+            if not future.done():
+                batch.append((sentences, doc_id, future))
+                size += len(sentences)
+        return batch
+
+    async def run_batch(self, batch):
+        """在工作进程中处理一批请求，并将三元组按请求分开
+        Args:
+            batch: list，(句子列表，文档标识，future)
+        """
+        # 出处的文档标识暂时记为请求在批次中的序号，用于将三元组分回各请求
+        records = [(i, j, sentence) for i, (sentences, doc_id, future) in enumerate(batch)
+                   for j, sentence in enumerate(sentences)]
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # 工作进程使用进程内的NLP实例(nlp为None)，并随结果返回统计数据；
+            # 服务进程内的线程直接记录到全局的统计实例，/stats由其加锁的副本得到
+            in_process = self.workers == 0
+            triples, snapshot = await loop.run_in_executor(self.executor, extract_batch, records,
+                                                           self.nlp if in_process else None, self.verbose,
+                                                           not in_process)
+        except Exception as e:
+            for sentences, doc_id, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.in_flight -= 1
+            self.slots.release()
+        if snapshot is not None:
+            metrics.merge(snapshot)
+        self.counters['batches'] += 1
+        self.counters['batched_sentences'] += len(records)
+        results = [[] for i in range(len(batch))]
+        for triple in triples:
+            i, j = triple['出处']
+            triple['出处'] = [batch[i][1], j]
+            results[i].append(triple)
+        for (sentences, doc_id, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def extract(self, body):
+        """处理抽取请求
+        Args:
+            body: bytes，Json请求体
+        Returns:
+            (status, payload): HTTP状态码与Json响应
+        """
+        start = time.perf_counter()
+        try:
+            request = json.loads(body.decode('utf-8'))
+            if 'sentences' in request:
+                sentences = request['sentences']
+            else:
+                sentences = [sentence for sentence in CorpusReader.delimiter.split(request['text']) if sentence]
+            timeout = float(request.get('timeout', self.timeout))
+            doc_id = str(request.get('doc_id', ''))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return 400, {'error': 'expected {"text": str} or {"sentences": [str, ...]}'}
+        if not isinstance(sentences, list) or not all(isinstance(sentence, str) for sentence in sentences):
+            return 400, {'error': 'sentences must be a list of strings'}
+        self.counters['requests'] += 1
+        if not sentences:
+            return 200, {'sentences': 0, 'triples': []}
+        future = self.submit(sentences, doc_id)
+        if future is None:
+            self.counters['rejected'] += 1
+            return 429, {'error': 'too many pending sentences', 'pending': self.pending_sentences}
+        try:
+            triples = await asyncio.wait_for(future, min(timeout, self.timeout))
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            self.discard(future)
+            return 504, {'error': 'timeout'}
+        except Exception as e:
+            self.counters['errors'] += 1
+            return 500, {'error': type(e).__name__ + ': ' + str(e)}
+        for num, triple in enumerate(triples, 1):
+            triple['编号'] = num
+        self.counters['sentences'] += len(sentences)
+        self.counters['triples'] += len(triples)
+        self.latency.observe(time.perf_counter() - start)
+        return 200, {'sentences': len(sentences), 'triples': triples}
+
+    def stats(self):
+        """获得服务统计信息
+        Returns:
+            stats: dict，各计数器，平均批大小，等待与处理中的数量，请求延迟与每秒句子数量
+        """
+        elapsed = time.perf_counter() - self.start_time
+        stats = dict(self.counters)
+        stats['mean_batch_size'] = (self.counters['batched_sentences'] / self.counters['batches']
+                                    if self.counters['batches'] else 0.0)
+        stats['pending_requests'] = len(self.pending)
+        stats['pending_sentences'] = self.pending_sentences
+        stats['in_flight_batches'] = self.in_flight
+        stats['uptime'] = elapsed
+        stats['sentences_per_second'] = self.counters['sentences'] / elapsed if elapsed > 0 else 0.0
+        stats['latency'] = {'count': self.latency.count,
+                            'mean': self.latency.sum / self.latency.count if self.latency.count else 0.0,
+                            'p50': self.latency.quantile(0.5), 'p99': self.latency.quantile(0.99)}
+        if metrics.enabled:
+            stats['stages'] = metrics.stats()['stages']
+        return stats
+
+    async def route(self, method, path, body):
+        """按请求路径分派
+        Returns:
+            (status, payload): HTTP状态码与Json响应
+        """
+        path = path.split('?', 1)[0]
+        if path == '/extract':
+            if method != 'POST':
+                return 405, {'error': 'use POST'}
+            return await self.extract(body)
+        if path == '/stats':
+            if method != 'GET':
+                return 405, {'error': 'use GET'}
+            return 200, self.stats()
+        return 404, {'error': 'not found'}
+
+    async def handle_connection(self, reader, writer):
+        """处理一个HTTP/1.1连接，支持keep-alive"""
+        self.writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = dict()
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                if length > self.max_body:
+                    status, payload = 413, {'error': 'request body too large'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    status, payload = await self.route(method, path, body)
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(('HTTP/1.1 %d %s\r\nContent-Type: application/json; charset=utf-8\r\n'
+                              'Content-Length: %d\r\nConnection: %s\r\n\r\n'
+                              % (status, self.reasons[status], len(data), 'keep-alive' if keep_alive else 'close')
+                              ).encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='本地HTTP知识三元组抽取服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8000, help='监听端口')
+    parser.add_argument('--workers', type=int, default=0, help='工作进程数量，0表示在服务进程内处理')
+    parser.add_argument('--batch-size', type=int, default=64, help='每批最多的句子数量')
+    parser.add_argument('--batch-delay', type=float, default=0.005, help='等待组批的最长时间(秒)')
+    parser.add_argument('--max-pending', type=int, default=4096, help='等待组批的最大句子数量，超过时返回429')
+    parser.add_argument('--timeout', type=float, default=30.0, help='请求超时时间(秒)，超过时返回504')
+    parser.add_argument('--metrics', action='store_true', help='记录分阶段耗时，在/stats中返回')
+    parser.add_argument('--verbose', action='store_true', help='打印抽取出的三元组')
+    args = parser.parse_args()
+
+    if args.metrics:
+        metrics.enable()
+    service = ExtractionService(workers=args.workers, batch_size=args.batch_size, batch_delay=args.batch_delay,
+                                max_pending=args.max_pending, timeout=args.timeout, verbose=args.verbose)
+    service.start_executor()  # 在开始监听之前加载模型
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(service.start(args.host, args.port))
+    print('Serving on http://%s:%d (POST /extract, GET /stats)' % (args.host, args.port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(service.close())
+        loop.close()
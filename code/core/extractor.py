@@ -1,83 +1,137 @@
+import time
+
 import sys
 sys.path.append("..")  # 先跳出当前目录
 from bean.word_unit import WordUnit
 from bean.sentence_unit import SentenceUnit
 from bean.entity_pair import EntityPair
-from core.extract_by_dsnf import ExtractByDSNF
+from core.rule_engine import RuleEngine
+from tool.metrics import metrics
 
 class Extractor:
-    """抽取生成知识三元组
+    """抽取生成知识三元组，状态均属于实例，可重入
     Attributes:
         entities: WordUnit list，句子的实体列表
         entity_pairs: EntityPair WordUnit list，句子实体对列表
+        entity_prefix: int list，实体数量前缀和，entity_prefix[k]为前k个词中的实体数量
+        max_entity_num_between: int，实体对之间允许的最大实体数量
+        window: int，实体对之间的最大词距离，用于限制长句中实体对的数量，None表示不限制
+        rule_engine: RuleEngine，DSNF规则引擎
+        verbose: bool，是否打印抽取出的三元组，服务等不需要逐条打印的调用方设为False
     """
-    entities = []  # 存储该句子中的可能实体
-    entity_pairs = []  # 存储该句子中(满足一定条件)的可能实体对
+    def __init__(self, max_entity_num_between=4, window=None, verbose=True):
+        self.entities = []  # 存储该句子中的可能实体
+        self.entity_pairs = []  # 存储该句子中(满足一定条件)的可能实体对
+        self.entity_prefix = [0]
+        self.max_entity_num_between = max_entity_num_between
+        self.window = window
+        self.verbose = verbose
+        self.rule_engine = RuleEngine(verbose)
 
-    def extract(self, origin_sentence, sentence, file_path, num):
+    def extract(self, origin_sentence, sentence, file_path, num, source=None):
         """
         Args:
             origin_sentence: string，原始句子
             sentence: SentenceUnit，句子单元
+            file_path: str，Json文件路径；或TripleSink/list等提供append(knowledge)的输出对象
+            num: int，当前知识三元组编号
+            source: (str, int)，句子出处(文档标识，句子在文档中的序号)，记录在三元组的'出处'中
         Returns:
             num： 知识三元组的数量编号
         """
-        self.get_entities(sentence)
-        self.get_entity_pairs(sentence)
-        for entity_pair in self.entity_pairs:
-            entity1 = entity_pair.entity1
-            entity2 = entity_pair.entity2
+        if metrics.enabled:
+            start = time.perf_counter()
+            next_num = self.extract_triples(origin_sentence, sentence, file_path, num, source)
+            metrics.observe('extract', start)
+            metrics.count('triples', next_num - num)
+            return next_num
+        return self.extract_triples(origin_sentence, sentence, file_path, num, source)
 
-            extract_dsnf = ExtractByDSNF(origin_sentence, sentence, entity1, entity2, file_path, num)
-            # [DSNF2|DSNF7]，部分覆盖[DSNF5|DSNF6]
-            if extract_dsnf.SBV_VOB(entity1, entity2):
-                pass
-            # [DSNF4]
-            if extract_dsnf.SBV_CMP_POB(entity1, entity2):
-                pass
-            if extract_dsnf.SBVorFOB_POB_VOB(entity1, entity2):
-                pass
-            # [DSNF1]
-            # if not extract_dsnf.E_NN_E(entity1, entity2):
-            #     pass
-            # [DSNF3|DSNF5|DSNF6]，并列实体中的主谓宾可能会包含DSNF3
-            if extract_dsnf.coordinate(entity1, entity2):
-                pass
-            # ["的"短语]
-            if extract_dsnf.entity_de_entity_NNT(entity1, entity2):
-                pass
-
-            num = extract_dsnf.num
-        return num
+    def extract_triples(self, origin_sentence, sentence, file_path, num, source=None):
+        """获取实体与实体对，由规则引擎抽取知识三元组
+        Args:
+            origin_sentence: string，原始句子
+            sentence: SentenceUnit，句子单元
+            file_path: str，Json文件路径；或提供append(knowledge)的输出对象
+            num: int，当前知识三元组编号
+            source: (str, int)，句子出处，None表示不记录
+        Returns:
+            num： 知识三元组的数量编号
+        """
+        self.get_entities(sentence)
+        if len(self.entities) < 2:  # 没有实体对，包括跳过了依存句法分析的句子
+            return num
+        # 规则引擎只调用可能匹配的DSNF规则，输出与依次尝试全部规则相同
+        return self.rule_engine.extract(origin_sentence, sentence, self.iter_entity_pairs(sentence),
+                                        file_path, num, source)
 
     def get_entities(self, sentence):
-        """获取句子中的所有可能实体
+        """获取句子中的所有可能实体，同时计算实体数量前缀和
         Args:
             sentence: SentenceUnit，句子单元
         Returns:
             None
         """
-        self.entities.clear()  # 清空实体
-        for word in sentence.words:
+        self.get_entities_from_words(sentence.words)
+
+    def get_entities_from_words(self, words):
+        """获取词单元列表中的所有可能实体，同时计算实体数量前缀和，实体只与词性和词的位置有关
+        Args:
+            words: WordUnit list，词单元列表(可以尚未进行依存句法分析)
+        Returns:
+            None
+        """
+        self.entities = []
+        self.entity_prefix = [0]
+        num = 0
+        for word in words:
             if self.is_entity(word):
                 self.entities.append(word)
+                num += 1
+            self.entity_prefix.append(num)
 
     def get_entity_pairs(self, sentence):
         """组成实体对，限制实体对之间的实体数量不能超过4
         Args:
             sentence: SentenceUnit，句子单元
         """
-        self.entity_pairs.clear()  # 清空实体对
-        length = len(self.entities)
-        i = 0
-        while i < length:
-            j = i + 1
-            while j < length:
-                if (self.entities[i].lemma != self.entities[j].lemma and 
-                    self.get_entity_num_between(self.entities[i], self.entities[j], sentence) <= 4):
-                    self.entity_pairs.append(EntityPair(self.entities[i], self.entities[j]))
-                j += 1
-            i += 1
+        self.entity_pairs = list(self.iter_entity_pairs(sentence))
+
+    def iter_entity_pairs(self, sentence):
+        """按顺序逐个生成实体对，需先调用get_entities
+           实体间的实体数量随实体2后移单调不减，超过限制(或超出窗口)后不再继续向后查找
+        Args:
+            sentence: SentenceUnit，句子单元
+        Yields:
+            entity_pair: EntityPair，实体对
+        """
+        entities = self.entities
+        length = len(entities)
+        for i in range(length):
+            entity1 = entities[i]
+            for j in range(i + 1, length):
+                entity2 = entities[j]
+                if self.window is not None and entity2.ID - entity1.ID > self.window:
+                    break
+                if self.get_entity_num_between(entity1, entity2, sentence) > self.max_entity_num_between:
+                    break
+                if entity1.lemma != entity2.lemma:
+                    yield EntityPair(entity1, entity2)
+
+    def get_skip_reason(self, words):
+        """依存句法分析之前判断句子是否存在实体对，实体对只与词性，词的位置和词本身有关，与依存关系无关，
+           不存在实体对的句子不会抽取出任何三元组，可以跳过依存句法分析与抽取
+        Args:
+            words: WordUnit list，命名实体识别与合并后的词单元列表
+        Returns:
+            *: str，存在实体对时为None；否则为跳过的原因，'entities'实体少于两个，'entity_pairs'实体对不满足限制
+        """
+        self.get_entities_from_words(words)
+        if len(self.entities) < 2:
+            return 'entities'
+        for entity_pair in self.iter_entity_pairs(None):
+            return None
+        return 'entity_pairs'
 
     def is_entity(self, entry):
         """判断词单元是否实体
@@ -94,18 +148,16 @@ class Extractor:
             return False
 
     def get_entity_num_between(self, entity1, entity2, sentence):
-        """获得两个实体之间的实体数量
+        """获得两个实体之间的实体数量，根据前缀和常数时间计算，需先调用get_entities
+           统计范围与逐词遍历sentence.words[entity1.ID+1:entity2.ID]一致
         Args:
             entity1: WordUnit，实体1
             entity2: WordUnit，实体2
         Returns:
             num: int，两实体间的实体数量
         """
-        num = 0
-        i = entity1.ID + 1
-        while i < entity2.ID:
-            if self.is_entity(sentence.words[i]):
-                num += 1
-            i += 1
-        return num
-
+        start = entity1.ID + 1
+        end = entity2.ID
+        if end <= start:
+            return 0
+        return self.entity_prefix[end] - self.entity_prefix[start]
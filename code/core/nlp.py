@@ -1,61 +1,142 @@
 # import pynlpir
-import jieba
 from ctypes import c_char_p
 
-from pyltp import SentenceSplitter, Postagger, NamedEntityRecognizer, Parser
-
 import os
+import threading
+import time
 
 import sys
 sys.path.append("..")  # 先跳出当前目录
 from bean.word_unit import WordUnit
 from bean.sentence_unit import SentenceUnit
 from core.entity_combine import EntityCombine
+from core.dict_cache import DictCache
+from core.document_dict import DocumentDict
+from core.analysis_cache import AnalysisCache
+from core.clause_splitter import ClauseSplitter
+from core.extractor import Extractor
+from tool.metrics import metrics
 
 
 class NLP:
     """进行自然语言处理，包括分词，词性标注，命名实体识别，依存句法分析
+       按需加载：jieba与分词词典在后台线程中加载，首次分词时等待其完成；
+       每个ltp模型在首次使用对应阶段时才加载，只分词的调用方不加载任何模型，
+       服务等需要预先加载全部资源的调用方使用warmup()
     Attributes:
         default_user_dict_dir: str，用户自定义词典目录
         default_model_dir: str，ltp模型文件目录
+        tokenizer: jieba.Tokenizer，该实例独有的分词器，不修改jieba全局默认分词器
+        dict_version: str，分词词典版本(jieba基础词典与用户词典的内容哈希)
+        analysis_cache: AnalysisCache，句子分析结果的LRU缓存，重复句子只分析一次
+        postagger, recognizer, parser: 词性标注，命名实体识别与依存句法分析模型(ltp模型或替代后端)
+        pair_gate: Extractor，命名实体合并后判断是否存在实体对，不存在时跳过依存句法分析，None表示不跳过；
+                   与抽取使用相同的参数(extractor_options)，实体对的判断才与抽取一致
+        gate_counts: dict，依存句法分析的句子数量，以及各原因跳过的句子数量
+        clause_splitter: ClauseSplitter，超过长度预算的句子分段进行依存句法分析，None表示不分段
+        load_times: dict，词典与各模型的加载耗时(秒)，只包含已加载的部分
     """
     default_user_dict_dir = '../../resource/'  # 默认的用户词典目录，清华大学法律词典
     default_model_dir = '../../model/'  # ltp模型文件目录
-    
-    def __init__(self, user_dict_dir=default_user_dict_dir, model_dir=default_model_dir):
+    # 模型属性 -> (pyltp类名，模型文件)
+    model_files = {'postagger': ('Postagger', 'pos.model'),
+                   'recognizer': ('NamedEntityRecognizer', 'ner.model'),
+                   'parser': ('Parser', 'parser.model')}
+    dict_attributes = {'tokenizer', 'dict_version'}  # 后台加载完成后才设置的属性
+
+    def __init__(self, user_dict_dir=default_user_dict_dir, model_dir=default_model_dir,
+                 cache_dir=DictCache.default_cache_dir, analysis_cache_size=10000, backend=None,
+                 skip_unpaired=True, parse_budget=None, parse_token_cap=200, extractor_options=None):
         self.default_user_dict_dir = user_dict_dir
         self.default_model_dir = model_dir
+        self.load_times = dict()
+        self.model_lock = threading.Lock()
         # 初始化分词器
         # pynlpir.open()  # 初始化分词器
         # 添加用户词典(法律文书大辞典与清华大学法律词典)，这种方式是添加进内存中，速度更快
-        files = os.listdir(user_dict_dir)
-        for file in files:
-            file_path = os.path.join(user_dict_dir, file)
-            # 文件夹则跳过
-            if os.path.isdir(file):
-                continue
-            with open(file_path, 'r', encoding='utf-8') as f:
-                line = f.readline()
-                while line:
-                    word = line.strip('\n').strip()
-                    jieba.add_word(word)
-                    # print(c_char_p(word.encode()))
-                    # pynlpir.nlpir.AddUserWord(c_char_p(word.encode()))
-                    line = f.readline()
-
-        # 加载ltp模型
-        # 词性标注模型
-        self.postagger = Postagger()
-        postag_flag = self.postagger.load(os.path.join(self.default_model_dir, 'pos.model'))
-        # 命名实体识别模型
-        self.recognizer = NamedEntityRecognizer()
-        ner_flag = self.recognizer.load(os.path.join(self.default_model_dir, 'ner.model'))
-        # 依存句法分析模型
-        self.parser = Parser()
-        parse_flag = self.parser.load(os.path.join(self.default_model_dir, 'parser.model'))
-
-        if postag_flag or ner_flag or parse_flag:
-            print('load model failed!')
+        # 合并后的编译词典缓存在cache_dir中，以词典内容哈希为键，首次构建后直接加载
+        # 导入jieba与加载词典在后台线程中进行，与模型加载和调用方的其他初始化重叠
+        self.dict_cache = DictCache(user_dict_dir, cache_dir)
+        self.dict_error = None
+        self.dict_loader = threading.Thread(target=self.load_dict, daemon=True)
+        self.dict_loader.start()
+
+        if backend is not None:
+            # 替代ltp模型的后端(如基准测试使用的StubBackend)，接口与pyltp相同
+            self.postagger = backend.postagger
+            self.recognizer = backend.recognizer
+            self.parser = backend.parser
+
+        self.entity_combine = EntityCombine()  # 命名实体合并
+        self.analysis_cache = AnalysisCache(analysis_cache_size)  # 分析结果缓存，0表示不缓存
+        # 判断实体对的参数(max_entity_num_between，window)须与调用方抽取使用的Extractor相同，
+        # 否则抽取时可能存在跳过了依存句法分析的实体对
+        self.pair_gate = Extractor(**(extractor_options or dict())) if skip_unpaired else None
+        self.gate_counts = {'parsed': 0, 'entities': 0, 'entity_pairs': 0}
+        # 长句分段的长度预算与硬上限(词数量)，parse_budget为None(默认)时整句分析
+        self.clause_splitter = None if parse_budget is None else ClauseSplitter(parse_budget, parse_token_cap)
+
+    def __getattr__(self, name):
+        """未加载的分词器与模型在首次访问时加载，加载后成为普通属性，之后的访问不再经过这里"""
+        if name in NLP.dict_attributes:
+            self.wait_dict()
+            return self.__dict__[name]
+        if name in NLP.model_files:
+            return self.load_model(name)
+        raise AttributeError(name)
+
+    def load_dict(self):
+        """在后台线程中导入jieba并加载编译词典，出错时记录异常，由等待的调用方抛出"""
+        try:
+            import jieba
+            tokenizer = jieba.Tokenizer()
+            self.dict_version = self.dict_cache.load(tokenizer)
+            self.tokenizer = tokenizer
+            self.load_times['dict'] = self.dict_cache.load_time
+        except Exception as e:
+            self.dict_error = e
+
+    def wait_dict(self):
+        """等待后台的词典加载完成"""
+        self.dict_loader.join()
+        if self.dict_error is not None:
+            raise RuntimeError('loading dictionary failed') from self.dict_error
+
+    def load_model(self, name):
+        """加载一个ltp模型，pyltp只在使用ltp模型时导入
+        Args:
+            name: str，模型属性，'postagger'，'recognizer'或'parser'
+        Returns:
+            model: 加载后的模型
+        """
+        with self.model_lock:
+            model = self.__dict__.get(name)
+            if model is not None:  # 其他线程已经加载
+                return model
+            start = time.perf_counter()
+            import pyltp
+            class_name, model_file = self.model_files[name]
+            model = getattr(pyltp, class_name)()
+            if model.load(os.path.join(self.default_model_dir, model_file)):
+                print('load model failed!')
+            setattr(self, name, model)
+            self.load_times[name] = time.perf_counter() - start
+        return model
+
+    def load_models(self):
+        """加载全部ltp模型(已加载或使用替代后端的跳过)"""
+        for name in self.model_files:
+            if name not in self.__dict__:
+                self.load_model(name)
+
+    def warmup(self):
+        """预先加载词典与全部模型，之后的请求不再等待加载；fork工作进程前调用，避免后台线程未完成时fork
+        Returns:
+            load_times: dict，词典与各模型的加载耗时(秒)
+        """
+        self.load_models()
+        self.wait_dict()
+        return self.load_times
 
     def segment(self, sentence, entity_postag=dict()):
         """采用NLPIR进行分词处理
@@ -65,19 +146,28 @@ class NLP:
         Returns:
             lemmas: list，分词结果
         """
-        # 添加实体词典
+        # 添加实体词典，仅在本次分词中生效，之后恢复分词器词典
         if entity_postag:
-            for entity in entity_postag:
-                # pynlpir.nlpir.AddUserWord(c_char_p(entity.encode()))
-                jieba.add_word(entity)
+            with self.document(entity_postag):
+                return self.tokenizer.lcut(sentence)
         # pynlpir.nlpir.AddUserWord(c_char_p('前任'.encode()))  # 单个用户词加入示例
         # pynlpir.nlpir.AddUserWord(c_char_p('习近平'.encode()))  # 单个用户词加入示例
         # 分词，不进行词性标注
         # lemmas = pynlpir.segment(sentence, pos_tagging=False)
-        lemmas = jieba.lcut(sentence)
+        lemmas = self.tokenizer.lcut(sentence)
         # pynlpir.close()  # 释放
         return lemmas
 
+    def document(self, entity_postag):
+        """文档级实体词典，对一篇文档只添加一次，离开作用域后丢弃
+           with nlp.document(entity_postag): nlp.analyze_batch(sentences)
+        Args:
+            entity_postag: dict，实体词性词典，分析每一个案例的结构化文本时产生
+        Returns:
+            *: DocumentDict，叠加在该实例分词器上的文档词典
+        """
+        return DocumentDict(self.tokenizer, entity_postag)
+
     def postag(self, lemmas):
         """对分词后的结果进行词性标注
         Args:
@@ -86,16 +176,32 @@ class NLP:
         Returns:
             words: WordUnit list，包含分词与词性标注结果
         """
-        words = []  # 存储句子处理后的词单元
         # 词性标注
         postags = self.postagger.postag(lemmas)
-        for i in range(len(lemmas)):
-            # 存储分词与词性标记后的词单元WordUnit，编号从1开始
-            word = WordUnit(i+1, lemmas[i], postags[i])
-            words.append(word)
+        # 存储分词与词性标记后的词单元WordUnit，编号从1开始，分词结果拼接后即为原句
+        words = self.build_words(''.join(lemmas), lemmas, postags)
         # self.postagger.release()  # 释放
         return words
 
+    def build_words(self, sentence, lemmas, postags):
+        """由分词与词性标注结果构建词单元，并记录每个词的字符位置
+           分词结果依次覆盖整个句子，位置相对于去除首尾空白后的句子(与分析结果缓存的规范化一致)，
+           句首空白的词位置为负数
+        Args:
+            sentence: str，分词前的句子
+            lemmas: list，分词结果
+            postags: list，词性标注结果
+        Returns:
+            words: WordUnit list，编号从1开始的词单元
+        """
+        words = []
+        start = len(sentence.lstrip()) - len(sentence)
+        for i in range(len(lemmas)):
+            end = start + len(lemmas[i])
+            words.append(WordUnit(i+1, lemmas[i], postags[i], start=start, end=end))
+            start = end
+        return words
+
     def get_postag(self, word):
         """获得单个词的词性标注
         Args:
@@ -121,7 +227,7 @@ class NLP:
         # 命名实体识别
         netags = self.recognizer.recognize(lemmas, postags)
         # print('\t'.join(netags))  # just for test
-        words_netag = EntityCombine().combine(words, netags)
+        words_netag = self.entity_combine.combine(words, netags)
         # self.recognizer.release()  # 释放
         return words_netag
 
@@ -132,29 +238,171 @@ class NLP:
         Returns:
             *: SentenceUnit，该句子单元
         """
-        lemmas = []  # 分词结果
-        postags = []  # 词性标注结果
-        for word in words:
-            lemmas.append(word.lemma)
-            postags.append(word.postag)
         # 依存句法分析
-        arcs = self.parser.parse(lemmas, postags)
-        for i in range(len(arcs)):
-            words[i].head = arcs[i].head
-            words[i].dependency = arcs[i].relation
+        self.parse_words(words)
         # self.parser.release()
         return SentenceUnit(words)
 
+    def parse_words(self, words):
+        """对词单元进行依存句法分析，设置每个词的中心词与依存关系
+           超过长度预算的句子按分句边界分段分析(见ClauseSplitter)，各段独立分析，不在段之间添加依存弧：
+           每段的中心词依存于0(HED)，SentenceUnit.root为第一段的中心词，跨段的实体对不会匹配DSNF规则
+        Args:
+            words: WordUnit list，命名实体合并后的词单元列表，编号从1开始连续
+        """
+        pieces = None if self.clause_splitter is None else self.clause_splitter.split(words)
+        if pieces is None:
+            pieces = [(0, len(words))]
+        for start, stop in pieces:
+            arcs = self.parser.parse([word.lemma for word in words[start:stop]],
+                                     [word.postag for word in words[start:stop]])
+            for i in range(len(arcs)):
+                word = words[start + i]
+                word.head = arcs[i].head + start if arcs[i].head != 0 else 0
+                word.set_dependency(arcs[i].relation)
+
+    def analyze_batch(self, sentences, entity_postag=dict()):
+        """批量进行分词，词性标注，命名实体识别与依存句法分析
+           先查找分析结果缓存，只有未命中的句子(批内去重后)才进行处理，处理结果加入缓存
+        Args:
+            sentences: str list，句子列表
+            entity_postag: dict，实体词性词典，整批句子只添加一次，处理后丢弃
+        Returns:
+            sentence_units: SentenceUnit list，与输入句子一一对应的句子单元
+        """
+        sentence_units = self.analyze_cached(sentences, entity_postag)
+        if metrics.enabled:
+            metrics.count('sentences', len(sentence_units))
+            metrics.count('tokens', sum(len(sentence_unit.words) for sentence_unit in sentence_units))
+        return sentence_units
+
+    def analyze_cached(self, sentences, entity_postag=dict()):
+        """查找分析结果缓存，只处理未命中的句子
+        Args:
+            sentences: str list，句子列表
+            entity_postag: dict，实体词性词典
+        Returns:
+            sentence_units: SentenceUnit list，与输入句子一一对应的句子单元
+        """
+        cache = self.analysis_cache
+        if cache.max_size <= 0:
+            return self.pipeline(sentences, entity_postag)
+        entities = frozenset(entity_postag) if entity_postag else None
+        sentence_units = []
+        missed = dict()  # 未命中的缓存键 -> 规范化后的句子
+        for sentence in sentences:
+            key = cache.get_key(cache.normalize(sentence), self.dict_version, entities)
+            sentence_unit = cache.get(key)
+            if sentence_unit is None:
+                missed[key] = key[0]
+            sentence_units.append((key, sentence_unit))
+        if missed:
+            for key, sentence_unit in zip(missed, self.pipeline(list(missed.values()), entity_postag)):
+                missed[key] = sentence_unit
+                cache.put(key, sentence_unit)
+        return [missed[key] if sentence_unit is None else sentence_unit for key, sentence_unit in sentence_units]
+
+    def pipeline(self, sentences, entity_postag=dict()):
+        """不经过缓存，批量进行分词，词性标注，命名实体识别与依存句法分析
+           每个阶段依次处理整批句子，阶段之间直接复用分词与词性标注列表，不再从WordUnit中重建
+           命名实体合并后不存在实体对的句子跳过依存句法分析(见pair_gate)
+           记录统计时每个句子在每个阶段单独计时，直方图的每个样本都是一个句子的实际耗时
+        Args:
+            sentences: str list，句子列表
+            entity_postag: dict，实体词性词典，整批句子只添加一次，处理后丢弃
+        Returns:
+            sentence_units: SentenceUnit list，与输入句子一一对应的句子单元
+        """
+        timing = metrics.enabled  # 关闭统计时只有这一次判断
+        # 分词
+        with self.document(entity_postag):
+            lemmas_batch = self.map_stage(timing, 'segment', self.tokenizer.lcut, sentences)
+        # 词性标注
+        postags_batch = self.map_stage(timing, 'postag', lambda lemmas: list(self.postagger.postag(lemmas)),
+                                       lemmas_batch)
+        # 命名实体识别，直接使用分词与词性标注列表
+        netags_batch = self.map_stage(timing, 'netag',
+                                      lambda lemmas, postags: list(self.recognizer.recognize(lemmas, postags)),
+                                      lemmas_batch, postags_batch)
+        # 命名实体合并
+        words_batch = self.map_stage(timing, 'combine', lambda sentence, lemmas, postags, netags:
+                                     self.entity_combine.combine(self.build_words(sentence, lemmas, postags), netags),
+                                     sentences, lemmas_batch, postags_batch, netags_batch)
+        # 依存句法分析，不存在实体对的句子不会抽取出三元组，跳过分析，词的依存关系保持为空
+        # 实体对判断单独计时(gate)，parse只记录实际分析的句子
+        sentence_units = []
+        for words in words_batch:
+            if self.pair_gate is not None:
+                if timing:
+                    start = time.perf_counter()
+                reason = self.pair_gate.get_skip_reason(words)
+                if timing:
+                    metrics.observe('gate', start)
+                if reason is not None:
+                    self.gate_counts[reason] += 1
+                    if timing:
+                        metrics.count('skipped_' + reason)
+                    sentence_units.append(SentenceUnit(words))
+                    continue
+            self.gate_counts['parsed'] += 1
+            if timing:
+                start = time.perf_counter()
+                self.parse_words(words)
+                metrics.observe('parse', start)
+            else:
+                self.parse_words(words)
+            sentence_units.append(SentenceUnit(words))
+        return sentence_units
+
+    def map_stage(self, timing, stage, function, *batches):
+        """对整批输入逐个调用一个阶段的处理函数
+        Args:
+            timing: bool，是否记录统计，是则逐个计时
+            stage: str，阶段名
+            function: 处理函数，参数依次取自各批次
+            batches: list，与句子一一对应的各批输入
+        Returns:
+            results: list，与输入一一对应的处理结果
+        """
+        if not timing:
+            return [function(*args) for args in zip(*batches)]
+        results = []
+        for args in zip(*batches):
+            start = time.perf_counter()
+            results.append(function(*args))
+            metrics.observe(stage, start)
+        return results
+
+    def iter_analyze(self, sentences, batch_size=256, entity_postag=dict()):
+        """analyze_batch的生成器版本，按批次处理任意可迭代的句子序列
+        Args:
+            sentences: iterable，句子序列
+            batch_size: int，每批句子数量
+            entity_postag: dict，实体词性词典
+        Yields:
+            sentence_unit: SentenceUnit，与输入句子顺序一致的句子单元
+        """
+        batch = []
+        for sentence in sentences:
+            batch.append(sentence)
+            if len(batch) >= batch_size:
+                yield from self.analyze_batch(batch, entity_postag)
+                batch = []
+        if batch:
+            yield from self.analyze_batch(batch, entity_postag)
+
     def close(self):
-        """关闭与释放nlp"""
+        """关闭与释放nlp，只释放已加载的模型"""
         # pynlpir.close()
-        self.postagger.release()
-        self.recognizer.release()
-        self.parser.release()
+        for name in self.model_files:
+            if name in self.__dict__:
+                self.__dict__[name].release()
 
 
 if __name__ == '__main__':
+    start = time.perf_counter()
     nlp = NLP()
+    print('NLP() returned in %.3fs' % (time.perf_counter() - start))
     # 分词测试
     print('***' + '分词测试' + '***')
     # sentence = '国家主席习近平视察中国福建厦门。'
@@ -162,6 +410,8 @@ if __name__ == '__main__':
     lemmas = nlp.segment(sentence)
     # 输出：['国家主席', '习近平', '视察', '中国', '福建', '厦门', '。']
     print(lemmas)
+    print('first segment after %.3fs, dictionary loaded in %.3fs (built: %s)'
+          % (time.perf_counter() - start, nlp.dict_cache.load_time, nlp.dict_cache.built))
     
     # 词性标注测试
     print('***' + '词性标注测试' + '***')
@@ -183,4 +433,10 @@ if __name__ == '__main__':
     sentence = nlp.parse(words_netag)
     print(sentence.to_string())
     print('sentence head: ' + sentence.words[0].head_word.lemma)
+
+    # 批量处理测试
+    print('***' + '批量处理测试' + '***')
+    for sentence in nlp.analyze_batch(['奥巴马毕业于哈弗大学', '习近平对埃及进行国事访问']):
+        print(sentence.to_string())
+    print(nlp.analysis_cache.stats())
     
@@ -0,0 +1,139 @@
+import os
+from collections import deque
+from multiprocessing import Pool
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from core.nlp import NLP
+from core.extractor import Extractor
+from tool.triple_sink import TripleSink
+from tool.metrics import metrics
+
+# 工作进程内的NLP实例，每个进程只加载一次模型与词典
+worker_nlp = None
+
+
+def init_worker(user_dict_dir, model_dir, collect_metrics=False, nlp_options=None):
+    """工作进程初始化，加载ltp模型与用户词典
+       如果父进程已经预加载(fork方式启动)，则直接继承父进程的实例(copy-on-write)
+    Args:
+        user_dict_dir: str，用户自定义词典目录
+        model_dir: str，ltp模型文件目录
+        collect_metrics: bool，是否在工作进程中记录分阶段耗时，随结果返回父进程汇总
+        nlp_options: dict，NLP的其他参数(如backend，analysis_cache_size)
+    """
+    global worker_nlp
+    if collect_metrics and not metrics.enabled:
+        metrics.enable()
+    if worker_nlp is None:
+        worker_nlp = NLP(user_dict_dir, model_dir, **(nlp_options or dict()))
+        # 预先加载全部模型；父进程预加载时须在fork之前等待后台的词典加载线程完成
+        worker_nlp.warmup()
+
+
+def extract_batch(records, nlp=None, verbose=True, snapshot=True):
+    """在工作进程中处理一批句子
+    Args:
+        records: list，原始句子，或(文档标识，句子在文档中的序号，原始句子)，后者在三元组中记录出处
+        nlp: NLP，使用的NLP实例，默认为工作进程内的实例
+        verbose: bool，是否打印抽取出的三元组
+        snapshot: bool，是否取出本批次的统计数据随结果返回；在父进程(或服务进程的线程)中处理时，
+                  统计数据已经记录在进程内的实例中，不需要取出再合并
+    Returns:
+        triples: dict list，按句子顺序抽取得到的知识三元组(编号由父进程统一分配)
+        snapshot: tuple，本批次的统计数据，未记录统计或不取出时为None
+    """
+    triples = []
+    sources = [None if isinstance(record, str) else record[:2] for record in records]
+    origin_sentences = [record if isinstance(record, str) else record[2] for record in records]
+    sentences = (nlp or worker_nlp).iter_analyze(origin_sentences)
+    for origin_sentence, sentence, source in zip(origin_sentences, sentences, sources):
+        Extractor(verbose=verbose).extract(origin_sentence, sentence, triples, 1, source)
+    return triples, metrics.snapshot() if snapshot and metrics.enabled else None
+
+
+class ParallelExtractor:
+    """多进程知识三元组抽取，按输入顺序输出，编号与单进程运行一致
+    Attributes:
+        workers: int，工作进程数量
+        batch_size: int，每个任务包含的句子数量
+        preload: bool，是否在父进程中预加载模型，由fork出的工作进程继承
+        nlp_options: dict，工作进程创建NLP时的其他参数(如backend，analysis_cache_size)
+        verbose: bool，是否在工作进程中打印抽取出的三元组
+    """
+    def __init__(self, workers=os.cpu_count(), batch_size=64, preload=False,
+                 user_dict_dir=NLP.default_user_dict_dir, model_dir=NLP.default_model_dir, nlp_options=None,
+                 verbose=True):
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.preload = preload
+        self.user_dict_dir = user_dict_dir
+        self.model_dir = model_dir
+        self.nlp_options = nlp_options
+        self.verbose = verbose
+
+    def extract(self, origin_sentences, sink, num=1):
+        """抽取知识三元组并写入Json文件
+        Args:
+            origin_sentences: iterable，原始句子序列，或(文档标识，句子序号，原始句子)序列(如CorpusReader.read)
+            sink: TripleSink，三元组写出器；或str，Json文件路径
+            num: int，起始知识三元组编号
+        Returns:
+            num: int，下一个知识三元组编号
+        """
+        if isinstance(sink, str):
+            with TripleSink(sink) as file_sink:
+                return self.extract(origin_sentences, file_sink, num)
+
+        if self.preload or self.workers == 1:
+            init_worker(self.user_dict_dir, self.model_dir, metrics.enabled, self.nlp_options)
+        if self.workers == 1:
+            for batch in self.iter_batches(origin_sentences):
+                num = self.write_triples(extract_batch(batch, None, self.verbose, False), sink, num)
+            return num
+
+        with Pool(self.workers, initializer=init_worker,
+                  initargs=(self.user_dict_dir, self.model_dir, metrics.enabled, self.nlp_options)) as pool:
+            # 限制在途任务数量，保证内存有界，并按提交顺序取回结果
+            pending = deque()
+            for batch in self.iter_batches(origin_sentences):
+                pending.append(pool.apply_async(extract_batch, (batch, None, self.verbose)))
+                if len(pending) >= self.workers * 2:
+                    num = self.write_triples(pending.popleft().get(), sink, num)
+            while pending:
+                num = self.write_triples(pending.popleft().get(), sink, num)
+        return num
+
+    def iter_batches(self, origin_sentences):
+        """将句子序列按batch_size分批
+        Args:
+            origin_sentences: iterable，原始句子序列
+        Yields:
+            batch: list，一批句子
+        """
+        batch = []
+        for origin_sentence in origin_sentences:
+            batch.append(origin_sentence)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def write_triples(self, result, sink, num):
+        """为三元组分配全局编号并写入Json文件，同时汇总工作进程的统计数据
+        Args:
+            result: tuple，extract_batch的返回值，(知识三元组，统计数据)
+            sink: TripleSink，三元组写出器
+            num: int，当前知识三元组编号
+        Returns:
+            num: int，下一个知识三元组编号
+        """
+        triples, snapshot = result
+        if snapshot is not None:
+            metrics.merge(snapshot)
+        for triple in triples:
+            triple['编号'] = num
+            num += 1
+            sink.append(triple)
+        return num
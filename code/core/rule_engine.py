@@ -0,0 +1,149 @@
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from core.extract_by_dsnf import ExtractByDSNF
+
+
+class SentenceFeatures:
+    """句子级特征，每个句子只计算一次，用于判断哪些DSNF规则可能匹配
+    Attributes:
+        words: WordUnit list，句子的词单元列表
+        dependencies: set，句子中出现的依存关系
+        has_de: bool，句子中是否含有"的"
+        de_prefix: int list，"的"的数量前缀和，de_prefix[k]为前k个词中"的"的数量，首次使用时计算
+    """
+    def __init__(self, sentence):
+        self.words = sentence.words
+        self.dependencies = {word.dependency for word in self.words}
+        self.has_de = any(word.lemma == '的' for word in self.words)
+        self.de_prefix = None
+
+    def match_de(self, entity1, entity2):
+        """entity_de_entity_NNT的前置条件：实体1后紧跟"的"，
+           或者实体1依存于实体2(或其中心词)且检查范围(sentence.words[entity1.ID]至sentence.words[entity2.ID-2])中含有"的"
+        Args:
+            entity1: WordUnit，实体1
+            entity2: WordUnit，实体2
+        Returns:
+            *: bool，可能匹配(True)
+        """
+        if self.words[entity1.ID].lemma == '的':
+            return True
+        head = entity1.head
+        if not (head == entity2.ID or head == entity2.head
+                or (entity2.head_word and head == entity2.head_word.head)):
+            return False
+        if self.de_prefix is None:
+            self.de_prefix = [0]
+            num = 0
+            for word in self.words:
+                if word.lemma == '的':
+                    num += 1
+                self.de_prefix.append(num)
+        end = max(entity1.ID, entity2.ID - 2) + 1
+        return self.de_prefix[end] > self.de_prefix[entity1.ID]
+
+
+class RuleEngine:
+    """DSNF规则引擎，按句子特征筛选规则，再按实体对(检验偏正结构后)的依存关系分派，只调用可能匹配的规则
+       前置条件只包含规则本身最先检查且无副作用的条件，规则的调用顺序与逐条尝试全部规则时一致，
+       输出完全相同(包括coordinate中重复调用SBV_VOB产生的三元组)
+    Attributes:
+        rules: list，(规则方法名，句子级前置条件，依存关系前置条件，实体对前置条件)，按调用顺序排列，
+               依存关系前置条件的参数为检验后实体1与实体2的依存关系，
+               实体对前置条件的参数为(句子特征，实体1，实体2，检验后的实体1，检验后的实体2)，None表示不检查
+        dispatch_table: dict，句子可用规则 -> (依存关系1，依存关系2) -> (规则方法名，实体对前置条件)列表，
+                        只与依存关系有关，所有句子共享
+        verbose: bool，是否打印抽取出的三元组
+    """
+    rules = [
+        # [DSNF2|DSNF7]，部分覆盖[DSNF5|DSNF6]
+        ('SBV_VOB', lambda f: 'VOB' in f.dependencies,
+         lambda dep1, dep2: dep1 == 'SBV' and dep2 == 'VOB' or dep2 == 'ATT',
+         lambda f, entity1, entity2, ent1, ent2: (ent2.dependency == 'VOB' or (
+             ent2.head_word.dependency == 'VOB' and ent2.head_word.head == ent1.head))),
+        # [DSNF4]
+        ('SBV_CMP_POB', lambda f: {'SBV', 'CMP', 'POB'} <= f.dependencies,
+         lambda dep1, dep2: dep1 == 'SBV' and dep2 == 'POB', None),
+        # [DSNF3]
+        ('SBVorFOB_POB_VOB', lambda f: {'POB', 'ADV'} <= f.dependencies,
+         lambda dep1, dep2: dep1 in {'SBV', 'FOB'} and dep2 == 'POB', None),
+        # [DSNF3|DSNF5|DSNF6]，并列实体中的主谓宾可能会包含DSNF3
+        ('coordinate', lambda f: 'COO' in f.dependencies,
+         lambda dep1, dep2: dep1 == 'COO' or dep2 == 'COO', None),
+        # ["的"短语]
+        ('entity_de_entity_NNT', lambda f: f.has_de, None,
+         lambda f, entity1, entity2, ent1, ent2: f.match_de(entity1, entity2)),
+    ]
+    dispatch_table = dict()
+
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+
+    def select_rules(self, features):
+        """根据句子特征选择可能匹配的规则
+        Args:
+            features: SentenceFeatures，句子特征
+        Returns:
+            rules: tuple，可能匹配的规则在rules中的下标
+        """
+        return tuple(i for i, rule in enumerate(self.rules) if rule[1](features))
+
+    def dispatch(self, rules, dep1, dep2):
+        """获得实体对需要调用的规则
+        Args:
+            rules: tuple，句子可用规则的下标
+            dep1: str，检验后实体1的依存关系
+            dep2: str，检验后实体2的依存关系
+        Returns:
+            pair_rules: list，(规则方法名，实体对前置条件)
+        """
+        pair_rules = []
+        for i in rules:
+            name, sentence_condition, label_condition, pair_condition = self.rules[i]
+            if label_condition is None or label_condition(dep1, dep2):
+                pair_rules.append((name, pair_condition))
+        return pair_rules
+
+    def extract(self, origin_sentence, sentence, entity_pairs, file_path, num, source=None):
+        """对句子的所有实体对进行抽取，同一句子复用一个ExtractByDSNF，实体的偏正结构检验结果只计算一次
+           没有进行依存句法分析的句子(词的中心词均为0)不能使用DSNF规则，不抽取
+        Args:
+            origin_sentence: string，原始句子
+            sentence: SentenceUnit，句子单元
+            entity_pairs: iterable，实体对
+            file_path: str，Json文件路径；或TripleSink/list等提供append(knowledge)的输出对象
+            num: int，当前知识三元组编号
+            source: (str, int)，句子出处(文档标识，句子在文档中的序号)，None表示不记录
+        Returns:
+            num: int，下一个知识三元组编号
+        """
+        if not sentence.parsed:
+            return num
+        features = SentenceFeatures(sentence)
+        rules = self.select_rules(features)
+        if not rules:
+            return num
+        dispatch_table = self.dispatch_table.get(rules)
+        if dispatch_table is None:
+            dispatch_table = self.dispatch_table[rules] = dict()
+        extract_dsnf = ExtractByDSNF(origin_sentence, sentence, None, None, file_path, num, source, self.verbose)
+        checked_entities = dict()  # 实体ID到检验后实体的映射
+        for entity_pair in entity_pairs:
+            entity1 = entity_pair.entity1
+            entity2 = entity_pair.entity2
+            ent1 = checked_entities.get(entity1.ID)
+            if ent1 is None:
+                ent1 = checked_entities[entity1.ID] = extract_dsnf.check_entity(entity1)
+            ent2 = checked_entities.get(entity2.ID)
+            if ent2 is None:
+                ent2 = checked_entities[entity2.ID] = extract_dsnf.check_entity(entity2)
+            key = (ent1.dependency, ent2.dependency)
+            pair_rules = dispatch_table.get(key)
+            if pair_rules is None:
+                pair_rules = dispatch_table[key] = self.dispatch(rules, *key)
+            for name, pair_condition in pair_rules:
+                if pair_condition is None or pair_condition(features, entity1, entity2, ent1, ent2):
+                    extract_dsnf.entity1 = entity1
+                    extract_dsnf.entity2 = entity2
+                    getattr(extract_dsnf, name)(entity1, entity2)
+        return extract_dsnf.num
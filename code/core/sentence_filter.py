@@ -0,0 +1,135 @@
+import os
+import re
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from tool.aho_corasick import AhoCorasick
+
+
+class SentenceFilter:
+    """NLP处理之前的句子过滤，被拒绝的句子不进行分词，词性标注，命名实体识别与依存句法分析
+       依次检查：长度，字符类型(表格，数字，案号等非正文行)，实体候选数量(可选，需要实体列表)，
+       实体候选数量会拒绝含有未登录实体的句子，只在有完整的实体列表时使用，
+       每种过滤条件分别统计拒绝的句子数量
+       for sentence in SentenceFilter().filter(sentences): ...
+    Attributes:
+        min_length: int，句子最小长度
+        min_cjk_ratio: float，汉字在非空白字符中的最小比例，低于该比例的为数字，表格等非正文行
+        max_separators: int，表格分隔符(|，制表符)的最大数量
+        matcher: AhoCorasick，实体候选词自动机，None表示不检查实体候选数量
+        min_entity_candidates: int，句子中不同实体候选词的最小数量
+        accepted: int，通过的句子数量
+        rejects: dict，过滤条件 -> 拒绝的句子数量
+    """
+    # 案号，如"（2016）京01民终1234号"
+    case_code = re.compile(r'^\s*[（(]\d{4}[）)][一-鿿\d]{1,12}\d+号\s*$')
+    cjk = re.compile('[一-鿿]')
+    space = re.compile(r'\s')
+
+    def __init__(self, min_length=6, min_cjk_ratio=0.3, max_separators=2, matcher=None, min_entity_candidates=2):
+        self.min_length = min_length
+        self.min_cjk_ratio = min_cjk_ratio
+        self.max_separators = max_separators
+        self.matcher = matcher
+        self.min_entity_candidates = min_entity_candidates
+        self.accepted = 0
+        self.rejects = {'length': 0, 'case_code': 0, 'table': 0, 'cjk_ratio': 0, 'entity_candidates': 0}
+
+    @staticmethod
+    def build_matcher(lexicon_paths=(), entities=()):
+        """由实体列表文件与已知实体构造实体候选词自动机
+           实体候选应覆盖人名，地名与机构名等实体，只包含普通法律术语的词典会拒绝大部分有效句子
+        Args:
+            lexicon_paths: str list，实体列表文件或目录(每行一个词)
+            entities: iterable，已知实体(如实体词性词典entity_postag的键)
+        Returns:
+            matcher: AhoCorasick，实体候选词自动机
+        """
+        matcher = AhoCorasick()
+        file_paths = []
+        for path in lexicon_paths:
+            if os.path.isdir(path):
+                file_paths.extend(os.path.join(path, file) for file in sorted(os.listdir(path))
+                                  if not os.path.isdir(os.path.join(path, file)))
+            else:
+                file_paths.append(path)
+        for file_path in file_paths:
+            with open(file_path, 'r', encoding='utf-8') as f_in:
+                for line in f_in:
+                    matcher.add_word(line.strip())
+        for entity in entities:
+            matcher.add_word(entity)
+        matcher.build()
+        return matcher
+
+    def get_reject_reason(self, sentence):
+        """判断句子是否被拒绝
+        Args:
+            sentence: str，原始句子
+        Returns:
+            *: str，拒绝的过滤条件，通过时为None
+        """
+        if len(sentence) < self.min_length:
+            return 'length'
+        if self.case_code.match(sentence):
+            return 'case_code'
+        if sentence.count('|') + sentence.count('\t') > self.max_separators:
+            return 'table'
+        visible = len(sentence) - len(self.space.findall(sentence))
+        if len(self.cjk.findall(sentence)) < self.min_cjk_ratio * visible:
+            return 'cjk_ratio'
+        if self.matcher is not None and not self.has_entity_candidates(sentence):
+            return 'entity_candidates'
+        return None
+
+    def has_entity_candidates(self, sentence):
+        """一次扫描判断句子中是否至少有min_entity_candidates个不同的实体候选词"""
+        candidates = set()
+        for end, word in self.matcher.iter(sentence):
+            candidates.add(word)
+            if len(candidates) >= self.min_entity_candidates:
+                return True
+        return False
+
+    def accept(self, sentence):
+        """检查句子并计数
+        Args:
+            sentence: str，原始句子
+        Returns:
+            *: bool，通过(True)，拒绝(False)
+        """
+        reason = self.get_reject_reason(sentence)
+        if reason is None:
+            self.accepted += 1
+            return True
+        self.rejects[reason] += 1
+        return False
+
+    def filter(self, sentences):
+        """过滤句子序列
+        Args:
+            sentences: iterable，原始句子序列
+        Yields:
+            sentence: str，通过的句子
+        """
+        for sentence in sentences:
+            if self.accept(sentence):
+                yield sentence
+
+    def stats(self):
+        """获得过滤统计信息
+        Returns:
+            *: dict，通过的句子数量与各过滤条件拒绝的句子数量
+        """
+        stats = {'accepted': self.accepted}
+        stats.update(self.rejects)
+        return stats
+
+
+if __name__ == '__main__':
+    sentence_filter = SentenceFilter(matcher=SentenceFilter.build_matcher(entities=['高克', '中国', '同济大学']))
+    sentences = ['高克访问中国，并在同济大学发表演讲', '（2016）京01民终1234号', '2016 | 12 | 31 | 合计',
+                 '1234567890.00元', '本院认为', '本院依法适用简易程序公开开庭进行了审理']
+    for sentence in sentences:
+        print(sentence + '\t' + str(sentence_filter.accept(sentence)))
+    print(sentence_filter.stats())
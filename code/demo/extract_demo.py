@@ -1,44 +1,152 @@
+import argparse
 import os
-import re
+from itertools import tee
 
 import sys
 sys.path.append("..")  # 先跳出当前目录
 from core.nlp import NLP
 from core.extractor import Extractor
+from core.sentence_filter import SentenceFilter
+from tool.corpus_reader import CorpusReader
+from tool.triple_sink import TripleSink
+from tool.triple_dedup import TripleDedup
+from tool.checkpoint import Checkpoint
+from tool.parse_bank import ParseBankWriter
+from tool.metrics import metrics
 
 if __name__ == '__main__':
-    input_path = '../../data/input_text.txt'  # 输入的文本文件
-    output_path = '../../data/knowledge_triple.json'  # 输出的处理结果Json文件
-    if os.path.isfile(output_path):
-        os.remove(output_path)
+    parser = argparse.ArgumentParser(description='知识三元组抽取，支持检查点断点续跑与向已有输出追加')
+    # 输入的文本文件，也可以是目录或glob通配符，支持.gz/.bz2
+    parser.add_argument('--input', default='../../data/input_text.txt', help='输入语料')
+    parser.add_argument('--output', default='../../data/knowledge_triple.json', help='输出的处理结果Json文件')
+    # 每个句子只在句子表中写出一次，三元组只记录出处与字符位置；为空字符串时三元组内联句子原文
+    parser.add_argument('--sentence-output', default='../../data/knowledge_sentence.json', help='句子表Json文件')
+    parser.add_argument('--dedup', choices=['none', 'exact', 'count', 'bloom'], default='exact',
+                        help='去重方式，exact与bloom首次出现时写出，count在结束时才写出三元组(带次数与来源)，不记录检查点')
+    parser.add_argument('--checkpoint', default='../../data/knowledge_triple.checkpoint', help='检查点文件')
+    parser.add_argument('--checkpoint-interval', type=float, default=60.0, help='记录检查点的间隔(秒)')
+    # 超过预算(词数量)的长句在分句边界处分段进行依存句法分析，不指定时整句分析
+    parser.add_argument('--parse-budget', type=int, default=None, help='长句分段的长度预算(如100)')
+    parser.add_argument('--parse-token-cap', type=int, default=200, help='每段词数量的硬上限')
+    # 同时保存NLP分析结果，修改抽取规则后由parse_bank_extract_demo.py直接重放抽取
+    parser.add_argument('--parse-bank', default=None, help='分析库文件')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--resume', action='store_true', help='从检查点继续，截断检查点之后写出的部分输出')
+    group.add_argument('--append', action='store_true',
+                       help='保留已有输出，新语料的三元组接着已有编号写出，文档标识带有运行序号前缀#序号/')
+    args = parser.parse_args()
+    args.sentence_output = args.sentence_output or None
+
+    checkpoint = Checkpoint(args.checkpoint, args.checkpoint_interval)
+    state = checkpoint.load() if (args.resume or args.append) else None
+    if args.parse_bank and (args.resume or args.append):
+        parser.error('--parse-bank requires a complete run, not --resume or --append')
+    if args.resume and state is None:
+        parser.error('no checkpoint to resume from: ' + args.checkpoint)
+    if args.resume and args.dedup == 'count':
+        parser.error('--dedup count writes triples only at the end and cannot resume from a checkpoint')
+    if args.resume and state['input'] != args.input:
+        parser.error('checkpoint was written for input ' + state['input'])
+    if not (args.resume or args.append):
+        for path in (args.output, args.sentence_output, args.checkpoint):
+            if path and os.path.isfile(path):
+                os.remove(path)
     # os.mkdir(output_path)
 
     print('Start extracting...')
 
     # 实例化NLP(分词，词性标注，命名实体识别，依存句法分析)
-    nlp = NLP()
+    nlp = NLP(parse_budget=args.parse_budget, parse_token_cap=args.parse_token_cap)
+    metrics.enable()  # 记录分阶段耗时与吞吐量，metrics.enable(path)可定期写出Prometheus指标文件
     num = 1  # 知识三元组
+    start = None  # 最后完成的(文档标识，句子序号)
 
+    sink = TripleSink(args.output, sentence_path=args.sentence_output)
+    dedup = None if args.dedup == 'none' else TripleDedup(sink, args.dedup)
+    checkpointed = dedup is None or dedup.mode != 'count'
+    if args.resume:
+        if state['finished']:
+            print('Checkpoint is already finished.')
+            sys.exit(0)
+        # 截断检查点之后写出的部分输出，恢复编号与去重状态
+        num = checkpoint.restore(state, sink, dedup)
+        start = state['position']
+        print('Resume after %s, next triple %d' % (start, num))
+    elif args.append:
+        if state is not None and not state['finished']:
+            parser.error('previous run is unfinished, use --resume first: ' + args.checkpoint)
+        # 上次运行完成且去重方式相同时沿用其编号与去重状态，否则由输出的最后一行得到编号
+        if state is not None and state.get('dedup', {}).get('mode', 'none') == args.dedup:
+            num = checkpoint.restore(state, sink, dedup)
+        else:
+            # 没有可用的检查点(如崩溃的count去重运行)时，输出末尾可能有未写完的行，截断后再追加
+            for path in (args.output, args.sentence_output):
+                dropped = Checkpoint.truncate_partial(path)
+                if dropped:
+                    print('WARNING: dropped an incomplete last line (%d bytes) of %s' % (dropped, path),
+                          file=sys.stderr)
+            num = Checkpoint.last_num(args.output)
+        # 新语料的文档标识可能与之前运行的相同(如doc000.txt)，加上新的运行序号前缀，出处不会重复
+        checkpoint.run = Checkpoint.next_run(args.output, args.sentence_output)
+        print('Append to %s, next triple %d, run %d' % (args.output, num, checkpoint.run))
+    if dedup is not None:
+        dedup.num = num
+    if not checkpointed:
+        print('WARNING: --dedup count writes all triples at the end, no checkpoint is recorded and '
+              'a crash loses all output of this run', file=sys.stderr)
+        if os.path.isfile(args.checkpoint):
+            # 删除旧的检查点，避免之后按过期的位置截断输出
+            os.remove(args.checkpoint)
+            print('WARNING: removed the previous checkpoint ' + args.checkpoint, file=sys.stderr)
 
-    with open(input_path, 'r', encoding='utf-8') as f_in:
-        # 分句，获得句子列表
-        origin_sentences = re.split('[。？！；]|\n', f_in.read())
-        # 遍历每一篇文档中的句子
-        for origin_sentence in origin_sentences:
-            # 原始句子长度小于6，跳过
-            if (len(origin_sentence) < 6):
-                continue
+    # 流式读取并分句，过滤长度小于6的句子与表格，数字，案号等非正文行
+    sentence_filter = SentenceFilter()
+    records = ((doc_id, sentence_index, sentence) for doc_id, sentence_index, sentence
+               in CorpusReader().read(args.input, start) if sentence_filter.accept(sentence))
+    # 一份用于批量NLP处理，一份与处理结果对应(tee只缓存一个批次)
+    records, nlp_records = tee(records)
+    # 批量进行分词，词性标注，命名实体识别与依存句法分析
+    sentences = nlp.iter_analyze(record[2] for record in nlp_records)
+    # 遍历每一篇文档中的句子，三元组记录出处(文档标识，句子序号)，去重后经缓冲写出器写入Json文件
+    # 每完成一个句子检查一次是否到了记录检查点的时间
+    bank = None if args.parse_bank is None else ParseBankWriter(
+        args.parse_bank, meta={'input': args.input, 'dict_version': nlp.dict_version,
+                               'skip_unpaired': nlp.pair_gate is not None, 'parse_budget': args.parse_budget})
+    with sink:
+        output = sink if dedup is None else dedup
+        position = start
+        for (doc_id, sentence_index, origin_sentence), sentence in zip(records, sentences):
             print('*****')
             # print(origin_sentence)
-            # 分词处理
-            lemmas = nlp.segment(origin_sentence)
-            # 词性标注
-            words_postag = nlp.postag(lemmas)
-            # 命名实体识别
-            words_netag = nlp.netag(words_postag)
-            # 依存句法分析
-            sentence = nlp.parse(words_netag)
             print(sentence.to_string())
 
+            source = checkpoint.source(doc_id, sentence_index)
+            if bank is not None:
+                bank.append(source, origin_sentence, sentence)
             extractor = Extractor()
-            num = extractor.extract(origin_sentence, sentence, output_path, num)
+            num = extractor.extract(origin_sentence, sentence, output, num, source)
+            position = (doc_id, sentence_index)
+            if checkpointed and checkpoint.due():
+                checkpoint.save(args.input, position, num if dedup is None else dedup.num, sink, dedup)
+        if dedup is not None:
+            dedup.close()
+        if checkpointed:
+            checkpoint.save(args.input, position, num if dedup is None else dedup.num, sink, dedup, finished=True)
+    if bank is not None:
+        bank.close()
+        print('Parse bank: %d sentences, %d word blocks, %d bytes' % (bank.sentence_count, bank.word_block_count,
+                                                                      bank.byte_count))
+
+    print('Wrote %d triples, %d bytes.' % (sink.triple_count, sink.byte_count))
+    if dedup is not None:
+        print('Dedup: %(received)d received, %(kept)d kept, %(duplicates)d duplicates' % dedup.stats())
+    print('Analysis cache: %(hits)d hits, %(misses)d misses, %(evictions)d evictions, hit rate %(hit_rate).3f'
+          % nlp.analysis_cache.stats())
+    print('Load times: %s' % ', '.join('%s %.3fs' % item for item in nlp.load_times.items()))
+    print('Prefilter: %s' % sentence_filter.stats())
+    print('Parse gate: %(parsed)d parsed, %(entities)d skipped (fewer than two entities), '
+          '%(entity_pairs)d skipped (no valid entity pair)' % nlp.gate_counts)
+    if nlp.clause_splitter is not None:
+        print('Clause split: %(split)d long sentences split into %(pieces)d pieces, %(forced)d forced cuts'
+              % nlp.clause_splitter.counts)
+    print(metrics.summary())
@@ -0,0 +1,66 @@
+import argparse
+import os
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from core.parallel_extractor import ParallelExtractor
+from core.sentence_filter import SentenceFilter
+from tool.corpus_reader import CorpusReader
+from tool.triple_sink import TripleSink
+from tool.triple_dedup import TripleDedup
+from tool.triple_store import TripleStore
+from tool.metrics import metrics
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='多进程知识三元组抽取')
+    parser.add_argument('--input', default='../../data/input_text.txt', help='输入的文本文件，目录或glob通配符')
+    parser.add_argument('--output', default='../../data/knowledge_triple.json', help='输出的处理结果Json文件')
+    parser.add_argument('--format', choices=['json', 'sqlite'], default='json',
+                        help='输出格式：Json行文件，或带索引的SQLite三元组库')
+    parser.add_argument('--sentence-output', default='../../data/knowledge_sentence.json',
+                        help='Json格式的句子表文件，每个句子只写出一次，三元组只记录出处与字符位置；'
+                             '为空字符串时三元组内联句子原文')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='工作进程数量')
+    parser.add_argument('--batch-size', type=int, default=64, help='每个任务包含的句子数量')
+    parser.add_argument('--preload', action='store_true', help='在父进程中预加载模型，工作进程fork后继承')
+    parser.add_argument('--dedup', choices=['none', 'exact', 'count', 'bloom'], default='exact',
+                        help='三元组去重方式：不去重，精确去重(流式写出)，精确去重并在结束时写出次数与来源，'
+                             '布隆过滤器去重(内存固定)')
+    parser.add_argument('--dedup-capacity', type=int, default=10000000, help='布隆过滤器预计的三元组数量')
+    parser.add_argument('--entity-lists', nargs='*', default=[],
+                        help='实体列表文件或目录，指定后跳过实体候选少于两个的句子')
+    parser.add_argument('--metrics', help='记录分阶段耗时与吞吐量，并定期写出到该Prometheus指标文件')
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help='写出指标文件的间隔(秒)')
+    args = parser.parse_args()
+    # SQLite三元组库自带句子表
+    args.sentence_output = (args.sentence_output or None) if args.format == 'json' else None
+
+    for path in (args.output, args.sentence_output):
+        if path and os.path.isfile(path):
+            os.remove(path)
+
+    if args.metrics:
+        metrics.enable(args.metrics, args.metrics_interval)
+    print('Start extracting with %d workers...' % args.workers)
+
+    # 流式读取并分句，过滤过短的句子，非正文行，以及(指定实体列表时)实体候选少于两个的句子
+    matcher = SentenceFilter.build_matcher(args.entity_lists) if args.entity_lists else None
+    sentence_filter = SentenceFilter(matcher=matcher)
+    # 保留句子的出处(文档标识，句子序号)，记录在三元组中
+    records = ((doc_id, sentence_index, sentence) for doc_id, sentence_index, sentence
+               in CorpusReader().read(args.input) if sentence_filter.accept(sentence))
+    extractor = ParallelExtractor(args.workers, args.batch_size, args.preload)
+    with (TripleStore(args.output) if args.format == 'sqlite'
+          else TripleSink(args.output, sentence_path=args.sentence_output)) as sink:
+        if args.dedup == 'none':
+            extractor.extract(records, sink)
+        else:
+            with TripleDedup(sink, args.dedup, capacity=args.dedup_capacity) as dedup:
+                extractor.extract(records, dedup)
+            print('Dedup: %(received)d received, %(kept)d kept, %(duplicates)d duplicates' % dedup.stats())
+
+    print('Prefilter: %s' % sentence_filter.stats())
+    print('Wrote %d triples to %s.' % (sink.triple_count, args.output))
+    if args.metrics:
+        metrics.dump()
+        print(metrics.summary())
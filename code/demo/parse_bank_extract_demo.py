@@ -0,0 +1,50 @@
+import argparse
+import os
+import time
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from core.extractor import Extractor
+from tool.parse_bank import ParseBank
+from tool.triple_sink import TripleSink
+from tool.triple_dedup import TripleDedup
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='由分析库重放知识三元组抽取，不加载分词与ltp模型，用于修改抽取规则后重新抽取')
+    # 由extract_demo.py --parse-bank保存
+    parser.add_argument('--parse-bank', default='../../data/parse_bank.bin', help='分析库文件')
+    parser.add_argument('--output', default='../../data/knowledge_triple.json', help='输出的处理结果Json文件')
+    parser.add_argument('--sentence-output', default='../../data/knowledge_sentence.json',
+                        help='句子表Json文件，为空字符串时三元组内联句子原文')
+    parser.add_argument('--dedup', choices=['none', 'exact', 'count', 'bloom'], default='exact', help='去重方式')
+    parser.add_argument('--start', type=int, default=0, help='开始的句子序号(分析库中)')
+    parser.add_argument('--stop', type=int, default=None, help='结束的句子序号(不含)，默认到最后')
+    parser.add_argument('--quiet', action='store_true', help='不打印抽取出的三元组')
+    args = parser.parse_args()
+    args.sentence_output = args.sentence_output or None
+    for path in (args.output, args.sentence_output):
+        if path and os.path.isfile(path):
+            os.remove(path)
+
+    start_time = time.perf_counter()
+    num = 1  # 知识三元组
+    count = 0
+    with ParseBank(args.parse_bank) as bank, TripleSink(args.output, sentence_path=args.sentence_output) as sink:
+        print('Parse bank: %d sentences, %s' % (len(bank), bank.meta))
+        dedup = None if args.dedup == 'none' else TripleDedup(sink, args.dedup)
+        output = sink if dedup is None else dedup
+        # --quiet时抽取规则不打印三元组(而不是把输出重定向到内存中)
+        extractor = Extractor(verbose=not args.quiet)
+        stop = len(bank) if args.stop is None else min(len(bank), args.stop)
+        for index in range(args.start, stop):
+            doc_id, sentence_index, origin_sentence, sentence = bank[index]
+            num = extractor.extract(origin_sentence, sentence, output, num, (doc_id, sentence_index))
+            count += 1
+        if dedup is not None:
+            dedup.close()
+    seconds = time.perf_counter() - start_time
+
+    print('Replayed %d sentences in %.2fs (%.0f sentences/s).' % (count, seconds, count / seconds if seconds else 0))
+    print('Wrote %d triples, %d bytes.' % (sink.triple_count, sink.byte_count))
+    if dedup is not None:
+        print('Dedup: %(received)d received, %(kept)d kept, %(duplicates)d duplicates' % dedup.stats())
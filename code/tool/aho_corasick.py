@@ -0,0 +1,93 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """Aho-Corasick多模式匹配自动机，一次线性扫描找出文本中出现的全部词
+       automaton = AhoCorasick(); automaton.add_word('中国'); automaton.build(); automaton.iter(text)
+    Attributes:
+        goto: dict list，状态转移表，goto[state][char]为下一状态，状态0为根
+        fail: int list，失配指针
+        words: str list list，以该状态结束的词(不含后缀词)
+        output: str list list，到达该状态时匹配到的词(包括经失配指针可达的后缀词)，build时由words重新计算
+        word_count: int，词的数量
+        built: bool，失配指针是否已经计算，添加词后需要重新计算
+    """
+    def __init__(self):
+        self.goto = [dict()]
+        self.fail = [0]
+        self.words = [[]]
+        self.output = [[]]
+        self.word_count = 0
+        self.built = False
+
+    def add_word(self, word):
+        """添加一个词，build之后添加的词在下一次build(或iter)时生效
+        Args:
+            word: str，词
+        """
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append(dict())
+                self.fail.append(0)
+                self.words.append([])
+                self.output.append([])
+                self.goto[state][char] = next_state
+            state = next_state
+        if word not in self.words[state]:
+            self.words[state].append(word)
+            self.word_count += 1
+        self.built = False
+
+    def build(self):
+        """按广度优先顺序计算失配指针，并合并后缀词的输出
+           每个状态的输出由该状态自己的词重新开始计算，重复build不会重复合并后缀词
+        """
+        self.output = [list(words) for words in self.words]
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+                if self.output[self.fail[next_state]]:
+                    self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+        self.built = True
+
+    def iter(self, text):
+        """扫描文本
+        Args:
+            text: str，文本
+        Yields:
+            (end, word): 词在文本中的结束位置(不含)与词
+        """
+        if not self.built:
+            self.build()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word in output[state]:
+                yield i + 1, word
+
+
+if __name__ == '__main__':
+    automaton = AhoCorasick()
+    for word in ['中国', '中国福建', '福建', '厦门', '习近平']:
+        automaton.add_word(word)
+    # 输出：[(7, '习近平'), (11, '中国'), (13, '中国福建'), (13, '福建'), (15, '厦门')]
+    print(list(automaton.iter('国家主席习近平视察中国福建厦门')))
+    # 添加词后重新build，已有的匹配不重复输出
+    automaton.add_word('主席')
+    print(list(automaton.iter('国家主席习近平视察中国福建厦门')))
@@ -0,0 +1,97 @@
+import hashlib
+import math
+import os
+import struct
+
+
+class BloomFilter:
+    """布隆过滤器，以固定内存判断元素是否出现过，存在误判(把未出现的元素判为已出现)，不存在漏判
+    Attributes:
+        capacity: int，预计插入的元素数量
+        error_rate: float，插入capacity个元素后的期望误判率
+        bit_num: int，位数组长度
+        hash_num: int，哈希函数个数
+        count: int，已插入的元素数量
+    """
+    def __init__(self, capacity=10000000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # 最优位数 m = -n*ln(p)/(ln2)^2，最优哈希个数 k = m/n*ln2
+        self.bit_num = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_num = max(1, int(round(self.bit_num / capacity * math.log(2))))
+        self.bits = bytearray((self.bit_num + 7) // 8)
+        self.count = 0
+
+    def get_positions(self, key):
+        """双重哈希计算元素在位数组中的位置
+        Args:
+            key: str，元素
+        Returns:
+            *: generator，hash_num个位置
+        """
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bit_num for i in range(self.hash_num))
+
+    def add(self, key):
+        """插入元素
+        Args:
+            key: str，元素
+        Returns:
+            *: bool，元素可能已经出现过(True)，一定未出现过(False)
+        """
+        seen = True
+        bits = self.bits
+        for position in self.get_positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                seen = False
+                bits[byte] |= mask
+        if not seen:
+            self.count += 1
+        return seen
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self.get_positions(key))
+
+    def memory_size(self):
+        """获得位数组占用的字节数"""
+        return len(self.bits)
+
+    def save(self, path):
+        """将位数组与已插入的元素数量写入文件，用于断点续跑
+        Args:
+            path: str，文件路径
+        """
+        with open(path, 'wb') as f_out:
+            f_out.write(struct.pack('<QQQ', self.bit_num, self.hash_num, self.count))
+            f_out.write(self.bits)
+            f_out.flush()
+            os.fsync(f_out.fileno())
+
+    def load(self, path):
+        """从文件恢复位数组与已插入的元素数量，参数(位数与哈希个数)需与该实例一致
+        Args:
+            path: str，save写出的文件路径
+        """
+        with open(path, 'rb') as f_in:
+            bit_num, hash_num, count = struct.unpack('<QQQ', f_in.read(24))
+            if (bit_num, hash_num) != (self.bit_num, self.hash_num):
+                raise ValueError('bloom filter parameters do not match: ' + path)
+            bits = bytearray(f_in.read())
+        if len(bits) != len(self.bits):
+            raise ValueError('truncated bloom filter file: ' + path)
+        self.bits = bits
+        self.count = count
+
+
+if __name__ == '__main__':
+    bloom_filter = BloomFilter(capacity=100000, error_rate=0.01)
+    for i in range(100000):
+        bloom_filter.add('triple' + str(i))
+    false_positives = sum(('other' + str(i)) in bloom_filter for i in range(100000))
+    print('bits: %d, hashes: %d, bytes: %d' % (bloom_filter.bit_num, bloom_filter.hash_num,
+                                                bloom_filter.memory_size()))
+    print('false positive rate: %.4f' % (false_positives / 100000))
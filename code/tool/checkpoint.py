@@ -0,0 +1,261 @@
+import json
+import os
+import re
+import tempfile
+import time
+
+
+class Checkpoint:
+    """语料处理的检查点，用于断点续跑
+       记录最后完成的(文档标识，句子序号)，下一个三元组编号，输出文件的位置与去重状态，
+       写出器先写入缓冲并同步，再将检查点写入临时文件后原子替换，任何时刻崩溃都保留一个完整的检查点；
+       bloom去重的位数组写入两个交替的文件，检查点只引用已经完整写入的一个；
+       exact去重已写出的三元组追加写入.seen文件(每行一个)，检查点记录其长度，恢复时截断到该长度后读入；
+       count去重在关闭时才写出三元组，输出位置不能反映处理进度，不支持检查点；
+       向已有输出追加新的语料时，新语料的文档标识加上运行序号前缀'#序号/'，与之前运行的出处不会重复
+    Attributes:
+        path: str，检查点Json文件路径
+        interval: float，定期记录的间隔(秒)
+        save_count: int，已记录的次数
+        run: int，本次运行的序号，第一次运行为0(文档标识不加前缀)，每次追加加1，记录在检查点中供续跑使用
+    """
+    run_prefix = re.compile(rb'"#(\d+)/')  # Json中以运行序号前缀开头的字符串
+
+    def __init__(self, path, interval=60.0):
+        self.path = path
+        self.interval = interval
+        self.save_count = 0
+        self.run = 0
+        self.seen_size = None  # exact去重的.seen文件已同步的长度，None表示本次运行尚未写入
+        self.last_save = time.monotonic()
+
+    def load(self):
+        """读取检查点
+        Returns:
+            state: dict，检查点内容，不存在时为None
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r', encoding='utf-8') as f_in:
+            state = json.load(f_in)
+        self.save_count = state.get('save_count', 0)
+        self.run = state.get('run', 0)
+        return state
+
+    def due(self):
+        """是否到了定期记录的时间"""
+        return time.monotonic() - self.last_save >= self.interval
+
+    def save(self, input_path, position, num, sink, dedup=None, finished=False):
+        """记录检查点
+        Args:
+            input_path: str，输入语料路径
+            position: (str, int)，最后完成的(文档标识，句子序号)，尚未完成任何句子时为None
+            num: int，下一个三元组编号(去重时为去重后的编号)
+            sink: TripleSink，三元组写出器
+            dedup: TripleDedup，三元组去重，None表示不去重
+            finished: bool，语料是否已经处理完
+        """
+        if dedup is not None and dedup.mode == 'count':
+            raise ValueError('count dedup writes triples only on close and cannot be checkpointed')
+        state = {'input': input_path, 'position': None if position is None else list(position), 'num': num,
+                 'output': sink.position(), 'finished': finished, 'save_count': self.save_count + 1,
+                 'run': self.run}
+        if dedup is not None:
+            state['dedup'] = {'mode': dedup.mode, 'received': dedup.received_count, 'kept': dedup.kept_count,
+                              'duplicates': dedup.duplicate_count}
+            if dedup.bloom_filter is not None:
+                # 写入与当前检查点引用的文件不同的一个
+                bloom_path = '%s.bloom%d' % (self.path, state['save_count'] % 2)
+                dedup.bloom_filter.save(bloom_path)
+                state['dedup']['bloom'] = os.path.basename(bloom_path)
+            if dedup.mode == 'exact':
+                state['dedup']['seen'] = [os.path.basename(self.path) + '.seen', self.save_seen(dedup)]
+        self.atomic_write(json.dumps(state, ensure_ascii=False, indent=2).encode('utf-8'))
+        self.save_count = state['save_count']
+        self.last_save = time.monotonic()
+
+    def restore(self, state, sink, dedup=None):
+        """恢复到检查点：截断检查点之后写出的部分输出，恢复去重状态，需在写出器open之前调用
+        Args:
+            state: dict，load得到的检查点
+            sink: TripleSink，三元组写出器
+            dedup: TripleDedup，三元组去重，None表示不去重
+        Returns:
+            num: int，下一个三元组编号
+        """
+        sink.truncate(state['output'])
+        if dedup is not None and 'dedup' in state:
+            if state['dedup']['mode'] != dedup.mode:
+                raise ValueError('checkpoint was written with dedup mode ' + state['dedup']['mode'])
+            dedup.received_count = state['dedup']['received']
+            dedup.kept_count = state['dedup']['kept']
+            dedup.duplicate_count = state['dedup']['duplicates']
+            if dedup.bloom_filter is not None:
+                dedup.bloom_filter.load(os.path.join(os.path.dirname(os.path.abspath(self.path)),
+                                                     state['dedup']['bloom']))
+            if dedup.mode == 'exact':
+                self.load_seen(dedup, state['dedup']['seen'][1])
+        return state['num']
+
+    def save_seen(self, dedup):
+        """将exact去重上次记录检查点之后新增的三元组追加写入.seen文件并同步
+        Args:
+            dedup: TripleDedup，exact模式的三元组去重
+        Returns:
+            size: int，.seen文件同步后的长度
+        """
+        # 本次运行第一次写入时重新写出全部三元组，之后只追加新增的
+        keys = dedup.seen if self.seen_size is None else dedup.unsaved
+        with open(self.path + '.seen', 'wb' if self.seen_size is None else 'ab') as f_out:
+            for key in keys:
+                f_out.write((key + '\n').encode('utf-8'))
+            f_out.flush()
+            os.fsync(f_out.fileno())
+            self.seen_size = f_out.tell()
+        dedup.unsaved = []
+        return self.seen_size
+
+    def load_seen(self, dedup, size):
+        """将.seen文件截断到检查点记录的长度，丢弃检查点之后追加的部分，再读入exact去重的三元组集合
+        Args:
+            dedup: TripleDedup，exact模式的三元组去重
+            size: int，检查点记录的.seen文件长度
+        """
+        seen_path = self.path + '.seen'
+        if not os.path.exists(seen_path) or os.path.getsize(seen_path) < size:
+            raise ValueError('seen triples file is shorter than the checkpoint: ' + seen_path)
+        os.truncate(seen_path, size)
+        with open(seen_path, 'r', encoding='utf-8', newline='\n') as f_in:
+            dedup.seen = set(line[:-1] for line in f_in)
+        dedup.unsaved = []
+        self.seen_size = size
+
+    def atomic_write(self, data):
+        """写入临时文件并同步后替换检查点文件
+        Args:
+            data: bytes，检查点内容
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'wb') as f_out:
+            f_out.write(data)
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        os.replace(temp_path, self.path)
+        # 同步目录，保证替换本身持久化
+        directory_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+    def source(self, doc_id, sentence_index):
+        """获得记录在三元组与句子表中的句子出处，追加运行的文档标识带有运行序号前缀，
+           检查点中的位置仍为语料中的文档标识
+        Args:
+            doc_id: str，语料中的文档标识
+            sentence_index: int，句子在文档中的序号
+        Returns:
+            source: (str, int)，句子出处
+        """
+        if self.run == 0:
+            return doc_id, sentence_index
+        return '#%d/%s' % (self.run, doc_id), sentence_index
+
+    @classmethod
+    def next_run(cls, *file_paths):
+        """向已有输出追加时，扫描已有的三元组与句子表，获得比其中出现过的运行序号都大的序号，
+           保证新语料的出处不与之前任何一次运行的出处重复(其他字段恰好以前缀形式开头时序号只会偏大)
+        Args:
+            file_paths: str，已有输出的文件路径，None或不存在的文件被忽略
+        Returns:
+            run: int，本次运行的序号，没有已有输出时为0
+        """
+        run = None
+        for file_path in file_paths:
+            if file_path is None or not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+                continue
+            run = run or 0
+            with open(file_path, 'rb') as f_in:
+                for line in f_in:
+                    for match in cls.run_prefix.finditer(line):
+                        run = max(run, int(match.group(1)))
+        return 0 if run is None else run + 1
+
+    @staticmethod
+    def truncate_partial(file_path):
+        """截断文件末尾没有换行结尾的不完整行(崩溃时的部分写入)，使追加的内容从新的一行开始
+        Args:
+            file_path: str，Json文件路径，None或不存在时忽略
+        Returns:
+            size: int，截掉的字节数
+        """
+        if file_path is None or not os.path.exists(file_path):
+            return 0
+        with open(file_path, 'rb') as f_in:
+            size = end = f_in.seek(0, os.SEEK_END)
+            keep = 0
+            while end > 0:
+                start = max(0, end - 4096)
+                f_in.seek(start)
+                newline = f_in.read(end - start).rfind(b'\n')
+                if newline >= 0:
+                    keep = start + newline + 1
+                    break
+                end = start
+        if keep < size:
+            os.truncate(file_path, keep)
+        return size - keep
+
+    @staticmethod
+    def last_num(file_path):
+        """没有检查点时，由已有输出的最后一个完整行获得下一个三元组编号，用于追加新的语料，
+           没有换行结尾的最后一行是崩溃时未写完的部分，被忽略
+        Args:
+            file_path: str，Json文件路径
+        Returns:
+            num: int，下一个三元组编号
+        Raises:
+            ValueError: 最后一个完整行不是带有编号的三元组
+        """
+        if not os.path.exists(file_path):
+            return 1
+        with open(file_path, 'rb') as f_in:
+            f_in.seek(0, os.SEEK_END)
+            end = f_in.tell()
+            block = b''
+            while end > 0:
+                start = max(0, end - 4096)
+                f_in.seek(start)
+                block = f_in.read(end - start) + block
+                end = start
+                lines = block.split(b'\n')
+                lines.pop()  # 换行之后的部分：空，或未写完的行
+                if end > 0:
+                    lines = lines[1:]  # 块的第一行可能不完整
+                lines = [line for line in lines if line.strip()]
+                if lines:
+                    try:
+                        return json.loads(lines[-1].decode('utf-8'))['编号'] + 1
+                    except (ValueError, KeyError, TypeError):
+                        raise ValueError('last line of %s is not a numbered triple: %r' % (file_path, lines[-1][:200]))
+        return 1
+
+
+if __name__ == '__main__':
+    import sys
+    sys.path.append("..")  # 先跳出当前目录
+    from tool.triple_sink import TripleSink
+
+    checkpoint = Checkpoint('/tmp/knowledge_triple.checkpoint')
+    with TripleSink('/tmp/knowledge_triple.json', mode='w') as sink:
+        sink.append({'编号': 1, '句子': '高克访问中国', '知识': ['高克', '访问', '中国']})
+        checkpoint.save('../../data/input_text.txt', ('input_text.txt', 0), 2, sink)
+        sink.append({'编号': 2, '句子': '奥巴马毕业于哈佛大学', '知识': ['奥巴马', '毕业于', '哈佛大学']})
+    # 模拟检查点之后崩溃：恢复时截断检查点之后写出的三元组
+    state = checkpoint.load()
+    sink = TripleSink('/tmp/knowledge_triple.json')
+    print('resume after %s, next num %d' % (state['position'], checkpoint.restore(state, sink)))
+    print(open('/tmp/knowledge_triple.json', encoding='utf-8').read(), end='')
+    print('next num from output: %d' % Checkpoint.last_num('/tmp/knowledge_triple.json'))
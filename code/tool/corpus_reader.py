@@ -0,0 +1,102 @@
+import bz2
+import glob
+import gzip
+import os
+import re
+
+
+class CorpusReader:
+    """流式读取语料文档并分句，按块读取，内存占用与语料规模无关
+       支持单个文件，目录(递归)或glob通配符，.gz与.bz2压缩文件透明读取
+    Attributes:
+        chunk_size: int，每次读取的字符数
+        max_sentence_length: int，句子最大长度，超过时强制切分，避免无分隔符的超长行占满内存
+    """
+    delimiter = re.compile('[。？！；]|\n')  # 分句符号
+
+    def __init__(self, chunk_size=1 << 20, max_sentence_length=1 << 16):
+        self.chunk_size = chunk_size
+        self.max_sentence_length = max_sentence_length
+
+    def read(self, path, start=None):
+        """读取语料中的所有句子
+        Args:
+            path: str，文件路径，目录或glob通配符
+            start: (str, int)，断点续跑时最后完成的(文档标识，句子序号)，从其后一个句子开始，None表示从头读取
+        Yields:
+            (doc_id, sentence_index, sentence): (str, int, str)，文档标识，句子在文档中的序号(0开始)，句子
+        """
+        documents = self.list_documents(path)
+        if start is not None:
+            # 文档按标识排序，跳过之前的文档；所在文档中的句子仍需分句后跳过
+            doc_ids = [doc_id for doc_id, file_path in documents]
+            if start[0] not in doc_ids:
+                raise ValueError('document not found in corpus: ' + str(start[0]))
+            documents = documents[doc_ids.index(start[0]):]
+        for doc_id, file_path in documents:
+            with self.open_document(file_path) as f_in:
+                for sentence_index, sentence in enumerate(self.split(f_in)):
+                    if start is not None and doc_id == start[0] and sentence_index <= start[1]:
+                        continue
+                    yield doc_id, sentence_index, sentence
+
+    def list_documents(self, path):
+        """列出语料中的文档
+        Args:
+            path: str，文件路径，目录或glob通配符
+        Returns:
+            documents: (str, str) list，(文档标识，文件路径)，按文档标识排序
+        """
+        if os.path.isdir(path):
+            documents = []
+            for root, dirs, files in os.walk(path):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    documents.append((os.path.relpath(file_path, path), file_path))
+            return sorted(documents)
+        if os.path.isfile(path):
+            return [(os.path.basename(path), path)]
+        return [(file_path, file_path) for file_path in sorted(glob.glob(path, recursive=True))
+                if os.path.isfile(file_path)]
+
+    def open_document(self, file_path):
+        """打开文档，根据扩展名透明解压
+        Args:
+            file_path: str，文件路径
+        Returns:
+            *: 文本模式的文件对象
+        """
+        if file_path.endswith('.gz'):
+            return gzip.open(file_path, 'rt', encoding='utf-8')
+        if file_path.endswith('.bz2'):
+            return bz2.open(file_path, 'rt', encoding='utf-8')
+        return open(file_path, 'r', encoding='utf-8')
+
+    def split(self, f_in):
+        """增量分句，跨块边界的句子与下一块拼接后再切分，结果与整体读取后切分一致
+        Args:
+            f_in: 文本模式的文件对象
+        Yields:
+            sentence: str，非空句子
+        """
+        rest = ''  # 上一块末尾未结束的句子
+        while True:
+            chunk = f_in.read(self.chunk_size)
+            if not chunk:
+                break
+            sentences = self.delimiter.split(rest + chunk)
+            rest = sentences.pop()
+            for sentence in sentences:
+                if sentence:
+                    yield sentence
+            if len(rest) > self.max_sentence_length:
+                yield rest
+                rest = ''
+        if rest:
+            yield rest
+
+
+if __name__ == '__main__':
+    reader = CorpusReader()
+    for doc_id, sentence_index, sentence in reader.read('../../data/input_text.txt'):
+        print(doc_id + '\t' + str(sentence_index) + '\t' + sentence)
@@ -0,0 +1,262 @@
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+
+class Histogram:
+    """耗时直方图，桶的上界按指数增长，与Prometheus的histogram一致(累计计数)
+    Attributes:
+        buckets: float list，桶的上界(秒)，最后隐含+Inf
+        counts: int list，落入每个桶(不累计)的样本数量，最后一个为+Inf桶
+        count: int，样本数量
+        sum: float，样本总耗时(秒)
+    """
+    default_buckets = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2,
+                       0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=default_buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        """记录一个样本
+        Args:
+            seconds: float，耗时(秒)
+        """
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def copy(self):
+        """复制直方图"""
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        return histogram
+
+    def merge(self, other):
+        """合并另一个(桶相同的)直方图"""
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q):
+        """根据桶估计分位数，返回所在桶的上界
+        Args:
+            q: float，分位(0~1)
+        Returns:
+            *: float，耗时上界(秒)，落在+Inf桶时返回inf
+        """
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            cumulative += n
+            if n and cumulative >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return 0.0
+
+
+class Metrics:
+    """分阶段耗时与吞吐量统计，覆盖NLP各阶段，DSNF抽取与三元组写出
+       默认关闭，关闭时调用处只有一次属性判断：if metrics.enabled: ...
+       记录与读取都持有锁，服务在线程中处理请求时，其他线程可以通过stats()读取一致的副本
+    Attributes:
+        enabled: bool，是否记录
+        stages: dict，阶段名 -> Histogram，每个句子(或三元组)在该阶段的耗时
+        counters: dict，计数器名(sentences，tokens，triples) -> 数量
+        path: str，Prometheus文本格式的指标文件路径，None表示不写出
+        dump_interval: float，写出指标文件的间隔(秒)
+        start_time: float，开始记录的时间
+    """
+    prefix = 'oere_'  # 指标名前缀，open entity relation extraction
+    counter_names = ('sentences', 'tokens', 'triples')
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.dump_interval = 10.0
+        self.lock = threading.Lock()
+        self.reset()
+
+    def enable(self, path=None, dump_interval=10.0):
+        """开始记录
+        Args:
+            path: str，指标文件路径，None表示不定期写出
+            dump_interval: float，写出间隔(秒)
+        """
+        self.enabled = True
+        self.path = path
+        self.dump_interval = dump_interval
+        self.reset()
+
+    def disable(self):
+        """停止记录，已记录的数据保留"""
+        self.enabled = False
+
+    def reset(self):
+        """清空已记录的数据"""
+        with self.lock:
+            self.stages = dict()
+            self.counters = dict.fromkeys(self.counter_names, 0)
+        self.start_time = time.perf_counter()
+        self.last_dump = time.monotonic()
+
+    def observe(self, stage, start):
+        """记录一个句子(或三元组)在一个阶段从start开始到现在的耗时，每次调用为一个样本
+        Args:
+            stage: str，阶段名
+            start: float，time.perf_counter()得到的开始时间
+        """
+        seconds = time.perf_counter() - start
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, value=1):
+        """增加计数，并按间隔写出指标文件
+        Args:
+            name: str，计数器名
+            value: int，增加的数量
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.path is not None and time.monotonic() - self.last_dump >= self.dump_interval:
+            self.dump()
+
+    def snapshot(self):
+        """取出自上次取出以来的数据并清空，用于从工作进程汇总到父进程
+        Returns:
+            *: (dict, dict)，阶段直方图与计数器
+        """
+        with self.lock:
+            stages, counters = self.stages, self.counters
+            self.stages = dict()
+            self.counters = dict.fromkeys(self.counter_names, 0)
+        return stages, counters
+
+    def merge(self, snapshot):
+        """合并工作进程的数据
+        Args:
+            snapshot: (dict, dict)，snapshot()的返回值
+        """
+        stages, counters = snapshot
+        with self.lock:
+            for stage, other in stages.items():
+                histogram = self.stages.get(stage)
+                if histogram is None:
+                    histogram = self.stages[stage] = Histogram(other.buckets)
+                histogram.merge(other)
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+        if self.path is not None and time.monotonic() - self.last_dump >= self.dump_interval:
+            self.dump()
+
+    def copy(self):
+        """在锁内复制已记录的数据，读取方不会与记录方同时访问同一个字典
+        Returns:
+            *: (dict, dict)，阶段直方图与计数器的副本
+        """
+        with self.lock:
+            return ({stage: histogram.copy() for stage, histogram in self.stages.items()},
+                    dict(self.counters))
+
+    def stats(self):
+        """获得当前统计信息
+        Returns:
+            *: dict，运行时间，各计数器及其每秒数量，各阶段的次数，总耗时，平均，p50与p99耗时(秒)
+        """
+        stages, counters = self.copy()
+        elapsed = time.perf_counter() - self.start_time
+        stats = {'elapsed': elapsed, 'stages': dict()}
+        for name, value in counters.items():
+            stats[name] = value
+            stats[name + '_per_second'] = value / elapsed if elapsed > 0 else 0.0
+        for stage, histogram in stages.items():
+            stats['stages'][stage] = {'count': histogram.count, 'seconds': histogram.sum,
+                                      'mean': histogram.sum / histogram.count if histogram.count else 0.0,
+                                      'p50': histogram.quantile(0.5), 'p99': histogram.quantile(0.99)}
+        return stats
+
+    def to_prometheus(self):
+        """转换为Prometheus文本格式
+        Returns:
+            *: str，指标文本
+        """
+        stages, counters = self.copy()
+        elapsed = time.perf_counter() - self.start_time
+        lines = ['# HELP %sstage_seconds Per-item latency of each pipeline stage.' % self.prefix,
+                 '# TYPE %sstage_seconds histogram' % self.prefix]
+        for stage, histogram in sorted(stages.items()):
+            cumulative = 0
+            for bound, n in zip(histogram.buckets + ('+Inf', ), histogram.counts):
+                cumulative += n
+                lines.append('%sstage_seconds_bucket{stage="%s",le="%s"} %d' % (self.prefix, stage, bound, cumulative))
+            lines.append('%sstage_seconds_sum{stage="%s"} %r' % (self.prefix, stage, histogram.sum))
+            lines.append('%sstage_seconds_count{stage="%s"} %d' % (self.prefix, stage, histogram.count))
+        for name, value in sorted(counters.items()):
+            lines.append('# TYPE %s%s_total counter' % (self.prefix, name))
+            lines.append('%s%s_total %d' % (self.prefix, name, value))
+            lines.append('# TYPE %s%s_per_second gauge' % (self.prefix, name))
+            lines.append('%s%s_per_second %r' % (self.prefix, name, value / elapsed if elapsed > 0 else 0.0))
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path=None):
+        """原子写出Prometheus文本格式的指标文件(可由node_exporter的textfile collector读取)
+        Args:
+            path: str，指标文件路径，默认为enable时指定的路径
+        """
+        path = path or self.path
+        self.last_dump = time.monotonic()
+        if path is None:
+            return
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f_out:
+            f_out.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+    def summary(self):
+        """运行结束时的统计摘要
+        Returns:
+            *: str，各阶段耗时占比与吞吐量
+        """
+        stats = self.stats()
+        total = sum(stage['seconds'] for stage in stats['stages'].values()) or 1.0
+        lines = ['stage\tcount\tseconds\tshare\tmean_ms\tp50_ms\tp99_ms']
+        for name, stage in sorted(stats['stages'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append('%s\t%d\t%.3f\t%.1f%%\t%.3f\t%.3f\t%.3f' % (
+                name, stage['count'], stage['seconds'], stage['seconds'] / total * 100, stage['mean'] * 1000,
+                stage['p50'] * 1000, stage['p99'] * 1000))
+        lines.append('%.1fs elapsed, %.1f sentences/s, %.1f tokens/s, %.1f triples/s' % (
+            stats['elapsed'], stats['sentences_per_second'], stats['tokens_per_second'],
+            stats['triples_per_second']))
+        counters = self.copy()[1]
+        others = sorted(set(counters) - set(self.counter_names))
+        if others:
+            lines.append(', '.join('%s %d' % (name, counters[name]) for name in others))
+        return '\n'.join(lines)
+
+
+# 进程内共享的统计实例，多进程时由各工作进程记录后汇总到父进程
+metrics = Metrics()
+# fork出的工作进程重新创建锁，避免继承fork时其他线程持有的锁
+os.register_at_fork(after_in_child=lambda: setattr(metrics, 'lock', threading.Lock()))
+
+
+if __name__ == '__main__':
+    metrics.enable()
+    for i in range(100):
+        start = time.perf_counter()
+        time.sleep(0.001)
+        metrics.observe('segment', start)
+        metrics.count('sentences')
+        metrics.count('tokens', 20)
+    print(metrics.summary())
+    print(metrics.to_prometheus())
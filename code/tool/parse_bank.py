@@ -0,0 +1,239 @@
+import json
+import mmap
+import os
+import struct
+from collections import OrderedDict
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from bean.word_unit import WordUnit
+from bean.sentence_unit import SentenceUnit
+
+MAGIC = b'PBNK'
+VERSION = 1
+HEADER = struct.Struct('<4sI')  # 魔数，版本
+RECORD = struct.Struct('<IIQI')  # 文档编码，句子序号，词块位置，句子字节数
+WORD = struct.Struct('<iiIHHi')  # 开始位置，结束位置，中心词，词性编码，依存关系编码，词原文字节数(-1表示取自句子)
+COUNT = struct.Struct('<I')  # 词块中的词数量
+OFFSET = struct.Struct('<Q')  # 句子索引中的记录位置
+FOOTER = struct.Struct('<QQQQ4s')  # 句子数量，索引位置，元数据位置，元数据字节数，魔数
+
+
+class ParseBankWriter:
+    """将NLP分析结果(分词，词性，合并后的命名实体，依存关系)写入紧凑的二进制分析库，修改抽取规则后直接重放抽取
+       每个句子一条记录(出处，原句，词块位置)，词块依次为每个词的字符位置，中心词，词性与依存关系编码，
+       词原文与句子中对应位置的文本相同时不重复存储；分析结果缓存命中的同一个SentenceUnit只写出一个词块；
+       关闭时写出句子位置索引，词性/依存关系与文档标识表，最后是定长的尾部，未正常关闭的文件无法读取
+       with ParseBankWriter(file_path) as bank: bank.append(source, origin_sentence, sentence)
+    Attributes:
+        file_path: str，分析库文件路径
+        meta: dict，随分析库保存的说明信息(如分词词典版本)
+        shared_size: int，记录最近写出的SentenceUnit数量，用于共享词块
+        sentence_count: int，已写出的句子数量
+        word_block_count: int，已写出的词块数量
+        byte_count: int，已写出的字节数
+    """
+    def __init__(self, file_path, meta=None, shared_size=10000):
+        self.file_path = file_path
+        self.meta = meta or dict()
+        self.shared_size = shared_size
+        self.sentence_count = 0
+        self.word_block_count = 0
+        self.byte_count = 0
+        self.offsets = []  # 每条记录的位置
+        self.tags = dict()  # 词性/依存关系 -> 编码
+        self.documents = dict()  # 文档标识 -> 编码
+        self.shared = OrderedDict()  # id(SentenceUnit) -> (SentenceUnit, 词块位置)，保持引用使id不被复用
+        self.f_out = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        """以二进制方式新建分析库文件并写入文件头"""
+        if self.f_out is None:
+            self.f_out = open(self.file_path, 'wb')
+            self.write(HEADER.pack(MAGIC, VERSION))
+
+    def write(self, data):
+        """写入数据
+        Returns:
+            offset: int，数据在文件中的位置
+        """
+        offset = self.byte_count
+        self.f_out.write(data)
+        self.byte_count += len(data)
+        return offset
+
+    def get_code(self, table, value):
+        """获得字符串在表中的编码，不存在时加入"""
+        code = table.get(value)
+        if code is None:
+            code = table[value] = len(table)
+        return code
+
+    def append(self, source, sentence, sentence_unit):
+        """写出一个句子的分析结果
+        Args:
+            source: (str, int)，句子出处(文档标识，句子序号)，None时文档标识为空字符串，按写出顺序编号
+            sentence: str，原句(与抽取时的origin_sentence相同)
+            sentence_unit: SentenceUnit，分析结果
+        """
+        self.open()
+        if source is None:
+            source = ('', self.sentence_count)
+        shared = self.shared.get(id(sentence_unit))
+        if shared is not None and shared[0] is sentence_unit:
+            words_offset = shared[1]
+            self.shared.move_to_end(id(sentence_unit))
+        else:
+            words_offset = self.write_words(sentence.strip(), sentence_unit.words)
+            if self.shared_size > 0:
+                self.shared[id(sentence_unit)] = (sentence_unit, words_offset)
+                if len(self.shared) > self.shared_size:
+                    self.shared.popitem(last=False)
+        data = sentence.encode('utf-8')
+        self.offsets.append(self.write(RECORD.pack(self.get_code(self.documents, source[0]), source[1],
+                                                   words_offset, len(data)) + data))
+        self.sentence_count += 1
+
+    def write_words(self, sentence, words):
+        """写出词块
+        Args:
+            sentence: str，去除首尾空白后的句子，词的字符位置相对于该句子
+            words: WordUnit list，词单元
+        Returns:
+            offset: int，词块位置
+        """
+        tags = self.tags
+        parts = [COUNT.pack(len(words))]
+        lemmas = []  # 不能由句子得到的词原文
+        for word in words:
+            if 0 <= word.start and sentence[word.start:word.end] == word.lemma:
+                lemma_size = -1
+            else:
+                lemma = word.lemma.encode('utf-8')
+                lemmas.append(lemma)
+                lemma_size = len(lemma)
+            parts.append(WORD.pack(word.start, word.end, word.head, self.get_code(tags, word.postag),
+                                   self.get_code(tags, word.dependency), lemma_size))
+        self.word_block_count += 1
+        return self.write(b''.join(parts) + b''.join(lemmas))
+
+    def close(self):
+        """写出句子索引，编码表与尾部并关闭文件"""
+        if self.f_out is None:
+            return
+        index_offset = self.write(b''.join(OFFSET.pack(offset) for offset in self.offsets))
+        meta = {'tags': list(self.tags), 'documents': list(self.documents), 'meta': self.meta}
+        data = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        meta_offset = self.write(data)
+        self.write(FOOTER.pack(self.sentence_count, index_offset, meta_offset, len(data), MAGIC))
+        self.f_out.close()
+        self.f_out = None
+        self.shared = OrderedDict()
+
+
+class ParseBank:
+    """以内存映射方式读取分析库，按句子索引随机访问，访问时才重建SentenceUnit
+       with ParseBank(file_path) as bank: for doc_id, sentence_index, sentence, sentence_unit in bank: ...
+    Attributes:
+        file_path: str，分析库文件路径
+        meta: dict，写出时保存的说明信息
+        tags: str list，词性/依存关系编码表
+        documents: str list，文档标识编码表
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as f_in:
+            self.data = mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < HEADER.size + FOOTER.size or HEADER.unpack_from(self.data, 0) != (MAGIC, VERSION):
+            raise ValueError('not a parse bank: ' + file_path)
+        count, self.index_offset, meta_offset, meta_size, magic = FOOTER.unpack_from(
+            self.data, len(self.data) - FOOTER.size)
+        if magic != MAGIC:
+            raise ValueError('incomplete parse bank (not closed): ' + file_path)
+        self.count = count
+        meta = json.loads(self.data[meta_offset:meta_offset + meta_size].decode('utf-8'))
+        self.tags = [sys.intern(tag) for tag in meta['tags']]
+        self.documents = meta['documents']
+        self.meta = meta['meta']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def __getitem__(self, index):
+        """读取一个句子的分析结果
+        Args:
+            index: int，句子在分析库中的序号
+        Returns:
+            (doc_id, sentence_index, sentence, sentence_unit): (str, int, str, SentenceUnit)
+        """
+        if not 0 <= index < self.count:
+            raise IndexError('parse bank index out of range')
+        offset = OFFSET.unpack_from(self.data, self.index_offset + index * OFFSET.size)[0]
+        doc_code, sentence_index, words_offset, sentence_size = RECORD.unpack_from(self.data, offset)
+        offset += RECORD.size
+        sentence = self.data[offset:offset + sentence_size].decode('utf-8')
+        return (self.documents[doc_code], sentence_index, sentence,
+                SentenceUnit(self.read_words(words_offset, sentence.strip())))
+
+    def read_words(self, offset, sentence):
+        """读取词块并重建词单元
+        Args:
+            offset: int，词块位置
+            sentence: str，去除首尾空白后的句子
+        Returns:
+            words: WordUnit list，编号从1开始的词单元
+        """
+        tags = self.tags
+        count = COUNT.unpack_from(self.data, offset)[0]
+        offset += COUNT.size
+        lemma_offset = offset + count * WORD.size
+        words = []
+        for i, (start, end, head, postag, dependency, lemma_size) in enumerate(
+                WORD.iter_unpack(self.data[offset:lemma_offset])):
+            if lemma_size < 0:
+                lemma = sentence[start:end]
+            else:
+                lemma = self.data[lemma_offset:lemma_offset + lemma_size].decode('utf-8')
+                lemma_offset += lemma_size
+            words.append(WordUnit(i + 1, lemma, tags[postag], head, None, tags[dependency], start, end))
+        return words
+
+    def close(self):
+        """关闭内存映射"""
+        self.data.close()
+
+
+if __name__ == '__main__':
+    # 奥巴马毕业于哈佛大学
+    words = [WordUnit(1, '奥巴马', 'nh', 2, None, 'SBV', 0, 3), WordUnit(2, '毕业', 'v', 0, None, 'HED', 3, 5),
+             WordUnit(3, '于', 'p', 2, None, 'CMP', 5, 6), WordUnit(4, '哈佛大学', 'ni', 3, None, 'POB', 6, 10)]
+    sentence_unit = SentenceUnit(words)
+    with ParseBankWriter('/tmp/parse_bank.bin', meta={'dict_version': 'demo'}) as bank:
+        bank.append(('input_text.txt', 0), '奥巴马毕业于哈佛大学', sentence_unit)
+        bank.append(('input_text.txt', 5), ' 奥巴马毕业于哈佛大学\n', sentence_unit)  # 共享词块
+    print('%d sentences, %d word blocks, %d bytes' % (bank.sentence_count, bank.word_block_count,
+                                                      os.path.getsize('/tmp/parse_bank.bin')))
+    with ParseBank('/tmp/parse_bank.bin') as bank:
+        print(bank.meta)
+        for doc_id, sentence_index, sentence, sentence_unit in bank:
+            print(doc_id, sentence_index, repr(sentence))
+            print(sentence_unit.to_string())
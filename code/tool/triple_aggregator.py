@@ -0,0 +1,354 @@
+import argparse
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import zlib
+
+# 各类统计记录的键，记录按键的哈希分区后写入溢出文件
+TRIPLES = 'triples'  # (主语，关系，宾语)
+ENTITIES = 'entities'  # (实体，'E'，关联实体)或(实体，'R'，'S'/'O'，关系)
+PAIRS = 'pairs'  # (主语，宾语，关系)，按(主语，宾语)分区
+RELATIONS = 'relations'  # (关系，)
+
+
+def escape(field):
+    """转义字段中的反斜杠，制表符，换行与回车，溢出文件每行为制表符分隔的字段与次数，
+       文本方式读取时回车也会被当作换行，因此同样需要转义"""
+    if '\\' in field or '\t' in field or '\n' in field or '\r' in field:
+        return field.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return field
+
+
+def unescape(field):
+    """还原escape转义的字段"""
+    if '\\' not in field:
+        return field
+    chars = []
+    i = 0
+    while i < len(field):
+        if field[i] == '\\' and i + 1 < len(field):
+            chars.append({'t': '\t', 'n': '\n', 'r': '\r'}.get(field[i + 1], field[i + 1]))
+            i += 2
+        else:
+            chars.append(field[i])
+            i += 1
+    return ''.join(chars)
+
+
+class TopK:
+    """流式保留次数最多的k个元素，内存与k成正比
+    Attributes:
+        k: int，保留的数量
+        heap: list，(次数，元素)小顶堆
+    """
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+
+    def add(self, count, item):
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (count, item))
+        elif self.heap and count > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (count, item))
+
+    def items(self):
+        """按次数从多到少(次数相同时按元素)排列的[元素，次数]列表"""
+        return [[item, count] for count, item in sorted(self.heap, key=lambda entry: (-entry[0], entry[1]))]
+
+
+class TripleAggregator:
+    """外存知识三元组聚合：流式读取三元组，内存中合并相同记录，超过上限时按键的哈希分区写入磁盘溢出文件，
+       结束时对每个分区进行外部排序(有序段写入磁盘后多路归并)，相同键相邻，逐组累加次数，
+       得到三元组频次，每个实体的关系与关联实体排名，实体对的关系分布与全局排名，内存只与memory_records和top_k有关
+       with TripleAggregator(work_dir) as aggregator: aggregator.add_json(file_path); aggregator.finish(output_dir)
+       也提供append(knowledge)接口，可以直接作为抽取结果的输出对象
+    Attributes:
+        work_dir: str，溢出文件目录，关闭时删除
+        partitions: int，每类记录的分区数量
+        memory_records: int，内存中合并的记录数量上限，也是外部排序每个有序段的行数
+        top_k: int，每个排名保留的数量
+        min_count: int，写出的三元组最少出现次数
+        triple_count: int，读入的三元组数量(按'次数'加权)
+        spill_count: int，写入溢出文件的次数
+    """
+    def __init__(self, work_dir, partitions=64, memory_records=500000, top_k=10, min_count=1):
+        self.work_dir = work_dir
+        self.partitions = partitions
+        self.memory_records = memory_records
+        self.top_k = top_k
+        self.min_count = min_count
+        self.triple_count = 0
+        self.spill_count = 0
+        self.buffer = dict()  # (类别，字段) -> 次数
+        os.makedirs(work_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def append(self, knowledge):
+        """添加一条知识三元组，去重后的三元组按'次数'计数
+        Args:
+            knowledge: dict，抽取出的知识
+        """
+        subject, relation, object_ = knowledge['知识']
+        self.add(subject, relation, object_, knowledge.get('次数', 1))
+
+    def add(self, subject, relation, object_, count=1):
+        """添加一个三元组的各类统计记录
+        Args:
+            subject: str，主语实体
+            relation: str，关系
+            object_: str，宾语实体
+            count: int，出现次数
+        """
+        buffer = self.buffer
+        for key in ((TRIPLES, subject, relation, object_),
+                    (ENTITIES, subject, 'E', object_), (ENTITIES, object_, 'E', subject),
+                    (ENTITIES, subject, 'R', 'S', relation), (ENTITIES, object_, 'R', 'O', relation),
+                    (PAIRS, subject, object_, relation), (RELATIONS, relation)):
+            buffer[key] = buffer.get(key, 0) + count
+        self.triple_count += count
+        if len(buffer) >= self.memory_records:
+            self.spill()
+
+    def add_json(self, file_path):
+        """流式读取knowledge_triple.json(每行一条Json)，只使用'知识'与'次数'，不读入句子表
+        Args:
+            file_path: str，Json文件路径
+        Returns:
+            count: int，读入的行数
+        """
+        count = 0
+        with open(file_path, 'r', encoding='utf-8') as f_in:
+            for line in f_in:
+                if line.strip():
+                    self.append(json.loads(line))
+                    count += 1
+        return count
+
+    def get_partition(self, kind, fields):
+        """按键的哈希获得分区(确定性的crc32，与进程无关)，实体对按(主语，宾语)分区，实体按实体分区"""
+        key = fields[0] if kind == ENTITIES else '\t'.join(fields[:2] if kind == PAIRS else fields)
+        return zlib.crc32(key.encode('utf-8')) % self.partitions
+
+    def get_path(self, kind, partition, run=None):
+        """溢出文件路径，run为外部排序有序段的序号"""
+        name = '%s_%03d' % (kind, partition)
+        return os.path.join(self.work_dir, name + ('.spill' if run is None else '.run%d' % run))
+
+    def spill(self):
+        """将内存中合并的记录追加写入各分区的溢出文件"""
+        files = dict()
+        try:
+            for key, count in self.buffer.items():
+                kind, fields = key[0], key[1:]
+                partition = (kind, self.get_partition(kind, fields))
+                f_out = files.get(partition)
+                if f_out is None:
+                    f_out = files[partition] = open(self.get_path(*partition), 'a', encoding='utf-8')
+                f_out.write('\t'.join(escape(field) for field in fields) + '\t%d\n' % count)
+        finally:
+            for f_out in files.values():
+                f_out.close()
+        self.buffer = dict()
+        self.spill_count += 1
+
+    def iter_sorted(self, kind, partition):
+        """外部排序一个分区：每memory_records行排序并合并相同键后作为一个有序段，多于一个有序段时写入磁盘后多路归并
+        Yields:
+            line: str，按键排序的行(字段与次数)，相同键的行相邻
+        """
+        path = self.get_path(kind, partition)
+        if not os.path.exists(path):
+            return
+        runs = []
+        lines = []
+        with open(path, 'r', encoding='utf-8') as f_in:
+            for line in f_in:
+                lines.append(line)
+                if len(lines) >= self.memory_records:
+                    run_path = self.get_path(kind, partition, len(runs))
+                    with open(run_path, 'w', encoding='utf-8') as f_out:
+                        f_out.writelines(self.combine(sorted(lines)))
+                    runs.append(run_path)
+                    lines = []
+        if not runs:
+            yield from sorted(lines)
+            return
+        lines.sort()
+        files = [open(run_path, 'r', encoding='utf-8') for run_path in runs]
+        try:
+            yield from heapq.merge(lines, *files)
+        finally:
+            for f_in in files:
+                f_in.close()
+
+    def combine(self, lines):
+        """合并有序行中相同键的次数
+        Args:
+            lines: iterable，按键排序的行
+        Yields:
+            line: str，每个键一行
+        """
+        for key, count in self.iter_groups(lines):
+            yield key + '\t%d\n' % count
+
+    @staticmethod
+    def iter_groups(lines):
+        """逐组累加有序行中相同键的次数
+        Args:
+            lines: iterable，按键排序的行
+        Yields:
+            (key, count): (str, int)，转义后以制表符连接的键与总次数
+        """
+        last_key = None
+        total = 0
+        for line in lines:
+            key, count = line.rstrip('\n').rsplit('\t', 1)
+            if key != last_key:
+                if last_key is not None:
+                    yield last_key, total
+                last_key = key
+                total = 0
+            total += int(count)
+        if last_key is not None:
+            yield last_key, total
+
+    def iter_records(self, kind):
+        """依次获得一类记录的全部分区中聚合后的记录
+        Yields:
+            (fields, count): (str list, int)，字段与总次数，同一分区内按键排序
+        """
+        for partition in range(self.partitions):
+            for key, count in self.iter_groups(self.iter_sorted(kind, partition)):
+                yield [unescape(field) for field in key.split('\t')], count
+
+    def finish(self, output_dir):
+        """聚合全部记录并写出结果
+           triple_counts.json：每个三元组及其次数；entity_summary.json：每个实体的次数，作为主语与宾语的关系排名及关联实体排名；
+           pair_relations.json：每个实体对的次数与关系分布(前top_k个)；summary.json：总数与全局排名
+        Args:
+            output_dir: str，输出目录
+        Returns:
+            summary: dict，总数与全局排名
+        """
+        self.spill()
+        os.makedirs(output_dir, exist_ok=True)
+        k = self.top_k
+        summary = {'triples': self.triple_count}
+        top_triples, top_relations, top_entities, top_pairs = TopK(k), TopK(k), TopK(k), TopK(k)
+
+        distinct = 0
+        with open(os.path.join(output_dir, 'triple_counts.json'), 'w', encoding='utf-8') as f_out:
+            for fields, count in self.iter_records(TRIPLES):
+                distinct += 1
+                top_triples.add(count, fields)
+                if count >= self.min_count:
+                    f_out.write(json.dumps({'知识': fields, '次数': count}, ensure_ascii=False) + '\n')
+        summary['distinct_triples'] = distinct
+
+        distinct = 0
+        for fields, count in self.iter_records(RELATIONS):
+            distinct += 1
+            top_relations.add(count, fields[0])
+        summary['distinct_relations'] = distinct
+
+        distinct = 0
+        with open(os.path.join(output_dir, 'entity_summary.json'), 'w', encoding='utf-8') as f_out:
+            entity = None
+            for fields, count in self.iter_records(ENTITIES):
+                if fields[0] != entity:
+                    if entity is not None:
+                        distinct += 1
+                        top_entities.add(record['次数'], entity)
+                        f_out.write(self.dump_entity(record, neighbors, subject_relations, object_relations))
+                    entity = fields[0]
+                    record = {'实体': entity, '次数': 0, '主语': 0, '宾语': 0}
+                    neighbors, subject_relations, object_relations = TopK(k), TopK(k), TopK(k)
+                if fields[1] == 'E':
+                    neighbors.add(count, fields[2])
+                elif fields[2] == 'S':
+                    record['主语'] += count
+                    subject_relations.add(count, fields[3])
+                else:
+                    record['宾语'] += count
+                    object_relations.add(count, fields[3])
+                record['次数'] = record['主语'] + record['宾语']
+            if entity is not None:
+                distinct += 1
+                top_entities.add(record['次数'], entity)
+                f_out.write(self.dump_entity(record, neighbors, subject_relations, object_relations))
+        summary['distinct_entities'] = distinct
+
+        distinct = 0
+        with open(os.path.join(output_dir, 'pair_relations.json'), 'w', encoding='utf-8') as f_out:
+            pair = None
+            for fields, count in self.iter_records(PAIRS):
+                if fields[:2] != pair:
+                    if pair is not None:
+                        distinct += 1
+                        top_pairs.add(total, pair)
+                        f_out.write(self.dump_pair(pair, total, relation_num, relations))
+                    pair = fields[:2]
+                    total = relation_num = 0
+                    relations = TopK(k)
+                total += count
+                relation_num += 1
+                relations.add(count, fields[2])
+            if pair is not None:
+                distinct += 1
+                top_pairs.add(total, pair)
+                f_out.write(self.dump_pair(pair, total, relation_num, relations))
+        summary['distinct_pairs'] = distinct
+
+        summary.update({'top_triples': top_triples.items(), 'top_relations': top_relations.items(),
+                        'top_entities': top_entities.items(), 'top_pairs': top_pairs.items()})
+        with open(os.path.join(output_dir, 'summary.json'), 'w', encoding='utf-8') as f_out:
+            json.dump(summary, f_out, ensure_ascii=False, indent=2)
+        return summary
+
+    @staticmethod
+    def dump_entity(record, neighbors, subject_relations, object_relations):
+        record['主语关系'] = subject_relations.items()
+        record['宾语关系'] = object_relations.items()
+        record['关联实体'] = neighbors.items()
+        return json.dumps(record, ensure_ascii=False) + '\n'
+
+    @staticmethod
+    def dump_pair(pair, total, relation_num, relations):
+        return json.dumps({'实体对': pair, '次数': total, '关系数': relation_num, '关系': relations.items()},
+                          ensure_ascii=False) + '\n'
+
+    def close(self):
+        """删除溢出文件目录"""
+        self.buffer = dict()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='外存聚合知识三元组：三元组频次，实体的关系排名与实体对的关系分布')
+    parser.add_argument('--input', nargs='+', default=['../../data/knowledge_triple.json'], help='三元组Json文件')
+    parser.add_argument('--output-dir', default='../../data/aggregate/', help='输出目录')
+    parser.add_argument('--work-dir', help='溢出文件目录，默认在输出目录下新建临时目录，结束后删除')
+    parser.add_argument('--partitions', type=int, default=64, help='每类记录的分区数量')
+    parser.add_argument('--memory-records', type=int, default=500000, help='内存中合并的记录数量上限')
+    parser.add_argument('--top-k', type=int, default=10, help='每个排名保留的数量')
+    parser.add_argument('--min-count', type=int, default=1, help='写出的三元组最少出现次数')
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='spill_', dir=args.output_dir)
+    with TripleAggregator(work_dir, args.partitions, args.memory_records, args.top_k, args.min_count) as aggregator:
+        for input_path in args.input:
+            print('%s: %d lines' % (input_path, aggregator.add_json(input_path)))
+        summary = aggregator.finish(args.output_dir)
+    print('%(triples)d triples, %(distinct_triples)d distinct, %(distinct_entities)d entities, '
+          '%(distinct_pairs)d pairs, %(distinct_relations)d relations' % summary)
+    print('spilled %d times' % aggregator.spill_count)
+    print('top relations: %s' % summary['top_relations'])
@@ -0,0 +1,143 @@
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from tool.bloom_filter import BloomFilter
+
+
+class TripleDedup:
+    """知识三元组去重，位于ExtractByDSNF.build_triple与写出器之间，提供append(knowledge)接口
+       exact模式：哈希集合精确去重，首次出现时立即写出，只保存三元组本身，内存与不同三元组的数量成正比，
+                  只统计总的重复次数，可以记录检查点
+       count模式：哈希表精确去重，记录每个三元组的出现次数与来源句子，关闭时按首次出现顺序写出，
+                  内存与不同三元组的数量及其来源成正比，结束前没有任何输出，不能记录检查点；
+                  三元组带有出处且写出器使用句子表时(见TripleSink.add_sentence)，收到时即将句子写入句子表，
+                  只记录出处，来源也记录为出处
+       bloom模式：布隆过滤器去重，内存固定，首次出现时立即写出，只统计总的重复次数，
+                  误判会丢弃极少量(约error_rate比例)未出现过的三元组
+       with TripleSink(file_path) as sink, TripleDedup(sink) as dedup: extractor.extract(..., dedup, num)
+    Attributes:
+        sink: TripleSink/list等提供append(knowledge)的输出对象
+        mode: str，去重方式，'exact'，'count'或'bloom'
+        max_sources: int，count模式下每个三元组最多记录的来源句子数量
+        num: int，下一个写出的三元组编号，保留的三元组重新连续编号
+        received_count: int，收到的三元组数量
+        kept_count: int，保留(写出)的三元组数量
+        duplicate_count: int，丢弃的重复三元组数量
+    """
+    modes = {'exact', 'count', 'bloom'}
+
+    def __init__(self, sink, mode='exact', max_sources=10, capacity=10000000, error_rate=0.001, num=1):
+        if mode not in self.modes:
+            raise ValueError('unknown dedup mode: ' + str(mode))
+        self.sink = sink
+        self.mode = mode
+        self.max_sources = max_sources
+        self.num = num
+        self.received_count = 0
+        self.kept_count = 0
+        self.duplicate_count = 0
+        self.seen = set()  # exact模式，已写出的三元组
+        self.unsaved = None  # exact模式，上次记录检查点之后新增的三元组，记录检查点时由Checkpoint启用
+        self.records = dict()  # count模式，三元组 -> 输出记录
+        self.bloom_filter = BloomFilter(capacity, error_rate) if mode == 'bloom' else None
+        self.add_sentence = getattr(sink, 'add_sentence', None)  # 写出器的句子表，没有时为None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def append(self, knowledge):
+        """添加一条知识三元组，重复的三元组只计数
+        Args:
+            knowledge: dict，抽取出的知识
+        """
+        self.received_count += 1
+        if self.mode == 'exact':
+            key = '\t'.join(knowledge['知识'])
+            if key in self.seen:
+                self.duplicate_count += 1
+            else:
+                self.seen.add(key)
+                if self.unsaved is not None:
+                    self.unsaved.append(key)
+                self.write(self.get_record(knowledge))
+            return
+        if self.mode == 'bloom':
+            if self.bloom_filter.add('\t'.join(knowledge['知识'])):
+                self.duplicate_count += 1
+            else:
+                self.write(self.get_record(knowledge))
+            return
+        triple = tuple(knowledge['知识'])
+        source = knowledge.get('出处')
+        # 句子已写入句子表时，只记录出处
+        referenced = (source is not None and self.add_sentence is not None
+                      and self.add_sentence(source, knowledge['句子']))
+        reference = source if referenced else knowledge['句子']
+        record = self.records.get(triple)
+        if record is None:
+            record = self.records[triple] = self.get_record(knowledge, referenced)
+            record['次数'] = 1
+            record['来源'] = [reference]
+            return
+        self.duplicate_count += 1
+        record['次数'] += 1
+        sources = record['来源']
+        if len(sources) < self.max_sources and reference not in sources:
+            sources.append(reference)
+
+    def get_record(self, knowledge, referenced=False):
+        """取出写出时保留的字段
+        Args:
+            knowledge: dict，抽取出的知识
+            referenced: bool，句子是否已写入句子表，是则不保留句子原文
+        Returns:
+            record: dict，句子(或出处)，知识与字符位置
+        """
+        record = dict()
+        for key in ('句子', '出处', '知识', '位置'):
+            if key in knowledge and not (referenced and key == '句子'):
+                record[key] = knowledge[key]
+        return record
+
+    def write(self, record):
+        """为保留的三元组分配编号并写出
+        Args:
+            record: dict，句子(或出处)，知识，字符位置，count模式下还有出现次数与来源
+        """
+        knowledge = {'编号': self.num}
+        knowledge.update(record)
+        self.sink.append(knowledge)
+        self.num += 1
+        self.kept_count += 1
+
+    def close(self):
+        """count模式下按首次出现顺序写出全部三元组及其次数与来源"""
+        for record in self.records.values():
+            self.write(record)
+        self.records = dict()
+
+    def stats(self):
+        """获得去重统计信息
+        Returns:
+            *: dict，收到，保留与重复的三元组数量
+        """
+        return {'mode': self.mode, 'received': self.received_count, 'kept': self.kept_count,
+                'duplicates': self.duplicate_count}
+
+
+if __name__ == '__main__':
+    knowledges = [{'编号': 1, '句子': '高克访问中国', '知识': ['高克', '访问', '中国']},
+                  {'编号': 2, '句子': '高克访问中国', '知识': ['高克', '访问', '中国']},
+                  {'编号': 3, '句子': '高克访问中国并会见习近平', '知识': ['高克', '访问', '中国']},
+                  {'编号': 4, '句子': '奥巴马毕业于哈佛大学', '知识': ['奥巴马', '毕业于', '哈佛大学']}]
+    for mode in ('exact', 'count', 'bloom'):
+        triples = []
+        with TripleDedup(triples, mode) as dedup:
+            for knowledge in knowledges:
+                dedup.append(knowledge)
+        print(dedup.stats())
+        for knowledge in triples:
+            print(knowledge)
@@ -0,0 +1,227 @@
+import json
+import os
+import time
+
+import sys
+sys.path.append("..")  # 先跳出当前目录
+from tool.metrics import metrics
+
+
+class TripleSink:
+    """带缓冲的知识三元组写出器，文件在整个运行期间保持打开，替代AppendToJson逐条打开与关闭文件
+       作为上下文管理器使用：with TripleSink(file_path) as sink: sink.append(knowledge)
+       指定sentence_path时，每个句子只在句子表中写出一次，三元组只记录句子出处与字符位置，不再重复句子原文，
+       没有出处的句子按写出顺序编号，文档标识为空字符串
+    Attributes:
+        file_path: str，Json文件路径
+        sentence_path: str，句子表Json文件路径，每行为{'出处': [文档标识，句子序号], '句子': 原文}，None表示不使用
+        buffer_size: int，缓冲的三元组数量，达到后写入文件
+        flush_interval: float，距上次写入超过该秒数时写入文件，None表示不按时间写入
+        fsync: str，磁盘同步策略，'never'不同步，'flush'每次写入后同步，'close'关闭时同步
+        triple_count: int，已写出的三元组数量
+        sentence_count: int，已写出的句子数量
+        byte_count: int，已写出的字节数
+    """
+    fsync_policies = {'never', 'flush', 'close'}
+
+    def __init__(self, file_path, buffer_size=1000, flush_interval=1.0, fsync='close', mode='a',
+                 sentence_path=None):
+        if fsync not in self.fsync_policies:
+            raise ValueError('unknown fsync policy: ' + str(fsync))
+        self.file_path = file_path
+        self.sentence_path = sentence_path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.mode = mode
+        self.triple_count = 0
+        self.sentence_count = 0
+        self.byte_count = 0
+        self.buffer = []  # 待写入的Json行
+        self.sentence_buffer = []  # 待写入句子表的Json行
+        self.last_source = None  # 上一个写出的句子出处，同一句子的三元组连续到达
+        self.last_sentence = None  # 上一个没有出处的句子及为其分配的出处
+        self.last_flush = time.monotonic()
+        self.f_out = None
+        self.f_sentence = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        """以二进制追加方式打开输出文件"""
+        if self.f_out is None:
+            self.f_out = open(self.file_path, self.mode + 'b')
+            if self.sentence_path is not None:
+                self.f_sentence = open(self.sentence_path, self.mode + 'b')
+            self.last_flush = time.monotonic()
+
+    def truncate(self, position):
+        """断点续跑时将输出文件截断到检查点记录的位置，丢弃检查点之后写出的部分，需在open之前调用
+        Args:
+            position: list，[三元组文件字节数，句子表文件字节数(不使用句子表时为None)]
+        """
+        for path, size in ((self.file_path, position[0]), (self.sentence_path, position[1])):
+            if path is None or size is None:
+                continue
+            if not os.path.exists(path) or os.path.getsize(path) < size:
+                raise ValueError('output is shorter than the checkpoint: ' + path)
+            os.truncate(path, size)
+
+    def position(self):
+        """写入缓冲并同步到磁盘，获得输出文件当前的位置，用于记录检查点
+        Returns:
+            *: list，[三元组文件字节数，句子表文件字节数(不使用句子表时为None)]
+        """
+        self.flush()
+        self.sync()
+        return [self.f_out.tell(), None if self.f_sentence is None else self.f_sentence.tell()]
+
+    def add_sentence(self, source, sentence):
+        """将句子写入句子表，与上一个写出的句子出处相同时不重复写出
+        Args:
+            source: list，句子出处，[文档标识，句子在文档中的序号]
+            sentence: str，句子原文
+        Returns:
+            *: bool，是否使用句子表，不使用时三元组需要自己记录句子原文
+        """
+        if self.sentence_path is None:
+            return False
+        source = list(source)
+        if source != self.last_source:
+            self.last_source = source
+            self.sentence_buffer.append(json.dumps({'出处': source, '句子': sentence}, ensure_ascii=False))
+            self.sentence_count += 1
+        return True
+
+    def reference(self, knowledge):
+        """将三元组中的句子原文写入句子表，替换为句子出处
+        Args:
+            knowledge: dict，抽取出的知识
+        Returns:
+            *: dict，不含句子原文的知识
+        """
+        sentence = knowledge['句子']
+        source = knowledge.get('出处')
+        if source is None:
+            if self.last_sentence is None or self.last_sentence[0] != sentence:
+                self.last_sentence = (sentence, ['', self.sentence_count])
+            source = self.last_sentence[1]
+        self.add_sentence(source, sentence)
+        referenced = {'编号': knowledge.get('编号'), '出处': list(source)}
+        referenced.update((key, value) for key, value in knowledge.items() if key not in referenced and key != '句子')
+        return referenced
+
+    def append(self, knowledge):
+        """添加一条知识三元组
+        Args:
+            knowledge: dict，抽取出的知识
+        """
+        if self.sentence_path is not None and '句子' in knowledge:
+            knowledge = self.reference(knowledge)
+        if metrics.enabled:
+            start = time.perf_counter()
+            self.buffer.append(json.dumps(knowledge, ensure_ascii=False))
+            metrics.observe('write', start)
+        else:
+            self.buffer.append(json.dumps(knowledge, ensure_ascii=False))
+        self.triple_count += 1
+        if (len(self.buffer) >= self.buffer_size or (self.flush_interval is not None
+                and time.monotonic() - self.last_flush >= self.flush_interval)):
+            self.flush()
+
+    def flush(self):
+        """将缓冲写入文件"""
+        timing = metrics.enabled
+        if timing:
+            start = time.perf_counter()
+        if self.sentence_buffer:
+            data = ('\n'.join(self.sentence_buffer) + '\n').encode('utf-8')
+            self.sentence_buffer = []
+            self.f_sentence.write(data)
+            self.byte_count += len(data)
+        if self.f_sentence is not None:
+            self.f_sentence.flush()
+        if self.buffer:
+            data = ('\n'.join(self.buffer) + '\n').encode('utf-8')
+            self.buffer = []
+            self.f_out.write(data)
+            self.byte_count += len(data)
+        self.f_out.flush()
+        if timing:
+            metrics.observe('flush', start)
+        if self.fsync == 'flush':
+            self.sync()
+        self.last_flush = time.monotonic()
+
+    def sync(self):
+        """将已写入的三元组与句子表同步到磁盘"""
+        if self.f_sentence is not None:
+            os.fsync(self.f_sentence.fileno())
+        os.fsync(self.f_out.fileno())
+
+    def close(self):
+        """写入剩余缓冲并关闭文件"""
+        if self.f_out is None:
+            return
+        self.flush()
+        if self.fsync == 'close':
+            self.sync()
+        if self.f_sentence is not None:
+            self.f_sentence.close()
+            self.f_sentence = None
+        self.f_out.close()
+        self.f_out = None
+
+    @staticmethod
+    def read(file_path, sentence_path=None):
+        """读取写出的知识三元组，指定句子表时根据出处还原句子原文
+           句子表全部读入内存(每个句子一次)，三元组逐行读取
+        Args:
+            file_path: str，Json文件路径
+            sentence_path: str，句子表Json文件路径
+        Yields:
+            knowledge: dict，知识三元组，还原后的句子原文记录在'句子'中
+        Raises:
+            ValueError: 句子表中同一出处对应不同的句子，无法确定三元组的句子原文
+        """
+        sentences = dict()
+        if sentence_path is not None:
+            with open(sentence_path, 'r', encoding='utf-8') as f_in:
+                for line in f_in:
+                    if line.strip():
+                        record = json.loads(line)
+                        source = tuple(record['出处'])
+                        # 同一出处可能重复写出(如count去重在关闭时写出)，但句子必须相同
+                        if sentences.setdefault(source, record['句子']) != record['句子']:
+                            raise ValueError('source %s maps to different sentences in %s' % (list(source),
+                                                                                             sentence_path))
+        with open(file_path, 'r', encoding='utf-8') as f_in:
+            for line in f_in:
+                if not line.strip():
+                    continue
+                knowledge = json.loads(line)
+                if '句子' not in knowledge and '出处' in knowledge:
+                    knowledge['句子'] = sentences.get(tuple(knowledge['出处']))
+                yield knowledge
+
+
+if __name__ == '__main__':
+    with TripleSink('/tmp/knowledge_triple.json', buffer_size=2) as sink:
+        sink.append({'编号': 1, '句子': '高克访问中国', '知识': ['高克', '访问', '中国']})
+        sink.append({'编号': 2, '句子': '奥巴马毕业于哈佛大学', '知识': ['奥巴马', '毕业于', '哈佛大学']})
+    print('triples: %d, bytes: %d' % (sink.triple_count, sink.byte_count))
+    # 句子表：同一句子的三元组只记录出处与字符位置
+    with TripleSink('/tmp/knowledge_triple_ref.json', mode='w', sentence_path='/tmp/knowledge_sentence.json') as sink:
+        sink.append({'编号': 1, '句子': '高克访问中国并会见习近平', '出处': ['input_text.txt', 0],
+                     '知识': ['高克', '访问', '中国'], '位置': [[[0, 2]], [[2, 4]], [[4, 6]]]})
+        sink.append({'编号': 2, '句子': '高克访问中国并会见习近平', '出处': ['input_text.txt', 0],
+                     '知识': ['高克', '会见', '习近平'], '位置': [[[0, 2]], [[7, 9]], [[9, 12]]]})
+    print('triples: %d, sentences: %d, bytes: %d' % (sink.triple_count, sink.sentence_count, sink.byte_count))
+    for knowledge in TripleSink.read('/tmp/knowledge_triple_ref.json', '/tmp/knowledge_sentence.json'):
+        print(knowledge)
@@ -0,0 +1,244 @@
+import argparse
+import json
+import sqlite3
+
+
+class TripleStore:
+    """基于SQLite的知识三元组存储，大事务批量写入，按实体，关系与实体对建立索引
+       提供append(knowledge)接口，可以替代TripleSink作为抽取结果的输出对象
+       with TripleStore(db_path) as store: extractor.extract(..., store, num)
+       句子按出处(文档标识，句子序号)只存储一次，三元组引用句子并记录字符位置，查询时还原句子原文，
+       没有出处的句子按写入顺序编号，文档标识为空字符串
+    Attributes:
+        db_path: str，数据库文件路径
+        batch_size: int，每个事务写入的三元组数量
+        triple_count: int，本次写入的三元组数量
+    """
+    schema = [
+        "CREATE TABLE IF NOT EXISTS sentences (id INTEGER PRIMARY KEY, text TEXT NOT NULL, "
+        "doc_id TEXT NOT NULL DEFAULT '', sentence_index INTEGER)",
+        'CREATE TABLE IF NOT EXISTS triples (id INTEGER PRIMARY KEY, num INTEGER, subject TEXT NOT NULL, '
+        'relation TEXT NOT NULL, object TEXT NOT NULL, sentence_id INTEGER REFERENCES sentences(id), '
+        'count INTEGER NOT NULL DEFAULT 1, spans TEXT)',
+    ]
+    # 旧版本数据库缺少的列：表 -> (列名，列定义)
+    migrations = {
+        'sentences': [('doc_id', "TEXT NOT NULL DEFAULT ''"), ('sentence_index', 'INTEGER')],
+        'triples': [('spans', 'TEXT')],
+    }
+    # 写入三元组时按出处查找句子，需要在写入期间存在
+    source_index = 'CREATE UNIQUE INDEX IF NOT EXISTS sentences_source ON sentences (doc_id, sentence_index)'
+    indexes = [
+        # (subject, object)同时用于按主语与按实体对查询
+        'CREATE INDEX IF NOT EXISTS triples_subject_object ON triples (subject, object)',
+        'CREATE INDEX IF NOT EXISTS triples_relation ON triples (relation)',
+        'CREATE INDEX IF NOT EXISTS triples_object ON triples (object)',
+    ]
+
+    def __init__(self, db_path, batch_size=100000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.triple_count = 0
+        self.connection = None
+        self.triples = []  # 待写入的三元组行
+        self.sentences = []  # 待写入的句子行
+        self.last_source = None  # 上一个写入的句子出处，同一句子的三元组连续到达
+        self.last_sentence = None  # 上一个没有出处的句子及为其分配的出处
+        self.sentence_num = 0  # 没有出处的句子的下一个编号
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        """打开数据库，建表；批量写入期间关闭同步，索引在关闭时建立"""
+        if self.connection is not None:
+            return
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=OFF')
+        for statement in self.schema:
+            self.connection.execute(statement)
+        self.migrate()
+        self.connection.execute(self.source_index)
+        self.sentence_num = self.connection.execute(
+            "SELECT IFNULL(MAX(sentence_index) + 1, 0) FROM sentences WHERE doc_id = ''").fetchone()[0]
+
+    def migrate(self):
+        """为旧版本数据库添加缺少的列，旧的句子按编号作为出处"""
+        with self.connection:
+            for table, columns in self.migrations.items():
+                existing = {row[1] for row in self.connection.execute('PRAGMA table_info(%s)' % table)}
+                for name, definition in columns:
+                    if name not in existing:
+                        self.connection.execute('ALTER TABLE %s ADD COLUMN %s %s' % (table, name, definition))
+            self.connection.execute('UPDATE sentences SET sentence_index = id WHERE sentence_index IS NULL')
+
+    def add_sentence(self, source, sentence):
+        """写入句子，与上一个写入的句子出处相同时不重复写入，已存在且句子相同的出处被忽略，
+           句子不同时在写入事务中报错(见flush)
+        Args:
+            source: list，句子出处，[文档标识，句子在文档中的序号]
+            sentence: str，句子原文
+        Returns:
+            *: bool，始终使用句子表(True)
+        """
+        source = tuple(source)
+        if source != self.last_source:
+            self.last_source = source
+            self.sentences.append((sentence, ) + source)
+        return True
+
+    def append(self, knowledge):
+        """添加一条知识三元组
+        Args:
+            knowledge: dict，抽取出的知识，可以带有出处'出处'，字符位置'位置'与去重后的出现次数'次数'，
+                       带有出处而没有句子原文时，句子应已经写入(见add_sentence)
+        """
+        source = knowledge.get('出处')
+        sentence = knowledge.get('句子')
+        if source is None:
+            if self.last_sentence is None or self.last_sentence[0] != sentence:
+                self.last_sentence = (sentence, ('', self.sentence_num))
+                self.sentence_num += 1
+            source = self.last_sentence[1]
+        if sentence is not None:
+            self.add_sentence(source, sentence)
+        subject, relation, object_ = knowledge['知识']
+        spans = knowledge.get('位置')
+        self.triples.append((knowledge.get('编号'), subject, relation, object_, source[0], source[1],
+                             knowledge.get('次数', 1), None if spans is None else json.dumps(spans)))
+        self.triple_count += 1
+        if len(self.triples) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """在一个事务中写入缓冲的句子与三元组，出处已存在但句子不同时回滚事务并报错，报错时丢弃该批次"""
+        try:
+            with self.connection:
+                changes = self.connection.total_changes
+                self.connection.executemany('INSERT OR IGNORE INTO sentences (text, doc_id, sentence_index) '
+                                            'VALUES (?, ?, ?)', self.sentences)
+                if self.connection.total_changes - changes < len(self.sentences):
+                    self.check_sentences()
+                self.connection.executemany(
+                    'INSERT INTO triples (num, subject, relation, object, sentence_id, count, spans) VALUES '
+                    '(?, ?, ?, ?, (SELECT id FROM sentences WHERE doc_id = ? AND sentence_index = ?), ?, ?)',
+                    self.triples)
+        finally:
+            self.sentences = []
+            self.triples = []
+
+    def check_sentences(self):
+        """检查被忽略的句子与已存储的同一出处的句子是否相同，避免三元组引用其他句子的原文
+        Raises:
+            ValueError: 同一出处已存储了不同的句子
+        """
+        for sentence, doc_id, sentence_index in self.sentences:
+            stored = self.connection.execute('SELECT text FROM sentences WHERE doc_id = ? AND sentence_index = ?',
+                                             (doc_id, sentence_index)).fetchone()[0]
+            if stored != sentence:
+                raise ValueError('source %s already stores a different sentence in %s'
+                                 % ([doc_id, sentence_index], self.db_path))
+
+    def close(self):
+        """写入剩余缓冲，建立索引并关闭数据库，剩余缓冲写入失败时已写入的部分仍建立索引"""
+        if self.connection is None:
+            return
+        try:
+            self.flush()
+        finally:
+            with self.connection:
+                for statement in self.indexes:
+                    self.connection.execute(statement)
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.close()
+            self.connection = None
+
+    def import_json(self, json_path, sentence_path=None):
+        """导入已有的knowledge_triple.json(每行一条Json)
+        Args:
+            json_path: str，Json文件路径
+            sentence_path: str，句子表Json文件路径(见TripleSink)，三元组只记录出处时需要
+        Returns:
+            count: int，导入的三元组数量
+        """
+        if sentence_path is not None:
+            with open(sentence_path, 'r', encoding='utf-8') as f_in:
+                for line in f_in:
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        self.add_sentence(record['出处'], record['句子'])
+        count = 0
+        with open(json_path, 'r', encoding='utf-8') as f_in:
+            for line in f_in:
+                line = line.strip()
+                if line:
+                    self.append(json.loads(line))
+                    count += 1
+        return count
+
+    def query(self, where, params, limit):
+        """执行查询并转换为知识三元组
+        Args:
+            where: str，查询条件
+            params: tuple，查询参数
+            limit: int，最多返回的数量，None表示不限制
+        Returns:
+            knowledges: dict list，知识三元组，包括编号，句子，出处，知识，出现次数与字符位置(如果有)，
+                        按索引顺序返回，不额外排序，高频实体带limit查询时不必取出全部结果
+        """
+        sql = ('SELECT t.num, s.text, s.doc_id, s.sentence_index, t.subject, t.relation, t.object, t.count, '
+               't.spans FROM triples t LEFT JOIN sentences s ON s.id = t.sentence_id WHERE ' + where)
+        if limit is not None:
+            sql += ' LIMIT %d' % limit
+        knowledges = []
+        for num, sentence, doc_id, sentence_index, subject, relation, object_, count, spans \
+                in self.connection.execute(sql, params):
+            knowledge = {'编号': num, '句子': sentence, '出处': [doc_id, sentence_index],
+                         '知识': [subject, relation, object_], '次数': count}
+            if spans is not None:
+                knowledge['位置'] = json.loads(spans)
+            knowledges.append(knowledge)
+        return knowledges
+
+    def find_by_entity(self, entity, limit=None):
+        """查询实体作为主语或宾语的全部三元组"""
+        return self.query('t.subject = ? OR t.object = ?', (entity, entity), limit)
+
+    def find_by_relation(self, relation, limit=None):
+        """查询某一关系的全部三元组"""
+        return self.query('t.relation = ?', (relation, ), limit)
+
+    def find_by_pair(self, entity1, entity2, directed=True, limit=None):
+        """查询两个实体之间的三元组
+        Args:
+            entity1: str，实体1(主语)
+            entity2: str，实体2(宾语)
+            directed: bool，只查询entity1为主语的三元组(True)，或两个方向都查询(False)
+            limit: int，最多返回的数量
+        """
+        if directed:
+            return self.query('t.subject = ? AND t.object = ?', (entity1, entity2), limit)
+        return self.query('(t.subject = ? AND t.object = ?) OR (t.subject = ? AND t.object = ?)',
+                          (entity1, entity2, entity2, entity1), limit)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='将knowledge_triple.json导入SQLite三元组库并查询')
+    parser.add_argument('--json', default='../../data/knowledge_triple.json', help='要导入的Json文件')
+    parser.add_argument('--sentences', help='句子表Json文件，三元组只记录出处时需要')
+    parser.add_argument('--db', default='../../data/knowledge_triple.db', help='SQLite数据库文件')
+    parser.add_argument('--entity', default='习近平', help='导入后查询的实体')
+    args = parser.parse_args()
+
+    with TripleStore(args.db) as store:
+        print('imported %d triples' % store.import_json(args.json, args.sentences))
+    with TripleStore(args.db) as store:
+        for knowledge in store.find_by_entity(args.entity):
+            print(knowledge)